@@ -0,0 +1,203 @@
+"""
+All textures and sounds used by the game are loaded through the registry in this file.
+Each file is only read and decoded once, and then shared by everyone asking for it.
+Images packed into atlas pages by build_atlas.py are cut out of the pages, so only the pages are read.
+"""
+
+import json
+import os
+import time
+from typing import List, Optional
+
+import arcade
+import PIL.Image
+
+# The flips of PIL images. Pillow before 9.1 only has them as constants of PIL.Image.
+Transpose = getattr(PIL.Image, "Transpose", PIL.Image)
+
+# The manifest of the atlas pages written by build_atlas.py
+ATLAS_FILE = "images/atlas/atlas.json"
+
+# Everything needed while playing a game. Preloading it avoids hitches when the game starts or a level is cleared.
+# Textures are a filename, or a tuple of the arguments for AssetRegistry.texture() if the texture is flipped.
+IN_GAME_MANIFEST = {
+    "textures": [
+        ("images/playerShip1_red.png", True, False, True),
+        "images/ufoBlue.png",
+        ("images/Lasers/laserBlue01.png", True, False, True),
+        ("images/Lasers/laserGreen07.png", True, False, True),
+        "images/Meteors/meteorGrey_med1.png",
+        "images/Meteors/meteorGrey_tiny1.png",
+        "images/Meteors/meteorGrey_tiny2.png",
+        "images/Meteors/meteorGrey_small1.png",
+        "images/Meteors/meteorGrey_small2.png",
+        "images/Meteors/meteorBrown_tiny1.png",
+        "images/Power-ups/powerupGreen_star.png",
+        "images/Power-ups/powerupYellow_star.png",
+        "images/Power-ups/powerupRed_star.png",
+        "images/Power-ups/powerupGreen_heart.png",
+        "images/Power-ups/powerupYellow_heart.png",
+        "images/Power-ups/powerupRed_heart.png",
+        "images/Power-ups/powerupGreen_bolt.png",
+        "images/Power-ups/powerupRed_bolt.png",
+        "images/Power-ups/powerupRed_asteroid.png",
+        "images/UI/asteroidsGameOverSign.png",
+        "images/UI/basicButtonSmall.png",
+        "images/UI/basicButtonSmallHover.png",
+    ],
+    "sounds": [
+        "sounds/explosionCrunch_000.ogg",
+        "sounds/spaceEngine_003.ogg",
+        "sounds/laserRetro_001.ogg",
+    ],
+}
+
+# Images of the intro and settings screens not used while playing
+MENU_MANIFEST = {
+    "textures": [
+        "images/UI/asteroidsTitle.png",
+        "images/UI/basicButtonBig.png",
+        "images/UI/basicButtonBigHover.png",
+    ],
+}
+
+
+class AssetRegistry:
+    """
+    Loads textures and sounds the first time they are asked for, and hands out the same object after that.
+    Keeps count of cache hits and misses, and of the time spent loading.
+    """
+
+    def __init__(self, atlas_file: str = ATLAS_FILE):
+        self.textures = {}
+        self.sounds = {}
+
+        # Where each image is on the atlas pages, and the pages. Read the first time a texture is loaded.
+        self.atlas_file = atlas_file
+        self.atlas: Optional[dict] = None
+        self.atlas_pages: List[PIL.Image.Image] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    def texture(self, filename: str, flipped_horizontally=False, flipped_vertically=False,
+                flipped_diagonally=False) -> arcade.Texture:
+        """
+        Get a texture, loading it if needed
+        """
+
+        key = (filename, flipped_horizontally, flipped_vertically, flipped_diagonally)
+
+        texture = self.textures.get(key)
+        if texture is not None:
+            self.hits += 1
+            return texture
+
+        self.misses += 1
+        start = time.perf_counter()
+        image = self.atlas_image(filename)
+        if image is not None:
+            # Flipped like arcade.load_texture does it
+            if flipped_diagonally:
+                image = image.transpose(Transpose.TRANSPOSE)
+            if flipped_horizontally:
+                image = image.transpose(Transpose.FLIP_LEFT_RIGHT)
+            if flipped_vertically:
+                image = image.transpose(Transpose.FLIP_TOP_BOTTOM)
+            name = f"{filename}-{flipped_horizontally}-{flipped_vertically}-{flipped_diagonally}"
+            texture = arcade.Texture(name, image, hit_box_algorithm="Simple")
+        else:
+            texture = arcade.load_texture(
+                filename,
+                flipped_horizontally=flipped_horizontally,
+                flipped_vertically=flipped_vertically,
+                flipped_diagonally=flipped_diagonally
+            )
+        self.load_time += time.perf_counter() - start
+
+        self.textures[key] = texture
+        return texture
+
+    def load_atlas(self):
+        """
+        Read the atlas manifest and its pages, if the atlas has been built
+        """
+        self.atlas = {}
+        if not os.path.exists(self.atlas_file):
+            return
+
+        with open(self.atlas_file) as fp:
+            manifest = json.load(fp)
+        folder = os.path.dirname(self.atlas_file)
+        self.atlas_pages = [
+            PIL.Image.open(os.path.join(folder, page)).convert("RGBA") for page in manifest["pages"]
+        ]
+        self.atlas = manifest["images"]
+
+    def atlas_image(self, filename: str) -> Optional[PIL.Image.Image]:
+        """
+        The image of a file cut out of the atlas, or None if it is not in the atlas
+        """
+        if self.atlas is None:
+            self.load_atlas()
+
+        place = self.atlas.get(filename)
+        if place is None:
+            return None
+        x, y = place["x"], place["y"]
+        return self.atlas_pages[place["page"]].crop((x, y, x + place["width"], y + place["height"]))
+
+    def sound(self, filename: str) -> arcade.Sound:
+        """
+        Get a sound, loading it if needed
+        """
+
+        sound = self.sounds.get(filename)
+        if sound is not None:
+            self.hits += 1
+            return sound
+
+        self.misses += 1
+        start = time.perf_counter()
+        sound = arcade.load_sound(filename)
+        self.load_time += time.perf_counter() - start
+
+        self.sounds[filename] = sound
+        return sound
+
+    def preload(self, manifest: dict, sounds: bool = True):
+        """
+        Load everything in a manifest ({"textures": [...], "sounds": [...]}) up front.
+        Leave out the sounds where there is no audio, like when running headless.
+        """
+
+        for texture in manifest.get("textures", []):
+            if isinstance(texture, str):
+                self.texture(texture)
+            else:
+                self.texture(*texture)
+
+        if sounds:
+            for filename in manifest.get("sounds", []):
+                self.sound(filename)
+
+    def stats(self) -> dict:
+        return {
+            "textures": len(self.textures),
+            "sounds": len(self.sounds),
+            "atlas_pages": len(self.atlas_pages),
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_time": self.load_time,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"Assets: {s['textures']} textures ({s['atlas_pages']} atlas pages), {s['sounds']} sounds "
+              f"loaded in {s['load_time']:.3f} s. "
+              f"Cache hits: {s['hits']}, misses: {s['misses']}")
+
+
+# The registry used by the whole game
+ASSETS = AssetRegistry()
@@ -0,0 +1,236 @@
+"""
+Sound effects played through a fixed set of voices.
+Playing an arcade.Sound makes a new pyglet player every time, so a chain of explosions
+makes dozens of players in one frame. The AudioBus makes its players once, when the game starts,
+and plays every sound on one of them:
+
+- each sound plays on a limited number of voices at once. When it asks for one more,
+  its oldest voice is taken over.
+- when all voices are busy, the oldest voice not looping is taken over.
+- the same sound asked for more than once before flush() is only played once.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import arcade
+from pyglet import media
+
+from hud import TextBlock
+
+
+class Voice:
+    """
+    A player of the pool, and the sound it plays
+    """
+
+    def __init__(self, player: media.Player):
+        self.player = player
+        self.sound: Optional[arcade.Sound] = None
+        self.loop = False
+        # perf_counter() when the sound was started, and when it is done. Looping sounds are never done.
+        self.started = 0.0
+        self.ends = 0.0
+        # Volume lost per second while fading out
+        self.fade_speed = 0.0
+
+    def busy(self, now: float) -> bool:
+        return self.sound is not None and (self.loop or now < self.ends)
+
+    def start(self, sound: arcade.Sound, volume: float, speed: float, loop: bool, now: float):
+        player = self.player
+        player.pause()
+        player.volume = volume
+        player.pitch = speed
+        player.loop = loop
+
+        # A player still holding a sound moves on to the new one, and keeps its audio buffers if it can
+        holding = player.source is not None
+        player.queue(sound.source)
+        if holding:
+            player.next_source()
+        player.play()
+
+        self.sound = sound
+        self.loop = loop
+        self.started = now
+        self.ends = now + (sound.source.duration or 0.0) / speed
+        self.fade_speed = 0.0
+
+    def stop(self):
+        self.player.pause()
+        self.loop = False
+        self.ends = 0.0
+        self.fade_speed = 0.0
+
+
+class AudioBus:
+    """
+    Plays sounds on a pool of voices made by setup(). Sounds are not played before setup() is called,
+    like when running headless.
+    """
+
+    def __init__(self):
+        self.voices: List[Voice] = []
+        # Voices a sound can play on at once, unless limit() says otherwise
+        self.max_voices_pr_sound = 4
+        self.limits: Dict[arcade.Sound, int] = {}
+
+        # The loudest volume each sound was asked for at each speed since the last flush()
+        self.pending: Dict[Tuple[arcade.Sound, float], float] = {}
+
+        # Sounds started, merged into a sound asked for before, started on a voice taken over, and not played
+        self.started = 0
+        self.coalesced = 0
+        self.stolen = 0
+        self.dropped = 0
+
+        # The stats drawn by draw()
+        self.text: Optional[TextBlock] = None
+
+    def setup(self, voices: int, max_voices_pr_sound: int):
+        """
+        Make the players of the pool
+        """
+        self.stop_all()
+        self.voices = [Voice(media.Player()) for i in range(voices)]
+        self.max_voices_pr_sound = max_voices_pr_sound
+
+    def limit(self, sound: arcade.Sound, voices: int):
+        """
+        Let a sound play on this many voices at once
+        """
+        self.limits[sound] = voices
+
+    def play(self, sound: arcade.Sound, volume: float = 1.0, speed: float = 1.0):
+        """
+        Play a sound once when flush() is called next
+        """
+        key = (sound, speed)
+        if key in self.pending:
+            self.coalesced += 1
+            self.pending[key] = max(self.pending[key], volume)
+        else:
+            self.pending[key] = volume
+
+    def flush(self):
+        """
+        Start the sounds asked for since the last flush
+        """
+        if not self.pending:
+            return
+
+        now = time.perf_counter()
+        for (sound, speed), volume in self.pending.items():
+            self.start(sound, volume, speed, False, now)
+        self.pending.clear()
+
+    def play_loop(self, sound: arcade.Sound, volume: float = 1.0, speed: float = 1.0) -> Optional[Voice]:
+        """
+        Start playing a sound over and over right away. Returns the voice to stop it with, or None if no voice was free.
+        Looping voices are only taken over by the same sound.
+        """
+        return self.start(sound, volume, speed, True, time.perf_counter())
+
+    def start(self, sound: arcade.Sound, volume: float, speed: float, loop: bool, now: float) -> Optional[Voice]:
+        voice = self.voice_for(sound, now)
+        if voice is None:
+            self.dropped += 1
+            return None
+
+        voice.start(sound, volume, speed, loop, now)
+        self.started += 1
+        return voice
+
+    def voice_for(self, sound: arcade.Sound, now: float) -> Optional[Voice]:
+        """
+        The voice to play a sound on: the oldest voice of the sound if it plays on all the voices it may,
+        else a free voice, else the oldest voice not looping
+        """
+        playing = [v for v in self.voices if v.sound is sound and v.busy(now)]
+        if len(playing) >= self.limits.get(sound, self.max_voices_pr_sound):
+            self.stolen += 1
+            return min(playing, key=lambda v: v.started)
+
+        for voice in self.voices:
+            if not voice.busy(now):
+                return voice
+
+        one_shots = [v for v in self.voices if not v.loop]
+        if one_shots:
+            self.stolen += 1
+            return min(one_shots, key=lambda v: v.started)
+        return None
+
+    def stop(self, voice: Optional[Voice]):
+        """
+        Stop a looping voice. A voice done looping may play another sound by now, so it is left alone.
+        """
+        if voice is not None and voice.loop:
+            voice.stop()
+
+    def fade_out(self, voice: Optional[Voice], seconds: float):
+        """
+        Turn the volume of a voice down to nothing over some seconds, and stop it
+        """
+        if voice is None or not voice.loop:
+            return
+        if seconds <= 0:
+            voice.stop()
+        else:
+            voice.fade_speed = voice.player.volume / seconds
+
+    def update(self, delta_time: float):
+        """
+        Turn down the voices fading out
+        """
+        for voice in self.voices:
+            if voice.fade_speed > 0:
+                volume = voice.player.volume - voice.fade_speed * delta_time
+                if volume <= 0:
+                    voice.stop()
+                else:
+                    voice.player.volume = volume
+
+    def stop_all(self):
+        self.pending.clear()
+        for voice in self.voices:
+            voice.stop()
+
+    def stats(self) -> dict:
+        """
+        Busy voices, in total and for each sound, and the counts since the game started
+        """
+        now = time.perf_counter()
+        busy = [v for v in self.voices if v.busy(now)]
+        sounds: Dict[str, int] = {}
+        for voice in busy:
+            name = voice.sound.file_name.rsplit("/", 1)[-1]
+            sounds[name] = sounds.get(name, 0) + 1
+
+        return {
+            "voices": len(self.voices),
+            "busy": len(busy),
+            "sounds": sounds,
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+        }
+
+    def draw(self, x: float, top: float, line_height: float = 16):
+        """
+        Draw the stats, starting at the top left corner (x, top)
+        """
+        s = self.stats()
+        lines = [f"voices {s['busy']}/{s['voices']}"]
+        lines += [f"  {name:<22}{n:>8}" for name, n in sorted(s["sounds"].items())]
+        lines.append(f"started {s['started']} merged {s['coalesced']}")
+        lines.append(f"stolen {s['stolen']} dropped {s['dropped']}")
+        if self.text is None or self.text.line_height != line_height:
+            self.text = TextBlock(line_height)
+        self.text.draw(lines, x, top)
+
+
+# The audio bus used by the whole game
+AUDIO = AudioBus()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+"""
+Plays many games headless with the scripted player, to see how changes to the config change the difficulty.
+The games are spread over all cores. Every combination of the values given with --set is played
+with the same seeds, and the result of every game is written to a JSON lines file as it finishes:
+
+    python balance.py --games 1000 --set ASTEROIDS_PR_SPLIT=2,3 --set UFO_FIRE_RATE_FACTOR_PR_LEVEL=0.85,0.95
+
+A summary of each combination is printed when all games are done.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import tomli
+
+from config import Config, ConfigError, load_config
+from assets import ASSETS, IN_GAME_MANIFEST
+from simulation import GameSimulation, scripted_input
+
+
+class Game(NamedTuple):
+    """
+    A game to play: the config values to change, and the seed of the simulation
+    """
+    overrides: Tuple[Tuple[str, object], ...]
+    seed: int
+    max_ticks: int
+
+
+# The config and the configs with overrides made in a worker process
+_config: Config = None
+_configs: Dict[tuple, Config] = {}
+
+
+def init_worker(config: Config):
+    global _config
+    _config = config
+    # Only textures, there is no audio when headless
+    ASSETS.preload(IN_GAME_MANIFEST, sounds=False)
+
+
+def play_game(game: Game) -> dict:
+    """
+    Play a game until the player dies or max_ticks have passed, and return how it went
+    """
+
+    config = _configs.get(game.overrides)
+    if config is None:
+        config = _config.replace(**dict(game.overrides))
+        _configs[game.overrides] = config
+
+    sim = GameSimulation(config, seed=game.seed)
+    tick_times = np.zeros(game.max_ticks)
+    peak_entities = 0
+
+    for tick in range(game.max_ticks):
+        start = time.perf_counter()
+        sim.step(scripted_input(tick))
+        tick_times[tick] = time.perf_counter() - start
+        peak_entities = max(peak_entities, len(sim.entities))
+        if sim.game_over:
+            break
+
+    tick_times = tick_times[:sim.ticks] * 1000
+    return {
+        "overrides": dict(game.overrides),
+        "seed": game.seed,
+        "level": sim.level,
+        "score": sim.player_score,
+        "ticks": sim.ticks,
+        "seconds_alive": sim.ticks * sim.delta_time,
+        "game_over": sim.game_over,
+        "peak_entities": peak_entities,
+        "tick_ms_mean": float(tick_times.mean()),
+        "tick_ms_p95": float(np.percentile(tick_times, 95)),
+        "tick_ms_max": float(tick_times.max()),
+    }
+
+
+def parse_override(text: str) -> Tuple[str, list]:
+    """
+    KEY=value1,value2,... with values written as in the toml file
+    """
+    key, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected KEY=value1,value2,... not {text}")
+    try:
+        return key.strip(), tomli.loads(f"values = [{values}]")["values"]
+    except tomli.TOMLDecodeError as e:
+        raise argparse.ArgumentTypeError(f"bad values for {key}: {e}")
+
+
+def make_games(overrides: List[Tuple[str, list]], games: int, seed: int, max_ticks: int) -> List[Game]:
+    """
+    games games for every combination of the override values. Each combination gets the same seeds.
+    """
+    keys = [key for key, values in overrides]
+    combinations = itertools.product(*(values for key, values in overrides))
+    return [
+        Game(tuple(zip(keys, combination)), seed + n, max_ticks)
+        for combination in combinations
+        for n in range(games)
+    ]
+
+
+def summarize(results: List[dict]) -> List[dict]:
+    """
+    Averages and spreads of the results of each combination of overrides
+    """
+    groups: Dict[str, List[dict]] = {}
+    for r in results:
+        groups.setdefault(json.dumps(r["overrides"], sort_keys=True), []).append(r)
+
+    summary = []
+    for overrides, group in groups.items():
+        levels = np.array([r["level"] for r in group])
+        summary.append({
+            "overrides": json.loads(overrides),
+            "games": len(group),
+            "level_mean": float(levels.mean()),
+            "level_median": float(np.median(levels)),
+            "level_max": int(levels.max()),
+            "score_mean": float(np.mean([r["score"] for r in group])),
+            "seconds_alive_mean": float(np.mean([r["seconds_alive"] for r in group])),
+            "survived": sum(not r["game_over"] for r in group),
+            "peak_entities_max": max(r["peak_entities"] for r in group),
+            "tick_ms_p95_mean": float(np.mean([r["tick_ms_p95"] for r in group])),
+        })
+    return summary
+
+
+def print_summary(summary: List[dict]):
+    print(f"{'overrides':<40}{'games':>7}{'level':>8}{'median':>8}{'max':>5}{'score':>9}{'alive s':>9}"
+          f"{'peak':>6}{'p95 ms':>8}")
+    for s in summary:
+        overrides = ", ".join(f"{k}={v}" for k, v in s["overrides"].items()) or "(config)"
+        print(f"{overrides:<40}{s['games']:>7}{s['level_mean']:>8.2f}{s['level_median']:>8.1f}{s['level_max']:>5}"
+              f"{s['score_mean']:>9.0f}{s['seconds_alive_mean']:>9.1f}{s['peak_entities_max']:>6}"
+              f"{s['tick_ms_p95_mean']:>8.3f}")
+
+
+def main():
+    config = load_config("my_game.toml")
+
+    parser = argparse.ArgumentParser(description="Play many headless games to balance the difficulty")
+    parser.add_argument("--games", type=int, default=config['BALANCE_GAMES'],
+                        help="games to play for every combination of values")
+    parser.add_argument("--set", type=parse_override, action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="config values to try. Can be given more than once, all combinations are played")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the first game of each combination")
+    parser.add_argument("--max-ticks", type=int, default=config['BALANCE_MAX_TICKS'],
+                        help="ticks after which a game is stopped")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes playing games")
+    parser.add_argument("--out", default="balance.jsonl", help="file the result of every game is written to")
+    parser.add_argument("--summary", metavar="FILE", help="also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    # Check the overrides before starting any processes.
+    # Every process already keeps a core busy, so the level planner has no thread of its own.
+    config = config.replace(PLAN_LEVELS_IN_BACKGROUND=False)
+    try:
+        for key, values in args.set:
+            if key not in config:
+                raise ConfigError(f"Unknown config key {key}")
+            for value in values:
+                config.replace(**{key: value})
+    except ConfigError as e:
+        parser.error(str(e))
+
+    games = make_games(args.set, args.games, args.seed, args.max_ticks)
+    print(f"Playing {len(games)} games in {args.workers} processes, writing results to {args.out}")
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(config,)) as executor, \
+            open(args.out, "w") as fp:
+        chunksize = max(1, len(games) // (args.workers * 16))
+        for n, result in enumerate(executor.map(play_game, games, chunksize=chunksize), start=1):
+            fp.write(json.dumps(result) + "\n")
+            results.append(result)
+            if n % 100 == 0:
+                fp.flush()
+                print(f"{n}/{len(games)} games, {n / (time.perf_counter() - start):.1f} games/second")
+    duration = time.perf_counter() - start
+
+    print(f"{len(games)} games in {duration:.1f} s: {len(games) / duration:.1f} games/second")
+    summary = summarize(results)
+    print_summary(summary)
+
+    if args.summary:
+        with open(args.summary, "w") as fp:
+            json.dump(summary, fp, indent=2)
+        print(f"Summary saved to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+"""
+Benchmarks of the game logic. Runs a number of scenarios headless, and reports
+ticks per second, tick times and how far the memory in use rises during a tick for each of them.
+Every scenario is warmed up, then timed a few times, and the medians are reported and compared.
+
+The results can be saved as a baseline, and a later run can be compared against it:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json
+
+The scenarios are built from the values in my_game.toml.
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from config import load_config
+from assets import ASSETS, IN_GAME_MANIFEST
+from simulation import GameSimulation, scripted_input
+from starfield import Starfield
+from particles import ParticleSystem
+
+
+class Scenario:
+    """
+    Something to run tick by tick.
+    setup() is called before the first tick, and again (untimed) if the scenario is finished.
+    """
+
+    name = ""
+    description = ""
+
+    def setup(self, config: dict, seed: int):
+        pass
+
+    def step(self, tick: int):
+        pass
+
+    @property
+    def finished(self) -> bool:
+        return False
+
+
+class IntroScenario(Scenario):
+    name = "intro"
+    description = "the blinking starfield of the intro"
+
+    def setup(self, config, seed):
+        random.seed(seed)
+        self.starfield = Starfield(no_of_stars=config['STARS_ON_SCREEN_INTRO'],
+                                   max_x=config['SCREEN_WIDTH'],
+                                   max_y=config['SCREEN_HEIGHT'],
+                                   base_size=config['STARS_BASE_SIZE'],
+                                   scale=config['STARS_SCALE'],
+                                   fade_speed=config['STARS_FADE_SPEED'])
+        angle = random.random() * 2 * math.pi
+        self.change = (math.sin(angle), math.cos(angle))
+
+    def step(self, tick):
+        self.starfield.on_update(*self.change)
+
+
+class GameScenario(Scenario):
+    """
+    A game played by the scripted player, starting on a level.
+    The player has plenty of lives, so the game goes on.
+    """
+
+    def __init__(self, name: str, description: str, level=1, overrides=None, splits=0):
+        self.name = name
+        self.description = description
+        # Config values to change, or functions making them from the config
+        self.level = level
+        self.overrides = overrides or {}
+        self.splits = splits
+
+    def setup(self, config, seed):
+        overrides = {key: value(config) if callable(value) else value for key, value in self.overrides.items()}
+        config = config.replace(PLAYER_START_LIVES=1000, **overrides)
+        level = self.level(config) if callable(self.level) else self.level
+        splits = self.splits(config) if callable(self.splits) else self.splits
+        self.sim = GameSimulation(config, seed=seed, level=level)
+
+        # Split all Asteroids as if they were shot
+        for n in range(splits):
+            for asteroid in list(self.sim.asteroid_list):
+                self.sim.split_asteroid(asteroid, self.sim.rng.randrange(0, 360))
+
+    def step(self, tick):
+        self.sim.step(scripted_input(tick))
+
+    @property
+    def finished(self):
+        return self.sim.game_over
+
+
+class ExplosionScenario(Scenario):
+    name = "explosion_storm"
+    description = "new explosions all the time, until the particle cap is reached"
+
+    def setup(self, config, seed):
+        self.config = config
+        self.rng = random.Random(seed)
+        self.particles = ParticleSystem(config['EXPLOSION_MAX_PARTICLES'], seed=seed)
+        self.textures = [ASSETS.texture("images/Meteors/meteorGrey_tiny1.png")]
+
+    def step(self, tick):
+        c = self.config
+        for n in range(c['BENCHMARK_EXPLOSIONS_PR_TICK']):
+            self.particles.burst(
+                position=(self.rng.uniform(0, c['WORLD_WIDTH']), self.rng.uniform(0, c['WORLD_HEIGHT'])),
+                textures=self.textures,
+                amount=c['EXPLOSION_PARTICLE_AMOUNT'],
+                speed=c['EXPLOSION_PARTICLE_SPEED'],
+                lifetime_min=c['EXPLOSION_PARTICLE_LIFETIME_MIN'],
+                lifetime_max=c['EXPLOSION_PARTICLE_LIFETIME_MAX'],
+                scale=c['EXPLOSION_PARTICLE_SIZE'])
+        self.particles.update()
+
+
+SCENARIOS = [
+    IntroScenario(),
+    GameScenario("level_1", "the first level"),
+    GameScenario(
+        "late_level",
+        "a late level, with hundreds of asteroids after splits",
+        level=lambda c: c['BENCHMARK_LATE_LEVEL'],
+        overrides={'ASTEROIDS_PR_SPLIT': lambda c: c['BENCHMARK_LATE_LEVEL_PR_SPLIT']},
+        splits=lambda c: c['BENCHMARK_LATE_LEVEL_SPLITS']
+    ),
+    GameScenario(
+        "ufo_heavy",
+        "UFOs spawning all the time",
+        overrides={
+            'UFO_SPAWN_RATE': lambda c: c['BENCHMARK_UFO_SPAWN_RATE'],
+            'UFO_SPAWN_RATE_FACTOR_PR_LEVEL': 1.0,
+        }
+    ),
+    ExplosionScenario(),
+]
+
+
+def time_ticks(scenario: Scenario, config: dict, ticks: int, warm_up_ticks: int, seed: int) -> dict:
+    """
+    Set up a scenario, run it untimed for warm_up_ticks so caches and pools are filled, then time every tick
+    """
+    scenario.setup(config, seed)
+    for tick in range(warm_up_ticks):
+        if scenario.finished:
+            scenario.setup(config, seed + tick)
+        scenario.step(tick)
+
+    tick_times = []
+    for tick in range(warm_up_ticks, warm_up_ticks + ticks):
+        if scenario.finished:
+            scenario.setup(config, seed + tick)
+        start = time.perf_counter()
+        scenario.step(tick)
+        tick_times.append(time.perf_counter() - start)
+
+    tick_times = np.array(tick_times) * 1000
+    return {
+        "ticks_per_second": ticks / (tick_times.sum() / 1000),
+        "p50_ms": float(np.percentile(tick_times, 50)),
+        "p95_ms": float(np.percentile(tick_times, 95)),
+        "p99_ms": float(np.percentile(tick_times, 99)),
+    }
+
+
+def run_scenario(scenario: Scenario, config: dict, ticks: int, warm_up_ticks: int, repeats: int,
+                 allocation_ticks: int, seed: int) -> dict:
+    """
+    Time a scenario repeats times and keep the median of each timing, so one slow run does not count.
+    Then run it again with memory tracing.
+    """
+
+    runs = [time_ticks(scenario, config, ticks, warm_up_ticks, seed) for n in range(repeats)]
+    result = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+    result["repeats"] = repeats
+
+    # How far the traced memory rises above where it was before each tick. This is the memory of the
+    # temporary objects alive at the same time during the tick, not a count of allocations:
+    # tracemalloc only sees the blocks alive, not how many were made and freed again.
+    # tracemalloc.reset_peak() is new in Python 3.9.
+    peaks = []
+    if not hasattr(tracemalloc, "reset_peak"):
+        allocation_ticks = 0
+    scenario.setup(config, seed)
+    for tick in range(warm_up_ticks):
+        if scenario.finished:
+            scenario.setup(config, seed + tick)
+        scenario.step(tick)
+    tracemalloc.start()
+    for tick in range(warm_up_ticks, warm_up_ticks + allocation_ticks):
+        if scenario.finished:
+            scenario.setup(config, seed + tick)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        scenario.step(tick)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    result["tick_memory_peak_kib"] = float(np.mean(peaks) / 1024) if peaks else None
+    return result
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':<16}{'ticks/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>10}")
+    for name, r in results.items():
+        peak = "-" if r['tick_memory_peak_kib'] is None else f"{r['tick_memory_peak_kib']:.1f}"
+        print(f"{name:<16}{r['ticks_per_second']:>10.0f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}"
+              f"{r['p99_ms']:>10.3f}{peak:>10}")
+        if baseline is not None and name in baseline:
+            b = baseline[name]
+            changes = [
+                f"{100 * (r[key] / b[key] - 1):+.1f}%" if r[key] is not None and b.get(key) else "-"
+                for key in ("ticks_per_second", "p50_ms", "p95_ms", "p99_ms", "tick_memory_peak_kib")
+            ]
+            print(f"{'  vs baseline':<16}" + "".join(f"{c:>10}" for c in changes))
+    print("Times are the median of the repeated runs. peak KiB is how far the memory in use rose during a tick, "
+          "on average. It is not a count of allocations.")
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Scenarios with fewer ticks per second or a slower p95 tick than the baseline allows
+    """
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b is None:
+            continue
+        if r["ticks_per_second"] < b["ticks_per_second"] * (1 - threshold) or r["p95_ms"] > b["p95_ms"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    config = load_config("my_game.toml")
+
+    parser = argparse.ArgumentParser(description="Benchmark the game logic")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (all if none given): "
+                        + ", ".join(s.name for s in SCENARIOS))
+    parser.add_argument("--ticks", type=int, default=config['BENCHMARK_TICKS'], help="ticks to time in each scenario")
+    parser.add_argument("--repeats", type=int, default=config['BENCHMARK_REPEATS'],
+                        help="times each scenario is timed. The median is reported")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results with a saved baseline")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - {s.name for s in SCENARIOS}
+    if unknown:
+        parser.error("unknown scenario: " + ", ".join(sorted(unknown)))
+
+    # Only textures, there is no audio when headless
+    ASSETS.preload(IN_GAME_MANIFEST, sounds=False)
+
+    results = {}
+    for scenario in SCENARIOS:
+        if args.scenarios and scenario.name not in args.scenarios:
+            continue
+        print(f"Running {scenario.name}: {scenario.description}")
+        results[scenario.name] = run_scenario(
+            scenario, config, args.ticks, config['BENCHMARK_WARM_UP_TICKS'], args.repeats,
+            config['BENCHMARK_ALLOCATION_TICKS'], args.seed
+        )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)["results"]
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as fp:
+            json.dump({
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "ticks": args.ticks,
+                "repeats": args.repeats,
+                "seed": args.seed,
+                "results": results,
+            }, fp, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, config['BENCHMARK_REGRESSION_THRESHOLD'])
+        if regressions:
+            print("Slower than the baseline: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
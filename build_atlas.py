@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""
+Packs the images used by the game into a few big atlas pages, so the game reads a few files
+when it starts instead of opening every PNG on its own:
+
+    python build_atlas.py
+
+The pages and a manifest of where each image is on them are written to images/atlas/.
+The AssetRegistry cuts textures out of the pages when the manifest is there,
+and loads the images one by one when it is not. Run it again when images are added or changed.
+Only Pillow is needed, no window.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import time
+from typing import Dict, List, Tuple
+
+from PIL import Image
+
+from assets import ATLAS_FILE, IN_GAME_MANIFEST, MENU_MANIFEST
+
+
+def used_images() -> List[str]:
+    """
+    The image files of the textures in the manifests, without the flips
+    """
+    filenames = []
+    for manifest in (IN_GAME_MANIFEST, MENU_MANIFEST):
+        for texture in manifest["textures"]:
+            filename = texture if isinstance(texture, str) else texture[0]
+            if filename not in filenames:
+                filenames.append(filename)
+    return filenames
+
+
+def all_images(folder: str = "images") -> List[str]:
+    """
+    Every PNG in the images folder, except the atlas pages
+    """
+    atlas_folder = pathlib.Path(ATLAS_FILE).parent
+    return sorted(
+        path.as_posix() for path in pathlib.Path(folder).rglob("*.png")
+        if path.parent != atlas_folder
+    )
+
+
+def pack(sizes: Dict[str, Tuple[int, int]], page_size: int, padding: int) -> Dict[str, Tuple[int, int, int]]:
+    """
+    Place rectangles on pages of page_size x page_size pixels, in rows, tallest first.
+    Returns the page, x and y of each rectangle. The rectangles are kept padding pixels apart,
+    so a texture never picks up the edge of its neighbour when it is scaled.
+    """
+    places = {}
+    page, x, y, row_height = 0, padding, padding, 0
+
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], -sizes[n][0], n)):
+        width, height = sizes[name]
+        if width + 2 * padding > page_size or height + 2 * padding > page_size:
+            raise ValueError(f"{name} is {width}x{height}, too big for pages of {page_size}x{page_size}")
+
+        # Next row, or next page
+        if x + width + padding > page_size:
+            x, y, row_height = padding, y + row_height + padding, 0
+        if y + height + padding > page_size:
+            page, x, y, row_height = page + 1, padding, padding, 0
+
+        places[name] = (page, x, y)
+        x += width + padding
+        row_height = max(row_height, height)
+
+    return places
+
+
+def build(filenames: List[str], atlas_file: str, page_size: int, padding: int) -> dict:
+    """
+    Write the atlas pages and the manifest, and return the manifest
+    """
+    images = {filename: Image.open(filename).convert("RGBA") for filename in filenames}
+    places = pack({filename: image.size for filename, image in images.items()}, page_size, padding)
+
+    folder = os.path.dirname(atlas_file)
+    os.makedirs(folder, exist_ok=True)
+
+    # Pages are only as big as the images on them
+    pages = max(page for page, x, y in places.values()) + 1
+    extents = [[1, 1] for n in range(pages)]
+    for filename, (page, x, y) in places.items():
+        width, height = images[filename].size
+        extents[page][0] = max(extents[page][0], x + width + padding)
+        extents[page][1] = max(extents[page][1], y + height + padding)
+
+    page_images = [Image.new("RGBA", tuple(size), (0, 0, 0, 0)) for size in extents]
+    manifest = {"pages": [], "images": {}}
+    for filename, (page, x, y) in places.items():
+        image = images[filename]
+        page_images[page].paste(image, (x, y))
+        # x and y of the top left corner, like PIL counts them
+        manifest["images"][filename] = {"page": page, "x": x, "y": y, "width": image.width, "height": image.height}
+
+    for n, page_image in enumerate(page_images):
+        page_file = f"{pathlib.Path(atlas_file).stem}_{n}.png"
+        page_image.save(os.path.join(folder, page_file), optimize=True)
+        manifest["pages"].append(page_file)
+
+    with open(atlas_file, "w") as fp:
+        json.dump(manifest, fp, indent=1, sort_keys=True)
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the images of the game into texture atlas pages")
+    parser.add_argument("--all", action="store_true", help="pack every PNG in images/, not only the ones used")
+    parser.add_argument("--page-size", type=int, default=2048, help="width and height of the pages at most")
+    parser.add_argument("--padding", type=int, default=2, help="transparent pixels between images")
+    args = parser.parse_args()
+
+    filenames = all_images() if args.all else used_images()
+
+    start = time.perf_counter()
+    try:
+        manifest = build(filenames, ATLAS_FILE, args.page_size, args.padding)
+    except ValueError as e:
+        parser.error(str(e))
+    duration = time.perf_counter() - start
+
+    print(f"{len(manifest['images'])} images packed into {len(manifest['pages'])} pages in {duration:.2f} s. "
+          f"Manifest saved to {ATLAS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
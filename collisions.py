@@ -0,0 +1,317 @@
+"""
+Collision checks for the game.
+Checks can either use arcade directly, which tests a sprite against every sprite in a list,
+or a spatial hash, which only tests sprites in the grid cells close by.
+The spatial hash checks first test if the bounding circles of two sprites overlap, and only then
+if their hit boxes do, using hit boxes turned in steps instead of turning them every tick.
+The CollisionStage finds all collisions of a tick between the pairs of layers in the config,
+before anything is done about them.
+"""
+
+import math
+from typing import Collection, Dict, List, NamedTuple, Sequence, Tuple
+
+import arcade
+import numpy as np
+
+from entity_store import EntityStore, get_bounding_radius
+
+# Values for the COLLISION_METHOD config key
+METHOD_ARCADE = "arcade"
+METHOD_SPATIAL_HASH = "spatial_hash"
+
+# Layers of sprites which can collide, used in the COLLISION_MASKS config key
+PLAYER = "player"
+PLAYER_SHOT = "player_shot"
+UFO_SHOT = "ufo_shot"
+ASTEROID = "asteroid"
+UFO = "ufo"
+POWER_UP = "power_up"
+LAYERS = (PLAYER, PLAYER_SHOT, UFO_SHOT, ASTEROID, UFO, POWER_UP)
+
+
+class SpatialHash:
+    """
+    A uniform grid of cells. Each sprite is put in the cell containing its center.
+    A query looks in all cells within reach of the biggest sprite in the grid.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[tuple, list] = {}
+        self.max_radius = 0.0
+
+    def clear(self):
+        self.cells = {}
+        self.max_radius = 0.0
+
+    def insert(self, sprite, x: float, y: float, radius: float):
+        """
+        Add a single sprite
+        """
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        self.cells.setdefault(key, []).append(sprite)
+        self.max_radius = max(self.max_radius, radius)
+
+    def rebuild(self, sprites: list, x: np.ndarray, y: np.ndarray, radius: np.ndarray):
+        """
+        Replace the content of the grid with the given sprites
+        """
+        self.clear()
+        if len(sprites) == 0:
+            return
+
+        cell_x = np.floor(x / self.cell_size).astype(np.int64).tolist()
+        cell_y = np.floor(y / self.cell_size).astype(np.int64).tolist()
+        cells = self.cells
+        for sprite, key in zip(sprites, zip(cell_x, cell_y)):
+            cells.setdefault(key, []).append(sprite)
+        self.max_radius = float(radius.max())
+
+    def query(self, x: float, y: float, radius: float) -> list:
+        """
+        All sprites which may touch a circle
+        """
+        reach = radius + self.max_radius
+        first_x = math.floor((x - reach) / self.cell_size)
+        last_x = math.floor((x + reach) / self.cell_size)
+        first_y = math.floor((y - reach) / self.cell_size)
+        last_y = math.floor((y + reach) / self.cell_size)
+
+        found = []
+        cells = self.cells
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    found.extend(cell)
+        return found
+
+
+class HitBoxCache:
+    """
+    The bounding radius of the hit box of each texture, and the hit box turned to every step of step degrees.
+    Both are worked out the first time a texture is checked. Hit boxes are off by at most half a step,
+    which is much less than a pixel for small sprites and a step of a degree.
+    """
+
+    def __init__(self, step: float = 1.0):
+        self.steps = max(1, round(360 / step))
+        # Texture -> (radius, turned hit boxes). The hit boxes are not scaled or moved.
+        self.shapes: Dict[arcade.Texture, Tuple[float, list]] = {}
+
+    def shape(self, texture: arcade.Texture) -> Tuple[float, list]:
+        shape = self.shapes.get(texture)
+        if shape is None:
+            points = np.array(texture.hit_box_points, dtype=np.float64)
+            radius = float(np.hypot(points[:, 0], points[:, 1]).max())
+
+            # Turned counterclockwise, like arcade turns them
+            angles = np.radians(np.arange(self.steps) * (360 / self.steps))[:, np.newaxis]
+            cos, sin = np.cos(angles), np.sin(angles)
+            turned = np.stack((
+                points[:, 0] * cos - points[:, 1] * sin,
+                points[:, 0] * sin + points[:, 1] * cos
+            ), axis=2)
+
+            shape = (radius, [[tuple(point) for point in hit_box] for hit_box in turned.tolist()])
+            self.shapes[texture] = shape
+        return shape
+
+    def radius(self, sprite: arcade.Sprite) -> float:
+        return self.shape(sprite.texture)[0] * sprite.scale
+
+    def hit_box(self, sprite: arcade.Sprite) -> list:
+        """
+        The hit box of a sprite where it is, turned to the nearest step
+        """
+        hit_boxes = self.shape(sprite.texture)[1]
+        points = hit_boxes[round(sprite.angle * self.steps / 360) % self.steps]
+        scale = sprite.scale
+        x, y = sprite.position
+        return [(px * scale + x, py * scale + y) for px, py in points]
+
+    def collide(self, a: arcade.Sprite, b: arcade.Sprite) -> bool:
+        """
+        True if the hit boxes of two sprites overlap. Sprites with bounding circles not touching are rejected
+        without looking at the hit boxes.
+        """
+        reach = self.radius(a) + self.radius(b)
+        ax, ay = a.position
+        bx, by = b.position
+        if (ax - bx) ** 2 + (ay - by) ** 2 > reach * reach:
+            return False
+        return arcade.are_polygons_intersecting(self.hit_box(a), self.hit_box(b))
+
+
+class Collisions:
+    """
+    Checks a sprite against a SpriteList with the method chosen in the config.
+    In spatial hash mode the grids are built from the EntityStore once per tick with rebuild(),
+    and sprites added during the tick are inserted with add().
+    """
+
+    def __init__(self, store: EntityStore, method: str = METHOD_SPATIAL_HASH, cell_size: float = 128,
+                 angle_step: float = 1.0):
+
+        if method not in (METHOD_ARCADE, METHOD_SPATIAL_HASH):
+            raise ValueError(f"Unknown collision method: {method}")
+
+        self.store = store
+        self.method = method
+        self.cell_size = cell_size
+
+        # A grid for each SpriteList checked against
+        self.grids: Dict[arcade.SpriteList, SpatialHash] = {}
+        self.hit_boxes = HitBoxCache(angle_step)
+
+    def rebuild(self, sprite_lists: List[arcade.SpriteList]):
+        """
+        Build a grid for each of the SpriteLists from the current positions in the store
+        """
+
+        if self.method != METHOD_SPATIAL_HASH:
+            return
+
+        store = self.store
+        n = store.count
+        for sprite_list in sprite_lists:
+            grid = self.grids.setdefault(sprite_list, SpatialHash(self.cell_size))
+            if sprite_list not in store.sprite_lists:
+                grid.clear()
+                continue
+            indices = np.flatnonzero(store.list_index[:n] == store.sprite_lists.index(sprite_list))
+            grid.rebuild(
+                [store.sprites[i] for i in indices.tolist()],
+                store.x[indices],
+                store.y[indices],
+                store.radius[indices]
+            )
+
+    def add(self, sprite):
+        """
+        Put a sprite added during the tick into the grid of its SpriteList
+        """
+
+        if self.method != METHOD_SPATIAL_HASH:
+            return
+
+        grid = self.grids.get(sprite.sprite_lists[0])
+        if grid is not None:
+            grid.insert(sprite, sprite.center_x, sprite.center_y, get_radius(sprite))
+
+    def check(self, sprite: arcade.Sprite, sprite_list: arcade.SpriteList) -> list:
+        """
+        All sprites in the SpriteList colliding with the sprite
+        """
+
+        grid = self.grids.get(sprite_list)
+
+        if self.method == METHOD_ARCADE or grid is None:
+            return arcade.check_for_collision_with_list(sprite, sprite_list)
+
+        x, y = sprite.position
+        collide = self.hit_boxes.collide
+        return [
+            other
+            for other in grid.query(x, y, get_radius(sprite))
+            # Sprites killed earlier in the tick are still in the grid
+            if other is not sprite and other.sprite_lists and collide(sprite, other)
+        ]
+
+
+def get_radius(sprite) -> float:
+    """
+    Bounding radius of a sprite, from the store if it is in one
+    """
+    store = getattr(sprite, "store", None)
+    if store is not None:
+        return float(store.radius[sprite.store_index])
+    return get_bounding_radius(sprite)
+
+
+class CollisionEvent(NamedTuple):
+    """
+    Sprite a of layer first collided with sprite b of layer second
+    """
+    first: str
+    second: str
+    a: arcade.Sprite
+    b: arcade.Sprite
+
+
+class CollisionStage:
+    """
+    Checks the pairs of layers in masks once per tick, in the order given, and returns what collided
+    as a list of CollisionEvents. Nothing is killed or split while checking, that is up to whoever
+    handles the events afterwards.
+
+    A sprite takes part in one collision per tick at most, so a shot never hits two Asteroids,
+    and an Asteroid is never hit by two shots. Sprites of the layers in repeatable can take part in more,
+    like the player picking up two power ups at once.
+
+    Every layer is a sequence of sprites. Layers checked against, the second of a pair, must be SpriteLists
+    moved by the EntityStore of the Collisions.
+    """
+
+    def __init__(self, collisions: Collisions, masks: Sequence[Tuple[str, str]],
+                 layers: Dict[str, Sequence[arcade.Sprite]], repeatable: Sequence[str] = ()):
+        for first, second in masks:
+            for layer in (first, second):
+                if layer not in layers:
+                    raise ValueError(f"Unknown collision layer: {layer}")
+
+        self.collisions = collisions
+        self.masks = [tuple(mask) for mask in masks]
+        self.layers = layers
+        self.repeatable = set(repeatable)
+
+        # The lists the grids are built for
+        self.targets = []
+        for first, second in self.masks:
+            if layers[second] not in self.targets:
+                self.targets.append(layers[second])
+
+        # Sprites checked and collisions found in the last tick
+        self.checks = 0
+        self.found = 0
+
+    def detect(self, skip: Collection[Tuple[str, str]] = ()) -> List[CollisionEvent]:
+        """
+        All collisions between the layers in their current positions.
+        The pairs of layers in skip are not checked this time, and their sprites stay free for the other pairs.
+        """
+        self.collisions.rebuild(self.targets)
+
+        # ids of the sprites done colliding this tick
+        used = set()
+        events = []
+        checks = 0
+        check = self.collisions.check
+
+        for first, second in self.masks:
+            if (first, second) in skip:
+                continue
+            targets = self.layers[second]
+            if len(targets) == 0:
+                continue
+            first_used = first not in self.repeatable
+            second_used = second not in self.repeatable
+
+            for a in self.layers[first]:
+                if id(a) in used:
+                    continue
+                checks += 1
+                for b in check(a, targets):
+                    if id(b) in used:
+                        continue
+                    events.append(CollisionEvent(first, second, a, b))
+                    if second_used:
+                        used.add(id(b))
+                    if first_used:
+                        used.add(id(a))
+                        break
+
+        self.checks = checks
+        self.found = len(events)
+        return events
@@ -0,0 +1,331 @@
+"""
+The config of the game, loaded from my_game.toml and user_settings.toml.
+Every value is checked against a schema when the config is loaded,
+so a bad value stops the game at start-up rather than in the middle of a game.
+"""
+
+from typing import Dict, List, NamedTuple
+
+from tools import load_toml
+from spawning import spawn_sampler
+from collisions import LAYERS
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class Rule(NamedTuple):
+    """
+    What a config value must look like
+    """
+    type: type
+    # Smallest allowed value
+    minimum: float = None
+    # The value must be greater than 0
+    positive: bool = False
+    # Allowed values
+    choices: tuple = None
+
+
+def integer(minimum=None, positive=False) -> Rule:
+    return Rule(int, minimum, positive)
+
+
+def number(minimum=None, positive=False) -> Rule:
+    return Rule(float, minimum, positive)
+
+
+def key() -> Rule:
+    return Rule(int, 0)
+
+
+SCHEMA: Dict[str, Rule] = {
+    "SPRITE_SCALING": number(positive=True),
+
+    "SCREEN_WIDTH": integer(positive=True),
+    "SCREEN_HEIGHT": integer(positive=True),
+    "WORLD_WIDTH": integer(positive=True),
+    "WORLD_HEIGHT": integer(positive=True),
+
+    "PLAYER_START_X": number(),
+    "PLAYER_START_Y": number(),
+    "PLAYER_START_SPEED_MIN": number(0),
+    "PLAYER_START_SPEED_MAX": number(0),
+    "PLAYER_START_ANGLE_MIN": integer(),
+    "PLAYER_START_ANGLE_MAX": integer(),
+    "PLAYER_START_LIVES": integer(positive=True),
+    "PLAYER_ROTATE_SPEED": number(0),
+    "PLAYER_THRUST": number(0),
+    "PLAYER_SHOT_SPEED": number(positive=True),
+    "PLAYER_SPEED_LIMIT": number(positive=True),
+    "PLAYER_INVINCIBILITY_SECONDS": number(0),
+    "PLAYER_FIRE_RATE": number(positive=True),
+    "PLAYER_SHOT_RANGE": number(positive=True),
+    "PLAYER_THRUST_KEY": key(),
+    "PLAYER_FIRE_KEY": key(),
+    "EXIT_SETTINGS_KEY": key(),
+    "PLAYER_TURN_RIGHT_KEY": key(),
+    "PLAYER_TURN_LEFT_KEY": key(),
+    "PLAYER_FIRE_JOYBUTTON": integer(0),
+    "PLAYER_THRUST_JOYBUTTON": integer(0),
+    "PLAYER_SELECT_JOYSTICK": integer(0),
+    "PLAYER_START_JOYSTICK": integer(0),
+    "PLAYER_SHOCKWAVE_STRENGTH": number(0),
+    "PLAYER_SHOCKWAVE_RANGE": number(0),
+    "THRUSTER_EMIT_RATE": number(positive=True),
+    "THRUSTER_EMIT_TIME": number(0),
+    "PLAYER_ENGINE_SHAKE": number(0),
+
+    "ASTEROIDS_SPREAD": integer(0),
+    "ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER": number(0),
+    "ASTEROIDS_MINIMUM_SPAWN_SPACING": number(0),
+    "ASTEROIDS_PR_LEVEL": integer(positive=True),
+    "ASTEROID_NUM_MOD_PR_LEVEL": integer(0),
+    "ASTEROIDS_SPEED": number(0),
+    "ASTEROIDS_SPEED_MOD_PR_LEVEL": number(),
+    "ASTEROID_SCORE_VALUES": Rule(list),
+    "ASTEROIDS_PR_SPLIT": integer(0),
+    "ASTEROIDS_SHAKE_AMPLITUDE": number(0),
+
+    "UFO_SPEED": integer(2),
+    "UFO_SPEED_MOD_PR_LEVEL": number(0),
+    "UFO_DIR_CHANGE_RATE": number(positive=True),
+    "UFO_SPAWN_RATE": number(positive=True),
+    "UFO_SPAWN_RATE_FACTOR_PR_LEVEL": number(positive=True),
+    "UFO_POINTS_REWARD": integer(0),
+    "UFO_SHOT_SPEED": number(positive=True),
+    "UFO_SHOT_RANGE": number(positive=True),
+    "UFO_FIRE_RATE": number(positive=True),
+    "UFO_FIRE_RATE_FACTOR_PR_LEVEL": number(positive=True),
+    "UFO_SIZE_SMALL": number(positive=True),
+    "UFO_SIZE_BIG": number(positive=True),
+    "UFO_SHOCKWAVE_STRENGTH": number(0),
+    "UFO_SHOCKWAVE_RANGE": number(0),
+
+    "EXPLOSION_PARTICLE_AMOUNT": integer(0),
+    "EXPLOSION_PARTICLE_SPEED": number(0),
+    "EXPLOSION_PARTICLE_LIFETIME_MIN": number(positive=True),
+    "EXPLOSION_PARTICLE_LIFETIME_MAX": number(positive=True),
+    "EXPLOSION_PARTICLE_SIZE": number(positive=True),
+    "EXPLOSION_SHAKE_AMPLITUDE": number(0),
+    "EXPLOSION_MAX_PARTICLES": integer(0),
+
+    "TITLE_X": number(),
+    "TITLE_Y": number(),
+    "SETTINGS_BUTTON_X": number(),
+    "SETTINGS_BUTTON_Y": number(),
+    "BUTTON_X": number(),
+    "BUTTON_Y": number(),
+    "BUTTON_SCALE": number(positive=True),
+
+    "UI_PLAY_KEY": key(),
+    "UI_RESTART_KEY": key(),
+    "UI_SETTINGS_KEY": key(),
+
+    "PROFILER_TOGGLE_KEY": key(),
+    "PROFILER_HISTORY": integer(positive=True),
+
+    "AUDIO_VOICES": integer(positive=True),
+    "AUDIO_MAX_VOICES_PR_SOUND": integer(positive=True),
+    "AUDIO_THRUST_FADE_SECONDS": number(0),
+
+    "SHOT_FADE_SPEED": number(0),
+    "SHOT_FADE_START": number(0),
+
+    "COLLISION_METHOD": Rule(str, choices=("arcade", "spatial_hash")),
+    "COLLISION_CELL_SIZE": number(positive=True),
+    "COLLISION_ANGLE_STEP": number(positive=True),
+    "COLLISION_MASKS": Rule(list),
+
+    "STARS_ON_SCREEN_GAME": integer(0),
+    "STARS_ON_SCREEN_INTRO": integer(0),
+    "STARS_SCALE": number(positive=True),
+    "STARS_BASE_SIZE": integer(positive=True),
+    "STARS_FADE_SPEED": number(positive=True),
+
+    "BENCHMARK_TICKS": integer(positive=True),
+    "BENCHMARK_WARM_UP_TICKS": integer(0),
+    "BENCHMARK_REPEATS": integer(positive=True),
+    "BENCHMARK_ALLOCATION_TICKS": integer(0),
+    "BENCHMARK_LATE_LEVEL": integer(1),
+    "BENCHMARK_LATE_LEVEL_SPLITS": integer(0),
+    "BENCHMARK_LATE_LEVEL_PR_SPLIT": integer(0),
+    "BENCHMARK_UFO_SPAWN_RATE": number(positive=True),
+    "BENCHMARK_EXPLOSIONS_PR_TICK": integer(0),
+    "BENCHMARK_REGRESSION_THRESHOLD": number(0),
+
+    "BALANCE_GAMES": integer(positive=True),
+    "BALANCE_MAX_TICKS": integer(positive=True),
+
+    "SOAK_MINUTES": number(positive=True),
+    "SOAK_SAMPLE_SECONDS": number(positive=True),
+    "SOAK_RESTART_EVERY": integer(positive=True),
+    "SOAK_SETTINGS_EVERY": integer(positive=True),
+    "SOAK_WAIT_FRAMES": integer(1),
+
+    "POWERUP_MIN_SPEED": number(0),
+    "POWERUP_MAX_SPEED": number(0),
+
+    "DIFFICULTY_TABLE_LEVELS": integer(1),
+    "PLAN_LEVELS_IN_BACKGROUND": Rule(bool),
+
+    "SIM_TICK_RATE": integer(positive=True),
+    "SIM_MAX_TICKS_PR_FRAME": integer(positive=True),
+    "SIM_INTERPOLATE": Rule(bool),
+}
+
+# Pairs of keys where the first value can't be bigger than the second
+RANGES = [
+    ("PLAYER_START_SPEED_MIN", "PLAYER_START_SPEED_MAX"),
+    ("PLAYER_START_ANGLE_MIN", "PLAYER_START_ANGLE_MAX"),
+    ("EXPLOSION_PARTICLE_LIFETIME_MIN", "EXPLOSION_PARTICLE_LIFETIME_MAX"),
+    ("POWERUP_MIN_SPEED", "POWERUP_MAX_SPEED"),
+]
+
+
+class LevelDifficulty(NamedTuple):
+    """
+    The values of the config changing from level to level
+    """
+    level: int
+    # Asteroids at the start of the level
+    asteroids: int
+    # Seconds between UFOs
+    ufo_spawn_rate: float
+    # Added to the speed of the UFOs
+    ufo_speed_mod: float
+    # Seconds between UFO shots
+    ufo_fire_rate: float
+
+
+class DifficultyTable:
+    """
+    The LevelDifficulty of each level. Levels up to DIFFICULTY_TABLE_LEVELS are made when the config is loaded,
+    later levels when they are reached.
+
+    The schema keeps every level valid: the number of Asteroids and the speed of the UFOs only grow,
+    and the UFO rates are multiplied by a positive factor every level, so they never reach 0.
+    """
+
+    def __init__(self, config: "Config"):
+        self.config = config
+        self.levels: List[LevelDifficulty] = []
+        self[config.DIFFICULTY_TABLE_LEVELS]
+
+    def make(self, level: int) -> LevelDifficulty:
+        c = self.config
+        n = level - 1
+        return LevelDifficulty(
+            level=level,
+            asteroids=c.ASTEROIDS_PR_LEVEL + n * c.ASTEROID_NUM_MOD_PR_LEVEL,
+            ufo_spawn_rate=c.UFO_SPAWN_RATE * c.UFO_SPAWN_RATE_FACTOR_PR_LEVEL ** n,
+            ufo_speed_mod=n * c.UFO_SPEED_MOD_PR_LEVEL,
+            ufo_fire_rate=c.UFO_FIRE_RATE * c.UFO_FIRE_RATE_FACTOR_PR_LEVEL ** n,
+        )
+
+    def __getitem__(self, level: int) -> LevelDifficulty:
+        if level < 1:
+            raise IndexError(f"No level {level}")
+        while level > len(self.levels):
+            self.levels.append(self.make(len(self.levels) + 1))
+        return self.levels[level - 1]
+
+    def check(self):
+        for row in self.levels:
+            if row.asteroids < 1:
+                raise ConfigError(f"Level {row.level} starts with {row.asteroids} asteroids")
+            if row.ufo_spawn_rate <= 0:
+                raise ConfigError(f"UFOs spawn every {row.ufo_spawn_rate:g} seconds on level {row.level}")
+            if row.ufo_fire_rate <= 0:
+                raise ConfigError(f"UFOs fire every {row.ufo_fire_rate:g} seconds on level {row.level}")
+
+
+class Config(dict):
+    """
+    The config values, by key like a dict (config['SCREEN_WIDTH']) or as attributes (config.SCREEN_WIDTH).
+    Attributes are plain instance attributes, so reading them in hot code is cheap.
+    Changing a value with config[key] = value also changes the attribute.
+    """
+
+    def __init__(self, values=(), **kwargs):
+        super().__init__(values, **kwargs)
+        self.__dict__.update(self)
+        self.difficulty: DifficultyTable = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.__dict__[key] = value
+
+    def update(self, values=(), **kwargs):
+        for key, value in dict(values, **kwargs).items():
+            self[key] = value
+
+    def replace(self, **values) -> "Config":
+        """
+        A validated copy with some values changed
+        """
+        return Config(self, **values).validate()
+
+    def validate(self) -> "Config":
+        """
+        Check all values against the schema, and make the difficulty table.
+        Integers are turned into floats where floats are expected.
+        Raises ConfigError if a value is missing or wrong.
+        """
+
+        for name, rule in SCHEMA.items():
+            if name not in self:
+                raise ConfigError(f"{name} is missing from the config")
+            value = self[name]
+
+            if rule.type is float and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+                self[name] = value
+            if not isinstance(value, rule.type) or (isinstance(value, bool) and rule.type is not bool):
+                raise ConfigError(f"{name} must be of type {rule.type.__name__}, not {type(value).__name__}")
+
+            if rule.minimum is not None and value < rule.minimum:
+                raise ConfigError(f"{name} must be at least {rule.minimum}, not {value}")
+            if rule.positive and value <= 0:
+                raise ConfigError(f"{name} must be greater than 0, not {value}")
+            if rule.choices is not None and value not in rule.choices:
+                raise ConfigError(f"{name} must be one of {', '.join(rule.choices)}, not {value}")
+
+        for low, high in RANGES:
+            if self[low] > self[high]:
+                raise ConfigError(f"{low} ({self[low]}) is bigger than {high} ({self[high]})")
+
+        # The camera shows a part of the world, never more than all of it
+        if self.WORLD_WIDTH < self.SCREEN_WIDTH or self.WORLD_HEIGHT < self.SCREEN_HEIGHT:
+            raise ConfigError(f"The world ({self.WORLD_WIDTH}x{self.WORLD_HEIGHT}) can't be smaller than the screen "
+                              f"({self.SCREEN_WIDTH}x{self.SCREEN_HEIGHT})")
+
+        # A score for each size of Asteroid
+        if len(self.ASTEROID_SCORE_VALUES) < 3 or not all(isinstance(v, int) for v in self.ASTEROID_SCORE_VALUES):
+            raise ConfigError("ASTEROID_SCORE_VALUES must be a list of at least 3 integers")
+
+        # Pairs of layers which collide
+        for mask in self.COLLISION_MASKS:
+            if not (isinstance(mask, list) and len(mask) == 2 and all(layer in LAYERS for layer in mask)):
+                raise ConfigError(f"COLLISION_MASKS must be pairs of layers from {', '.join(LAYERS)}, not {mask}")
+
+        # Asteroids need somewhere to spawn
+        if spawn_sampler(self.WORLD_WIDTH, self.WORLD_HEIGHT, (self.PLAYER_START_X, self.PLAYER_START_Y),
+                         self.ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER).empty:
+            raise ConfigError("ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER leaves no room in the world for Asteroids")
+
+        self.difficulty = DifficultyTable(self)
+        self.difficulty.check()
+
+        return self
+
+
+def load_config(*filenames) -> Config:
+    """
+    Load and validate the config from toml files. Values in later files replace values in earlier files.
+    """
+    values = {}
+    for filename in filenames:
+        values.update(load_toml(filename))
+    return Config(values).validate()
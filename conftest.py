@@ -0,0 +1,17 @@
+"""
+Fixtures shared by the tests
+"""
+
+import os
+
+import pytest
+
+from assets import ASSETS, IN_GAME_MANIFEST
+
+
+@pytest.fixture
+def assets():
+    # The config and the images are found from the folder of the game
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    ASSETS.preload(IN_GAME_MANIFEST, sounds=False)
+    return ASSETS
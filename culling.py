@@ -0,0 +1,96 @@
+"""
+Drawing only what the camera sees.
+The field can be much bigger than the window. The ViewCuller works out which sprites of the EntityStore
+are in view for all of them at once, and only those are drawn.
+The field wraps, so near its edges the camera also sees the other side of the field.
+The sprites over there are drawn again, moved a field width or height.
+"""
+
+from typing import List, Tuple
+
+import arcade
+import numpy as np
+from pyglet.math import Mat4, Vec3
+
+from entity_store import EntityStore
+from tools import draw_sprite_slots
+
+# px added to the radius of the sprites, for the distance sprites move between a tick and the frame drawn
+MARGIN = 16
+
+
+class ViewCuller:
+    """
+    Call update() with the rectangle seen by the camera once per frame, then draw() for each SpriteList
+    of the store instead of SpriteList.draw().
+    """
+
+    def __init__(self, store: EntityStore, world_width: float, world_height: float):
+        self.store = store
+        self.world_width = world_width
+        self.world_height = world_height
+
+        # Where the copies of the field seen by the camera are, and which sprites are seen in each
+        self.copies: List[Tuple[float, float, np.ndarray]] = []
+
+        # Sprites of the store drawn and left out in the last frame
+        self.drawn = 0
+        self.culled = 0
+
+    def update(self, left: float, bottom: float, width: float, height: float):
+        """
+        Find the sprites in the rectangle seen by the camera
+        """
+        store = self.store
+        n = store.count
+        x, y = store.x[:n], store.y[:n]
+        reach = store.radius[:n] + MARGIN
+
+        self.copies = []
+        drawn = 0
+        for offset_x in self.offsets(left, width, self.world_width):
+            # Left and right of the view in the copy of the field
+            view_left = left - offset_x
+            in_x = (x + reach > view_left) & (x - reach < view_left + width)
+            for offset_y in self.offsets(bottom, height, self.world_height):
+                view_bottom = bottom - offset_y
+                seen = in_x & (y + reach > view_bottom) & (y - reach < view_bottom + height)
+                self.copies.append((offset_x, offset_y, seen))
+                drawn += int(np.count_nonzero(seen))
+
+        self.drawn = drawn
+        self.culled = n - drawn
+
+    @staticmethod
+    def offsets(start: float, length: float, world: float) -> List[float]:
+        """
+        Offsets of the copies of the field overlapping start .. start + length along one axis
+        """
+        offsets = [0.0]
+        if start < 0:
+            offsets.append(-world)
+        if start + length > world:
+            offsets.append(world)
+        return offsets
+
+    def draw(self, sprite_list: arcade.SpriteList, camera: arcade.Camera):
+        """
+        Draw the sprites of a SpriteList in view. The camera must be in use.
+        """
+        store = self.store
+        if sprite_list not in store.sprite_lists:
+            return
+
+        n = store.count
+        in_list = store.list_index[:n] == store.sprite_lists.index(sprite_list)
+        ctx = arcade.get_window().ctx
+
+        for offset_x, offset_y, seen in self.copies:
+            slots = store.buffer_slot[:n][seen & in_list]
+            if len(slots) == 0:
+                continue
+            if offset_x or offset_y:
+                ctx.projection_2d_matrix = Mat4.from_translation(Vec3(offset_x, offset_y, 0)) @ camera.combined_matrix
+            draw_sprite_slots(sprite_list, slots)
+
+        ctx.projection_2d_matrix = camera.combined_matrix
@@ -0,0 +1,245 @@
+"""
+Struct-of-arrays store for the motion of ObjInSpace sprites.
+Moving, rotating and wrapping hundreds of sprites one at a time in Python is slow,
+so the store keeps position, speed and rotation in NumPy arrays and updates all of them at once.
+"""
+
+import math
+from typing import List
+
+import arcade
+import numpy as np
+
+from tools import set_sprite_transforms, write_sprite_positions, write_sprite_angles
+
+
+def get_bounding_radius(sprite: arcade.Sprite) -> float:
+    """
+    Radius of the smallest circle around the center of the sprite containing its hit box.
+    It does not change when the sprite rotates.
+    """
+    return max(math.hypot(x, y) for x, y in sprite.get_hit_box()) * sprite.scale
+
+
+def interpolate(previous, current, alpha: float, wrap: float):
+    """
+    The position alpha of the way from previous to current.
+    A sprite which wrapped around the field is shown at its current position.
+    """
+    return np.where(np.abs(current - previous) < wrap / 2, previous + (current - previous) * alpha, current)
+
+
+class EntityStore:
+    """
+    Position (x, y), speed (dx, dy), angle, spin and radius of all registered sprites.
+    The store is the owner of the values while a sprite is registered,
+    and writes positions and angles back to the sprites and their SpriteLists on update().
+
+    Register a sprite with add() after appending it to its SpriteList.
+    A sprite is removed from the store when it is killed.
+    """
+
+    def __init__(self, wrap_max_x: float, wrap_max_y: float, capacity: int = 256):
+
+        self.wrap_max_x = wrap_max_x
+        self.wrap_max_y = wrap_max_y
+
+        # Number of sprites in the store. Data for sprite n is found at index n in all arrays.
+        self.count = 0
+        self.sprites: List[arcade.Sprite] = []
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        # Position before the last update, for drawing sprites between two ticks
+        self.previous_x = np.zeros(capacity, dtype=np.float32)
+        self.previous_y = np.zeros(capacity, dtype=np.float32)
+        self.dx = np.zeros(capacity, dtype=np.float32)
+        self.dy = np.zeros(capacity, dtype=np.float32)
+        self.angle = np.zeros(capacity, dtype=np.float32)
+        self.spin = np.zeros(capacity, dtype=np.float32)
+        self.radius = np.zeros(capacity, dtype=np.float32)
+        self.speed_scale = np.ones(capacity, dtype=np.float32)
+        # Sprites which do not wrap are reported by update() when they leave the field
+        self.wraps = np.ones(capacity, dtype=bool)
+        # Sprites spinning with the sum of their speed like UFOs
+        self.spin_with_speed = np.zeros(capacity, dtype=bool)
+
+        # The SpriteList each sprite is drawn from, and its slot in the buffers of that list
+        self.sprite_lists: List[arcade.SpriteList] = []
+        self.list_index = np.zeros(capacity, dtype=np.int32)
+        self.buffer_slot = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        """
+        Double the size of the arrays
+        """
+        for name in ("x", "y", "previous_x", "previous_y", "dx", "dy", "angle", "spin", "radius", "speed_scale",
+                     "wraps", "spin_with_speed", "list_index", "buffer_slot"):
+            a = getattr(self, name)
+            setattr(self, name, np.concatenate((a, np.zeros_like(a))))
+
+    def add(self, sprite, spin: float = 0.0, wraps: bool = True, spin_with_speed: bool = False, speed_scale: float = None):
+        """
+        Register a sprite which is already in a SpriteList.
+        speed_scale defaults to the speed_scale of the sprite.
+        """
+
+        if sprite.store is not None:
+            raise ValueError("Sprite already in an EntityStore")
+
+        if self.count == len(self.x):
+            self._grow()
+
+        sprite_list = sprite.sprite_lists[0]
+        if sprite_list not in self.sprite_lists:
+            self.sprite_lists.append(sprite_list)
+
+        i = self.count
+        self.x[i], self.y[i] = sprite.position
+        self.previous_x[i], self.previous_y[i] = sprite.position
+        self.dx[i], self.dy[i] = sprite.velocity
+        self.angle[i] = sprite.angle
+        self.spin[i] = spin
+        self.radius[i] = get_bounding_radius(sprite)
+        self.speed_scale[i] = sprite.speed_scale if speed_scale is None else speed_scale
+        self.wraps[i] = wraps
+        self.spin_with_speed[i] = spin_with_speed
+        self.list_index[i] = self.sprite_lists.index(sprite_list)
+        self.buffer_slot[i] = sprite_list.sprite_slot[sprite]
+
+        self.sprites.append(sprite)
+        sprite.store = self
+        sprite.store_index = i
+        self.count += 1
+
+    def remove(self, sprite):
+        """
+        Unregister a sprite. The last sprite in the store takes its place.
+        """
+
+        i = sprite.store_index
+        last = self.count - 1
+
+        # Keep the speed of the sprite when it leaves the store
+        sprite.velocity = [float(self.dx[i]), float(self.dy[i])]
+
+        if i != last:
+            for a in (self.x, self.y, self.previous_x, self.previous_y, self.dx, self.dy, self.angle, self.spin, self.radius, self.speed_scale,
+                      self.wraps, self.spin_with_speed, self.list_index, self.buffer_slot):
+                a[i] = a[last]
+            moved = self.sprites[last]
+            self.sprites[i] = moved
+            moved.store_index = i
+
+        self.sprites.pop()
+        self.count -= 1
+        sprite.store = None
+        sprite.store_index = None
+
+    def update(self, ticks: float = 1.0) -> list:
+        """
+        Move, rotate and wrap all sprites, then write the result back to the sprites.
+        ticks is the length of the update in ticks at the BASE_TICK_RATE the speeds are given for.
+        Returns the sprites which do not wrap and have left the field.
+        """
+
+        n = self.count
+        if n == 0:
+            return []
+
+        x, y = self.x[:n], self.y[:n]
+        dx, dy = self.dx[:n], self.dy[:n]
+        angle, radius = self.angle[:n], self.radius[:n]
+        speed_scale = self.speed_scale[:n] * ticks
+
+        self.previous_x[:n] = x
+        self.previous_y[:n] = y
+
+        x += dx * speed_scale
+        y += dy * speed_scale
+        angle += np.where(self.spin_with_speed[:n], (dx + dy) * ticks, self.spin[:n] * speed_scale)
+
+        # wrap when the sprite is completely off-screen
+        wraps = self.wraps[:n]
+        x[wraps & (x + radius < 0)] += self.wrap_max_x
+        x[wraps & (x - radius > self.wrap_max_x)] -= self.wrap_max_x
+        y[wraps & (y + radius < 0)] += self.wrap_max_y
+        y[wraps & (y - radius > self.wrap_max_y)] -= self.wrap_max_y
+
+        outside = ~wraps & ((x < 0) | (x > self.wrap_max_x) | (y < 0) | (y > self.wrap_max_y))
+
+        self.write_back()
+
+        return [self.sprites[i] for i in np.flatnonzero(outside)]
+
+    def write_back(self):
+        """
+        Copy positions and angles to the sprites, and to the buffers of their SpriteLists in bulk
+        """
+
+        n = self.count
+
+        set_sprite_transforms(self.sprites, self.x[:n].tolist(), self.y[:n].tolist(), self.angle[:n].tolist())
+
+        for list_index, sprite_list in enumerate(self.sprite_lists):
+            mask = self.list_index[:n] == list_index
+            if not mask.any():
+                continue
+            slots = self.buffer_slot[:n][mask]
+            write_sprite_positions(sprite_list, slots, self.x[:n][mask], self.y[:n][mask])
+            write_sprite_angles(sprite_list, slots, self.angle[:n][mask])
+
+    def write_interpolated(self, alpha: float):
+        """
+        Write positions between the previous and the current position of each sprite to the buffers
+        of the SpriteLists, alpha of the way to the current position. The sprites keep their current position.
+        """
+
+        n = self.count
+        if n == 0:
+            return
+
+        x = interpolate(self.previous_x[:n], self.x[:n], alpha, self.wrap_max_x)
+        y = interpolate(self.previous_y[:n], self.y[:n], alpha, self.wrap_max_y)
+
+        for list_index, sprite_list in enumerate(self.sprite_lists):
+            mask = self.list_index[:n] == list_index
+            if not mask.any():
+                continue
+            write_sprite_positions(sprite_list, self.buffer_slot[:n][mask], x[mask], y[mask])
+
+    def radial_impulse(self, x: float, y: float, range: float, strength: float, sprite_lists=None) -> int:
+        """
+        Push sprites away from (x, y), like a shockwave.
+        The push adds strength to the speed of a sprite at the center, falling off linearly to nothing at range.
+        Only sprites in the given SpriteLists are pushed, or all sprites if none are given.
+        Returns the number of sprites pushed.
+        """
+
+        n = self.count
+        if n == 0 or range <= 0 or strength == 0:
+            return 0
+
+        # Sprites inside the square around the circle are the candidates
+        ox = self.x[:n] - x
+        oy = self.y[:n] - y
+        candidates = (np.abs(ox) < range) & (np.abs(oy) < range)
+        if sprite_lists is not None:
+            indices = [i for i, sprite_list in enumerate(self.sprite_lists) if sprite_list in sprite_lists]
+            candidates &= np.isin(self.list_index[:n], indices)
+        candidates = np.flatnonzero(candidates)
+
+        ox, oy = ox[candidates], oy[candidates]
+        dist = np.hypot(ox, oy)
+        inside = dist < range
+        candidates, ox, oy, dist = candidates[inside], ox[inside], oy[inside], dist[inside]
+
+        # The closer to the center, the harder the push. A sprite right at the center has no direction to go.
+        push = np.where(dist > 0, (1 - dist / range) * strength / np.maximum(dist, 1e-6), 0)
+        self.dx[candidates] += ox * push
+        self.dy[candidates] += oy * push
+
+        return len(candidates)
@@ -2,31 +2,138 @@
 file that contains all game-sprite classes in the project. They are imported into main when used in-game
 """
 
-from random import randrange, random, randint, uniform, choice
-from typing import Tuple
-from math import cos, pi, sqrt
+import random
+from math import sqrt
 
 import arcade
 
+from assets import ASSETS
+from spawning import spawn_sampler
+
+# Speeds are in pixels per tick at this tick rate. At other rates sprites move a part of that each tick.
+BASE_TICK_RATE = 60
+
 
 class ObjInSpace(arcade.Sprite):
     """
     all in-game objects will inherit from this class.
-    This class only moves the sprite based on its change_x and change_y, and wraps them to a given width
+    This class only moves the sprite based on its change_x and change_y, and wraps them to a given width.
+    When the sprite is registered in an EntityStore, the store moves it instead, and owns its speed.
     """
 
-    def __init__(self, wrap_max_x, wrap_max_y, speed_scale=1.0, **kwargs):
+    # The EntityStore moving the sprite, if any, and the index of the sprite in the store
+    store = None
+    store_index = None
+
+    # The SpritePool the sprite is given back to when killed, if any
+    pool = None
+
+    # Random numbers for the sprite. Sprites in a GameSimulation use the generator of the simulation.
+    rng = random
+
+    # The Scheduler running the timers of the sprite, given by the GameSimulation, and the timers waiting to run
+    scheduler = None
+    timers = None
+
+    def __init__(self, wrap_max_x, wrap_max_y, speed_scale=1.0, rng=None, **kwargs):
+
+        # Share the texture with all other sprites using the file
+        if "filename" in kwargs:
+            kwargs["texture"] = ASSETS.texture(
+                kwargs.pop("filename"),
+                flipped_horizontally=kwargs.pop("flipped_horizontally", False),
+                flipped_vertically=kwargs.pop("flipped_vertically", False),
+                flipped_diagonally=kwargs.pop("flipped_diagonally", False)
+            )
 
         super().__init__(**kwargs)
 
         self.wrap_max_x = wrap_max_x
         self.wrap_max_y = wrap_max_y
         self.speed_scale = speed_scale
+        if rng is not None:
+            self.rng = rng
+
+    @property
+    def change_x(self) -> float:
+        if self.store is None:
+            return self.velocity[0]
+        return float(self.store.dx[self.store_index])
+
+    @change_x.setter
+    def change_x(self, new_value: float):
+        if self.store is None:
+            self.velocity[0] = new_value
+        else:
+            self.store.dx[self.store_index] = new_value
+
+    @property
+    def change_y(self) -> float:
+        if self.store is None:
+            return self.velocity[1]
+        return float(self.store.dy[self.store_index])
+
+    @change_y.setter
+    def change_y(self, new_value: float):
+        if self.store is None:
+            self.velocity[1] = new_value
+        else:
+            self.store.dy[self.store_index] = new_value
+
+    def reset_sprite(self, texture, scale, center_x, center_y, angle):
+        """
+        Reinitialize the graphics and position of a recycled sprite.
+        Speed is set to 0.
+        """
+        self.texture = texture
+        # The hit box is not updated when the texture changes
+        self.hit_box = texture.hit_box_points
+        self.scale = scale
+        # Worked out again from the new size when it is needed
+        self.collision_radius = None
+        self.position = (center_x, center_y)
+        self.angle = angle
+        self.velocity = [0.0, 0.0]
+        self.alpha = 255
+
+    def schedule(self, delay, callback, *args):
+        """
+        Call callback(*args) after delay seconds, sooner if the speed_scale of the sprite is bigger.
+        The timer is cancelled if the sprite is killed.
+        """
+        return self.scheduler.schedule(delay, callback, *args, owner=self)
+
+    def start_timers(self):
+        """
+        Called when the sprite is added to a GameSimulation and has a scheduler
+        """
+        pass
+
+    def remove_from_sprite_lists(self):
+        was_alive = len(self.sprite_lists) > 0
+
+        if self.scheduler is not None:
+            self.scheduler.cancel_owner(self)
+
+        if self.store is not None:
+            self.store.remove(self)
+        super().remove_from_sprite_lists()
+
+        # A sprite can be killed more than once, but must only be given back once
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+    def after_move(self, delta_time):
+        """
+        Called after the EntityStore has moved the sprite. Does what on_update does apart from moving.
+        """
+        pass
 
     def on_update(self, delta_time):
 
-        self.center_x += self.change_x * self.speed_scale
-        self.center_y += self.change_y * self.speed_scale
+        ticks = delta_time * BASE_TICK_RATE
+        self.center_x += self.change_x * self.speed_scale * ticks
+        self.center_y += self.change_y * self.speed_scale * ticks
 
         # wrap
         if self.right < 0:
@@ -45,7 +152,7 @@ class Shot(ObjInSpace):
     universal class for shot objects
     """
 
-    def __init__(self, filename, scale, center_x, center_y, angle, speed, range, fade_start, fade_speed, wrap_max_x, wrap_max_y, speed_scale=1.0, sound=None):
+    def __init__(self, filename, scale, center_x, center_y, angle, speed, range, fade_start, fade_speed, wrap_max_x, wrap_max_y, speed_scale=1.0, rng=None):
 
         super().__init__(
             filename=filename,
@@ -57,34 +164,52 @@ class Shot(ObjInSpace):
             flipped_diagonally=True,
             wrap_max_x=wrap_max_x,
             wrap_max_y=wrap_max_y,
-            speed_scale=speed_scale
+            speed_scale=speed_scale,
+            rng=rng
+        )
+
+        self.setup(speed, range, fade_start, fade_speed)
+
+    def reset(self, filename, scale, center_x, center_y, angle, speed, range, fade_start, fade_speed, wrap_max_x, wrap_max_y, speed_scale=1.0, rng=None):
+        """
+        Reinitialize a recycled shot. Takes the same arguments as the constructor.
+        """
+
+        self.reset_sprite(
+            ASSETS.texture(filename, flipped_horizontally=True, flipped_diagonally=True),
+            scale, center_x, center_y, angle
         )
+        self.wrap_max_x = wrap_max_x
+        self.wrap_max_y = wrap_max_y
+        self.speed_scale = speed_scale
+        if rng is not None:
+            self.rng = rng
+
+        self.setup(speed, range, fade_start, fade_speed)
+
+    def setup(self, speed, range, fade_start, fade_speed):
 
         self.speed = speed
         self.range = range
         self.fade_start = fade_start
         self.fade_speed = fade_speed
-        self.wrap_max_x = wrap_max_x
-        self.wrap_max_y = wrap_max_y
-        self.speed_scale = speed_scale
 
         self.distance_traveled = 0
 
         self.forward(self.speed)
 
-        # play the shot sound if present
-        if sound:
-            sound.play(speed=self.speed_scale)
-
     def on_update(self, delta_time):
         """
         move the sprite and fade
         """
 
         super().on_update(delta_time)
+        self.after_move(delta_time)
+
+    def after_move(self, delta_time):
 
         # check if the shot traveled too far
-        self.distance_traveled += self.speed * self.speed_scale
+        self.distance_traveled += self.speed * self.speed_scale * delta_time * BASE_TICK_RATE
 
         # FIXME: make a function for when the fading of the shot should start, based on the range
 
@@ -96,52 +221,9 @@ class Shot(ObjInSpace):
             self.kill()
 
 
-class Star(arcade.Sprite):
-    """
-    A flashing star.
-    """
-
-    def __init__(self, position: Tuple[int, int], base_size:int = 10, scale:float=0.5, fade_speed:int=30, speed_scale=1.0):
-        """
-        base_size: The size of the circle texture used for stars.
-        scale: Will be multiplied with a random float between 0.0 & 1.0 to calculate the scaling of the star.
-        fade_speed: Higher int, slower fade.
-        """
-        super().__init__(
-            texture=arcade.make_circle_texture(diameter=base_size,color=arcade.color.WHITE),
-            scale=scale * random(),
-            center_x=position[0],
-            center_y=position[1],
-        )
-
-        #self.angle = arcade.rand_angle_360_deg()
-
-        # Start fade pos between 0 and 2 * pi
-        self.fade_pos = 2 * random() * pi
-
-        self.speed_scale = speed_scale
-
-        self.fade_speed = random() / fade_speed
-
-    def on_update(self, delta_time: float = 1/60):
-        """
-        Move the star while randomly blinking
-        """
-
-        # cos() returns floats between -1.0 and 1.0.
-        # We want make that a number between 0.0 and 256
-        self.alpha = int(128 + (128 * cos(self.fade_pos)))
-
-        self.fade_pos += self.fade_speed
-
-        # Bigger stars move faster than small stars
-        self.center_x += self.scale * self.change_x * self.speed_scale
-        self.center_y += self.scale * self.change_y * self.speed_scale
-
-
 class Asteroid(ObjInSpace):
 
-    def __init__(self, scale, screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size=3, level=1, speed_scale=1.0, spawn_pos=None, angle=None):
+    def __init__(self, scale, screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size=3, level=1, speed_scale=1.0, spawn_pos=None, angle=None, rng=None):
         # Initialize the asteroid
 
         # Graphics
@@ -150,9 +232,27 @@ class Asteroid(ObjInSpace):
             scale=size * scale,
             wrap_max_x=screen_width,
             wrap_max_y=screen_height,
-            speed_scale=speed_scale
+            speed_scale=speed_scale,
+            rng=rng
         )
 
+        self.setup(screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size, level, speed_scale, spawn_pos, angle)
+
+    def reset(self, scale, screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size=3, level=1, speed_scale=1.0, spawn_pos=None, angle=None, rng=None):
+        """
+        Reinitialize a recycled asteroid. Takes the same arguments as the constructor.
+        """
+
+        self.reset_sprite(ASSETS.texture('images/Meteors/meteorGrey_med1.png'), size * scale, 0, 0, 0)
+        self.wrap_max_x = screen_width
+        self.wrap_max_y = screen_height
+        if rng is not None:
+            self.rng = rng
+
+        self.setup(screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size, level, speed_scale, spawn_pos, angle)
+
+    def setup(self, screen_width, screen_height, min_spawn_dist_from_player, player_start_pos, score_values, spread, speed, size, level, speed_scale, spawn_pos, angle):
+
         self.size = size
         self.level = level
         self.screen_width = screen_width
@@ -165,31 +265,26 @@ class Asteroid(ObjInSpace):
         self.speed_scale = speed_scale
 
         if angle == None:
-            self.angle = randrange(0, 360)
+            self.angle = self.rng.randrange(0, 360)
         else:
             self.angle = angle
 
-        # Spawning Astroids until the distance to the player is longer than ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER
+        # Spawning Astroids further from the player than ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER
         if not spawn_pos is None:
             self.position = spawn_pos
         else:
-            while True:
-                self.center_x = randint(0, self.screen_width)
-                self.center_y = randint(0, self.screen_height)
-
-                if arcade.get_distance(
-                        self.center_x,
-                        self.center_y,
-                        self.player_start_pos[0],
-                        self.player_start_pos[1]
-                ) > min_spawn_dist_from_player:
-                    break
-        self.angle += randint(-self.spread, self.spread)
+            self.position = spawn_sampler(
+                self.screen_width,
+                self.screen_height,
+                tuple(self.player_start_pos),
+                min_spawn_dist_from_player
+            ).point(self.rng)
+        self.angle += self.rng.randint(-self.spread, self.spread)
         self.forward(self.speed)
 
         self.level = level
 
-        self.rotation_speed = randrange(0, 5)
+        self.rotation_speed = self.rng.randrange(0, 5)
 
         self.direction = self.angle  # placeholder for initial angle - angle changes during the game
         self.value = score_values[self.size - 1]
@@ -199,7 +294,7 @@ class Asteroid(ObjInSpace):
         super().on_update(delta_time)
 
         # Rotate Asteroid
-        self.angle += self.rotation_speed * self.speed_scale
+        self.angle += self.rotation_speed * self.speed_scale * delta_time * BASE_TICK_RATE
 
 
 class Player(ObjInSpace):
@@ -207,6 +302,9 @@ class Player(ObjInSpace):
     The player
     """
 
+    # Seconds at the end of the invincibility where the player is shown again
+    VISIBLE_INVINCIBLE_SECONDS = 3
+
     def __init__(self,
                  scale,
                  center_x,
@@ -222,7 +320,8 @@ class Player(ObjInSpace):
                  wrap_max_x,
                  wrap_max_y,
                  fire_rate,
-                 speed_scale=1.0
+                 speed_scale=1.0,
+                 rng=None
                 ):
           
         """
@@ -234,12 +333,13 @@ class Player(ObjInSpace):
                          scale=scale,
                          center_x=center_x,
                          center_y=center_y,
-                         angle=randint(start_angle_min, start_angle_max),
+                         angle=(rng or random).randint(start_angle_min, start_angle_max),
                          flipped_horizontally=True,
                          flipped_diagonally=True,
                          wrap_max_x=wrap_max_x,
                          wrap_max_y=wrap_max_y,
-                         speed_scale=speed_scale
+                         speed_scale=speed_scale,
+                         rng=rng
                         )
 
 
@@ -251,8 +351,8 @@ class Player(ObjInSpace):
         self.speed_limit = speed_limit
         self.invincibility_seconds = invincibility_seconds
 
-        self.forward(uniform(start_speed_min, start_speed_max))
-        self.invincibility_timer = 0
+        self.forward(self.rng.uniform(start_speed_min, start_speed_max))
+        self.is_invincible = False
 
         self.start_angle_min = start_angle_min
         self.start_angle_max = start_angle_max
@@ -261,17 +361,18 @@ class Player(ObjInSpace):
 
 
         self.fire_rate = fire_rate
-        self.time_to_next_shot = 0
+        # Waiting for fire_rate seconds to pass since the last shot
+        self.reloading = False
 
         self.speed_scale = speed_scale
 
 
-    def thrust(self):
+    def thrust(self, delta_time=1 / BASE_TICK_RATE):
         """
         increase speed in the direction pointing
         """
 
-        self.forward(self.thrust_speed * self.speed_scale)
+        self.forward(self.thrust_speed * self.speed_scale * delta_time * BASE_TICK_RATE)
         # Keep track of Player Speed
         player_speed_vector_length = sqrt(self.change_x ** 2 + self.change_y ** 2)
 
@@ -288,79 +389,67 @@ class Player(ObjInSpace):
         The code works as when you get hit by the asteroid you will disappear for 2 seconds.
         After that you are invincible for 3 seconds, and you can get hit again.
         """
-        self.invincibility_timer = self.invincibility_seconds
+        self.is_invincible = True
         # The Player is Invisible
         self.alpha = 0
+        self.schedule(max(0, self.invincibility_seconds - self.VISIBLE_INVINCIBLE_SECONDS), self.respawn)
+        self.schedule(self.invincibility_seconds, self.end_invincibility)
 
-    @property
-    def is_invincible(self):
-        return self.invincibility_timer > 0
+    def respawn(self):
+        """
+        Show the player again at the start position, still invincible
+        """
+        self.alpha = 155
+        self.center_x = self.start_x
+        self.center_y = self.start_y
+        self.change_y = 0
+        self.change_x = 0
+        self.angle = self.rng.randint(self.start_angle_min, self.start_angle_max)
+        self.forward(self.rng.uniform(self.start_speed_min, self.start_speed_max))
+
+    def end_invincibility(self):
+        self.is_invincible = False
+        self.alpha = 255
 
     def fire(self):
         """
         It keeps track of fire rate when shooting but do not create a shot
         """
 
-        if self.time_to_next_shot <= 0:
-            self.time_to_next_shot = self.fire_rate / self.speed_scale
-            return True
-        else:
+        if self.reloading:
             # Still waiting for time to run out
             return False
 
-    def on_update(self, delta_time):
-        """
-        Move the sprite and wrap
-        """
+        self.reloading = True
+        self.schedule(self.fire_rate, self.reload)
+        return True
 
-        super().on_update(delta_time)
-
-        if self.time_to_next_shot > 0:
-            self.time_to_next_shot -= delta_time
-            # time cant go below zero
-            self.time_to_next_shot = max(0, self.time_to_next_shot)
-
-        # Time when you can't get hit by an asteroid
-        if self.is_invincible:
-            self.invincibility_timer -= delta_time * self.speed_scale
-            # Time when you are not visible
-            if self.invincibility_timer < 3:
-                # Visible
-                if self.alpha == 0:
-                    self.alpha = 155
-                    self.center_x = self.start_x
-                    self.center_y = self.start_y
-                    self.change_y = 0
-                    self.change_x = 0
-                    self.angle = randint(self.start_angle_min, self.start_angle_max)
-                    self.forward(uniform(self.start_speed_min, self.start_speed_max))
-
-        else:
-            self.alpha = 255
+    def reload(self):
+        self.reloading = False
 
 
 class BonusUFO(ObjInSpace):
     """occasionally moves across the screen. Grants the player points if shot"""
 
-    sound_fire = arcade.load_sound("sounds/laserRetro_001.ogg")
-    sound_explosion = arcade.load_sound("sounds/explosionCrunch_000.ogg")
-
-    def __int__(self, scale, shot_list, target, speed, speed_mod, dir_change_rate, fire_rate, fire_rate_mod, shot_scale, shot_speed, shot_range, shot_fade_start, shot_fade_speed, small_size, big_size, screen_width, screen_height, speed_scale=1.0, **kwargs):
+    def __int__(self, scale, shot_list, target, speed, speed_mod, dir_change_rate, fire_rate, fire_rate_mod, shot_scale, shot_speed, shot_range, shot_fade_start, shot_fade_speed, small_size, big_size, screen_width, screen_height, speed_scale=1.0, shot_factory=Shot, on_shoot=None, rng=None, **kwargs):
 
         kwargs['filename'] = "images/ufoBlue.png"
 
+        rng = rng or random
+
         # UFOs are big or small
-        kwargs['scale'] = scale * choice((small_size, big_size))
+        kwargs['scale'] = scale * rng.choice((small_size, big_size))
 
         # set random position off-screen
-        kwargs['center_x'] = choice([0, screen_width])
-        kwargs['center_y'] = choice([0, screen_height])
+        kwargs['center_x'] = rng.choice([0, screen_width])
+        kwargs['center_y'] = rng.choice([0, screen_height])
 
         # send arguments upstairs
         super().__init__(
             wrap_max_x=screen_width,
             wrap_max_y=screen_height,
             speed_scale=speed_scale,
+            rng=rng,
             **kwargs)
 
         self.shot_list = shot_list
@@ -376,12 +465,13 @@ class BonusUFO(ObjInSpace):
         self.shot_fade_speed = shot_fade_speed
         self.screen_width = screen_width
         self.screen_height = screen_height
-
-        self.shoot_timer = fire_rate + fire_rate_mod
-        self.change_dir_timer = dir_change_rate / self.speed_scale
+        # Called with the arguments of Shot to make a new shot
+        self.shot_factory = shot_factory
+        # Called with every new shot
+        self.on_shoot = on_shoot
 
         # set random direction. always point towards center, with noise
-        self.change_x = (randrange(1, speed) + speed_mod) * self.speed_scale
+        self.change_x = (self.rng.randrange(1, speed) + speed_mod) * self.speed_scale
         if self.center_x > screen_width / 2:
             self.change_x *= -1
 
@@ -394,11 +484,15 @@ class BonusUFO(ObjInSpace):
         set a new direction
         """
 
-        r = (randrange(-self.speed, self.speed)) * self.speed_scale
+        r = (self.rng.randrange(-self.speed, self.speed)) * self.speed_scale
         self.change_x -= r
         self.change_y += r
 
-        self.change_dir_timer = self.dir_change_rate / self.speed_scale
+        self.schedule(self.dir_change_rate, self.change_dir)
+
+    def start_timers(self):
+        self.schedule(self.fire_rate + self.fire_rate_mod, self.shoot)
+        self.schedule(self.dir_change_rate, self.change_dir)
 
     def shoot(self):
         """
@@ -413,7 +507,7 @@ class BonusUFO(ObjInSpace):
                 self.target.center_y
             ) + 90
 
-        new_ufo_shot = Shot(
+        new_ufo_shot = self.shot_factory(
             filename="images/Lasers/laserGreen07.png",
             scale=self.shot_scale,
             center_x=self.center_x,
@@ -426,23 +520,29 @@ class BonusUFO(ObjInSpace):
             wrap_max_x=self.screen_width,
             wrap_max_y=self.screen_height,
             speed_scale=self.speed_scale,
-            sound=BonusUFO.sound_fire)
+            rng=self.rng)
 
         self.shot_list.append(new_ufo_shot)
 
-        self.shoot_timer = (self.fire_rate + self.fire_rate_mod) / self.speed_scale
+        self.schedule(self.fire_rate + self.fire_rate_mod, self.shoot)
+
+        if self.on_shoot is not None:
+            self.on_shoot(new_ufo_shot)
+
+        return new_ufo_shot
 
     def on_update(self, delta_time):
         """update position, and kill if out of bounds"""
 
+        ticks = delta_time * BASE_TICK_RATE
+
         # keep spinning. just for graphics purposes
-        self.angle += self.change_x + self.change_y  # the faster it moves, the faster it spins.
+        self.angle += (self.change_x + self.change_y) * ticks  # the faster it moves, the faster it spins.
 
-        self.center_x += self.change_x
-        self.center_y += self.change_y
+        self.center_x += self.change_x * ticks
+        self.center_y += self.change_y * ticks
 
-        self.shoot_timer -= delta_time
-        self.change_dir_timer -= delta_time
+        self.after_move(delta_time)
 
         # kill if out of bounds
         if self.center_x > self.screen_width or self.center_x < 0 or self.center_y > self.screen_height or self.center_y < 0:
@@ -450,10 +550,8 @@ class BonusUFO(ObjInSpace):
 
     def destroy(self):
         """
-        kill the sprite and unschedule all functions
+        kill the sprite. Its timers are cancelled with it.
         """
-        arcade.unschedule(self.shoot)
-        arcade.unschedule(self.change_dir)
         self.kill()
 
 
@@ -500,26 +598,61 @@ class PowerUp(ObjInSpace):
          }
     ]
 
-    def __init__(self, start_max_x, start_max_y, wrap_max_x, wrap_max_y, speed):
+    def __init__(self, start_max_x, start_max_y, wrap_max_x, wrap_max_y, speed,
+                 spawn_pos=None, angle=None, pu_type=None, rng=None):
+
+        rng = rng or random
+
+        # Random Type, unless one is given
+        self.type = pu_type or rng.choice(PowerUp.pu_types)
 
-        # Random Type
-        self.type = choice(PowerUp.pu_types)
+        if spawn_pos is None:
+            spawn_pos = (rng.randint(0, start_max_x), rng.randint(0, start_max_y))
 
         super().__init__(
             filename=self.type["filename"],
-            center_x=randint(0, start_max_x),
-            center_y=randint(0, start_max_y),
+            center_x=spawn_pos[0],
+            center_y=spawn_pos[1],
             wrap_max_x=wrap_max_x,
-            wrap_max_y=wrap_max_y
+            wrap_max_y=wrap_max_y,
+            rng=rng
         )
 
-        self.angle = randint(0, 360)
+        self.setup(speed, angle)
+
+    def reset(self, start_max_x, start_max_y, wrap_max_x, wrap_max_y, speed,
+              spawn_pos=None, angle=None, pu_type=None, rng=None):
+        """
+        Reinitialize a recycled power up. Takes the same arguments as the constructor.
+        """
+
+        if rng is not None:
+            self.rng = rng
+
+        # Random Type, unless one is given
+        self.type = pu_type or self.rng.choice(PowerUp.pu_types)
+
+        if spawn_pos is None:
+            spawn_pos = (self.rng.randint(0, start_max_x), self.rng.randint(0, start_max_y))
+
+        self.reset_sprite(
+            ASSETS.texture(self.type["filename"]),
+            1,
+            spawn_pos[0],
+            spawn_pos[1],
+            0
+        )
+        self.wrap_max_x = wrap_max_x
+        self.wrap_max_y = wrap_max_y
+
+        self.setup(speed, angle)
+
+    def setup(self, speed, angle=None):
+
+        self.angle = self.rng.randint(0, 360) if angle is None else angle
         self.forward(speed)
         # time till death in sec
-        self.lifetimer = self.type.get("lifetime", 10)
+        self.lifetime = self.type.get("lifetime", 10)
 
-    def on_update(self, delta_time):
-        super().on_update(delta_time)
-        self.lifetimer -= delta_time
-        if self.lifetimer <= 0:
-            self.kill()
\ No newline at end of file
+    def start_timers(self):
+        self.schedule(self.lifetime, self.kill)
\ No newline at end of file
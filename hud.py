@@ -0,0 +1,81 @@
+"""
+Text shown on top of the game, like the score
+"""
+
+from typing import Dict, List
+
+import arcade
+
+
+class Label:
+    """
+    A text made from a template and some values.
+    The text is only laid out again when the values change.
+    """
+
+    def __init__(self, template: str, x: float, y: float, color=arcade.color.WHITE, font_size: float = 12, **kwargs):
+        """
+        template: A string for str.format(), like "SCORE: {}". Gets the values given to set().
+        Other arguments are passed on to arcade.Text.
+        """
+        self.template = template
+        self.values = None
+        self.text = arcade.Text("", x, y, color, font_size, **kwargs)
+
+    def set(self, *values):
+        if values != self.values:
+            self.values = values
+            self.text.text = self.template.format(*values)
+
+    def draw(self):
+        self.text.draw()
+
+
+class TextBlock:
+    """
+    Lines of text below each other, like the stats shown with F3.
+    Every line keeps its arcade.Text, so a line is only laid out again when it changes.
+    """
+
+    def __init__(self, line_height: float = 16, color=arcade.color.YELLOW, font_size: float = 10,
+                 font_name: str = "Courier New"):
+        self.line_height = line_height
+        self.color = color
+        self.font_size = font_size
+        self.font_name = font_name
+        self.texts: List[arcade.Text] = []
+
+    def draw(self, lines: List[str], x: float, top: float):
+        """
+        Draw the lines, the first one at (x, top)
+        """
+        while len(self.texts) < len(lines):
+            self.texts.append(arcade.Text("", x, top, self.color, self.font_size, font_name=self.font_name))
+
+        for n, line in enumerate(lines):
+            text = self.texts[n]
+            text.text = line
+            text.x = x
+            text.y = top - n * self.line_height
+            text.draw()
+
+
+class HUD:
+    """
+    Named labels drawn together
+    """
+
+    def __init__(self):
+        self.labels: Dict[str, Label] = {}
+
+    def add(self, name: str, template: str, x: float, y: float, **kwargs) -> Label:
+        label = Label(template, x, y, **kwargs)
+        self.labels[name] = label
+        return label
+
+    def set(self, name: str, *values):
+        self.labels[name].set(*values)
+
+    def draw(self):
+        for label in self.labels.values():
+            label.draw()
@@ -0,0 +1,117 @@
+"""
+Planning of levels ahead of time.
+While a level is played, the spawn points of the Asteroids and the PowerUp of the next level are found
+in a worker thread, so starting the next level only has to place them.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from game_sprites import PowerUp
+from spawning import spawn_sampler
+
+
+class AsteroidSpawn(NamedTuple):
+    x: int
+    y: int
+    # The direction of the Asteroid before the spread is added
+    angle: int
+
+
+class PowerUpSpawn(NamedTuple):
+    x: int
+    y: int
+    angle: int
+    speed: float
+    # Index of the type in PowerUp.pu_types
+    type: int
+
+
+class LevelPlan(NamedTuple):
+    level: int
+    asteroids: List[AsteroidSpawn]
+    power_up: PowerUpSpawn
+
+
+def plan_level(level: int, asteroids: int, world_width: int, world_height: int,
+               player_start_pos: Tuple[float, float], min_spawn_dist_from_player: float,
+               min_spawn_spacing: float, power_up_speed: Tuple[float, float], power_up_types: int,
+               seed: int) -> LevelPlan:
+    """
+    Find a spawn point and a direction for each Asteroid of a level, and the type, place and motion of its PowerUp.
+    All random numbers come from a generator seeded with seed, so the plan is the same whichever thread makes it.
+    """
+    rng = np.random.default_rng(seed)
+    sampler = spawn_sampler(world_width, world_height, player_start_pos, min_spawn_dist_from_player)
+    points = sampler.sample(asteroids, rng, min_spacing=min_spawn_spacing)
+    angles = rng.integers(0, 360, size=asteroids)
+
+    power_up = PowerUpSpawn(
+        x=int(rng.integers(0, world_width, endpoint=True)),
+        y=int(rng.integers(0, world_height, endpoint=True)),
+        angle=int(rng.integers(0, 360, endpoint=True)),
+        speed=float(rng.uniform(*power_up_speed)),
+        type=int(rng.integers(0, power_up_types))
+    )
+
+    return LevelPlan(level, [AsteroidSpawn(int(x), int(y), int(a)) for (x, y), a in zip(points, angles)], power_up)
+
+
+# The worker thread planning levels for all simulations
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-planner")
+
+
+class LevelPlanner:
+    """
+    Plans the next level of a GameSimulation while the current level is played.
+    The config is read when the plan is started, so the worker thread never touches anything the game changes.
+    """
+
+    def __init__(self, config, background: bool = True):
+        self.config = config
+        # Plan in the worker thread, or right away in prepare()
+        self.background = background
+        self.pending: Optional[Future] = None
+
+    def make(self, level: int, seed: int) -> LevelPlan:
+        """
+        Plan a level in this thread
+        """
+        return plan_level(*self.arguments(level, seed))
+
+    def arguments(self, level: int, seed: int) -> tuple:
+        c = self.config
+        return (
+            level,
+            c.difficulty[level].asteroids,
+            c.WORLD_WIDTH,
+            c.WORLD_HEIGHT,
+            (c.PLAYER_START_X, c.PLAYER_START_Y),
+            c.ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER,
+            c.ASTEROIDS_MINIMUM_SPAWN_SPACING,
+            (c.POWERUP_MIN_SPEED, c.POWERUP_MAX_SPEED),
+            len(PowerUp.pu_types),
+            seed
+        )
+
+    def prepare(self, level: int, seed: int):
+        """
+        Start planning a level
+        """
+        if self.background:
+            self.pending = EXECUTOR.submit(plan_level, *self.arguments(level, seed))
+        else:
+            self.pending = Future()
+            self.pending.set_result(self.make(level, seed))
+
+    def take(self, level: int) -> Optional[LevelPlan]:
+        """
+        The plan of a level, if that level was prepared. Waits for the worker thread if it is not done yet.
+        """
+        pending, self.pending = self.pending, None
+        if pending is None:
+            return None
+        plan = pending.result()
+        return plan if plan.level == level else None
@@ -12,20 +12,27 @@ import math
 import random
 import tomli_w
 import pathlib
-import arcade.gui
+import argparse
+import sys
 from pyglet.math import Vec2
 
 
-from game_sprites import Star, Shot, Asteroid, Player, BonusUFO, PowerUp
-from tools import get_joystick, wrap, load_toml, get_stars, StoppableEmitter
-
-# load the config file as a dict
-CONFIG = load_toml('my_game.toml')
+from tools import get_joystick, StoppableEmitter
+from culling import ViewCuller
+from config import load_config
+from starfield import Starfield
+from particles import ParticleSystem
+from hud import HUD, Label
+from assets import ASSETS, IN_GAME_MANIFEST, MENU_MANIFEST
+from audio import AUDIO
+from simulation import GameSimulation, SimInput, SimEvent, run_headless
+from game_sprites import BASE_TICK_RATE
+from replay import Recorder, run_replay
+from profiling import PROFILER
+from simulation import PLAYER_HIT, PLAYER_FIRED, UFO_FIRED, UFO_KILLED, ASTEROID_HIT, ASTEROID_ADDED, LEVEL_STARTED
 
-# Load the user settings file, which is superior to the original config file, into the CONFIG dict
-user_settings = load_toml("user_settings.toml")
-for k in user_settings.keys():
-    CONFIG[k] = user_settings[k]
+# Load the config file, and the user settings file which is superior to the original config file
+CONFIG = load_config('my_game.toml', 'user_settings.toml')
 
 # has to be defined here since they use libraries
 SCREEN_COLOR = arcade.color.BLACK
@@ -49,9 +56,9 @@ class IntroView(arcade.View):
     def __init__(self):
         super().__init__()
 
-        self.title_graphics = arcade.load_texture("images/UI/asteroidsTitle.png")
-        self.basic_button = arcade.load_texture("images/UI/basicButtonSmall.png")
-        self.basic_button_hover = arcade.load_texture("images/UI/basicButtonSmallHover.png")
+        self.title_graphics = ASSETS.texture("images/UI/asteroidsTitle.png")
+        self.basic_button = ASSETS.texture("images/UI/basicButtonSmall.png")
+        self.basic_button_hover = ASSETS.texture("images/UI/basicButtonSmallHover.png")
 
         # Makes the manager that contains the GUI button and enables it to the game.
         self.manager = arcade.gui.UIManager()
@@ -98,19 +105,18 @@ class IntroView(arcade.View):
             print,
             print
         )
-        self.stars_list = get_stars(no_of_stars=CONFIG['STARS_ON_SCREEN_INTRO'],
-                                    max_x=CONFIG['SCREEN_WIDTH'],
-                                    max_y=CONFIG['SCREEN_HEIGHT'],
-                                    base_size=CONFIG['STARS_BASE_SIZE'],
-                                    scale=CONFIG['STARS_SCALE'],
-                                    fadespeed=CONFIG['STARS_FADE_SPEED']
-                                    )
-
+        self.starfield = Starfield(no_of_stars=CONFIG['STARS_ON_SCREEN_INTRO'],
+                                   max_x=CONFIG['SCREEN_WIDTH'],
+                                   max_y=CONFIG['SCREEN_HEIGHT'],
+                                   base_size=CONFIG['STARS_BASE_SIZE'],
+                                   scale=CONFIG['STARS_SCALE'],
+                                   fade_speed=CONFIG['STARS_FADE_SPEED']
+                                   )
+
+        # All stars drift in the same direction
         stars_angle = random.uniform(0, 360)
-
-        for s in self.stars_list:
-            s.change_x = math.sin(stars_angle)
-            s.change_y = math.cos(stars_angle)
+        self.stars_change_x = math.sin(stars_angle)
+        self.stars_change_y = math.cos(stars_angle)
 
     def on_draw(self):
         """
@@ -119,7 +125,7 @@ class IntroView(arcade.View):
 
         arcade.start_render()
         # DRAWS STARS
-        self.stars_list.draw()
+        self.starfield.draw()
 
         self.title_graphics.draw_scaled(
             center_x=CONFIG['TITLE_X'],
@@ -131,13 +137,8 @@ class IntroView(arcade.View):
 
     def on_update(self, delta_time):
 
-        # stars
-        for s in self.stars_list:
-            # Wrap star if off screen
-            wrap(s, CONFIG['SCREEN_WIDTH'], CONFIG['SCREEN_HEIGHT'])
         # Move all stars
-        self.stars_list.on_update(delta_time)
-
+        self.starfield.on_update(self.stars_change_x, self.stars_change_y)
 
     def on_key_press(self, symbol: int, modifiers: int):
         # You can start the game and the settings with the keyboard
@@ -159,19 +160,20 @@ class IntroView(arcade.View):
         self.start_game()
 
     def start_game(self, event=None):
-
         in_game_view = InGameView()
-
-        # Stop using  this joystick
-        if self.joystick is not None:
-            self.joystick.close()
-
         self.window.show_view(in_game_view)
 
     def enter_settings(self, event=None):
         settings_view = SettingsView()
         self.window.show_view(settings_view)
 
+    def on_hide_view(self):
+        # Stop the buttons reacting, and stop using this joystick
+        self.manager.disable()
+        if self.joystick is not None:
+            self.joystick.close()
+            self.joystick = None
+
 
 class SettingsView(arcade.View):
     """
@@ -199,8 +201,8 @@ class SettingsView(arcade.View):
             self.id_to_key.update({self.key_to_id[k]: k})
 
         # Load button textures
-        self.basic_button = arcade.load_texture("images/UI/basicButtonBig.png")
-        self.basic_button_hover = arcade.load_texture("images/UI/basicButtonBigHover.png")
+        self.basic_button = ASSETS.texture("images/UI/basicButtonBig.png")
+        self.basic_button_hover = ASSETS.texture("images/UI/basicButtonBigHover.png")
 
         self.name_of_key_to_change = None
         self.changed_settings = {}
@@ -326,7 +328,7 @@ class SettingsView(arcade.View):
                 times_reset += 1
                 if not new_user_config_file.is_file():
                     user_config_file.rename(new_user_config_file)
-                    CONFIG = load_toml("my_game.toml")
+                    CONFIG = load_config("my_game.toml")
                     print("Logged user_settings.toml")
                     break
 
@@ -343,6 +345,10 @@ class SettingsView(arcade.View):
         arcade.start_render()
         self.manager.draw()
 
+    def on_hide_view(self):
+        # Stop the buttons reacting
+        self.manager.disable()
+
     def on_key_press(self, key, modifiers):
 
         if key == CONFIG["EXIT_SETTINGS_KEY"]:
@@ -373,57 +379,51 @@ class SettingsView(arcade.View):
 class InGameView(arcade.View):
     """
     Main application class.
+    The game logic lives in a GameSimulation. The view feeds it the controls,
+    and shows what happened with sounds, explosions and a shaking camera.
     """
 
+    # Save a replay of the game to this file when the game is over
+    record_to = None
+    # Save the frame times to this CSV file when the game is closed
+    profile_to = None
+    # Particles of all explosions. Made by the first game and used again by the next ones
+    particle_system: ParticleSystem = None
+
     def __init__(self):
         """
         Initializer
         """
-        self.sound_thrust_player = None
+        # The voice playing the engine sound
+        self.thrust_voice = None
 
         # Call the parent class initializer
         super().__init__()
 
-        # loading sounds
+        # loading sounds. They are played through the audio bus.
 
-        self.sound_explosion = arcade.load_sound("sounds/explosionCrunch_000.ogg")
-        self.sound_thrust = arcade.load_sound("sounds/spaceEngine_003.ogg")
+        self.sound_explosion = ASSETS.sound("sounds/explosionCrunch_000.ogg")
+        self.sound_thrust = ASSETS.sound("sounds/spaceEngine_003.ogg")
 
-        self.sound_fire = arcade.load_sound("sounds/laserRetro_001.ogg")
+        self.sound_fire = ASSETS.sound("sounds/laserRetro_001.ogg")
 
         # Textured for Asteroid fragments. Used when Asteroids are shot.
         self.asteroid_fragments = [
-            arcade.load_texture("images/Meteors/meteorGrey_tiny1.png"),
-            arcade.load_texture("images/Meteors/meteorGrey_tiny2.png"),
-            arcade.load_texture("images/Meteors/meteorGrey_small1.png"),
-            arcade.load_texture("images/Meteors/meteorGrey_small2.png")
+            ASSETS.texture("images/Meteors/meteorGrey_tiny1.png"),
+            ASSETS.texture("images/Meteors/meteorGrey_tiny2.png"),
+            ASSETS.texture("images/Meteors/meteorGrey_small1.png"),
+            ASSETS.texture("images/Meteors/meteorGrey_small2.png")
         ]
 
-        # Variable that will hold a list of shots fired by the player
-        self.player_shot_list = None
-
-        # Power ups SprteList
-        self.power_up_list = None
-
-        # Asteroid SpriteList
-        self.asteroid_list = None
-
-        # The current level
-        self.level = 1
+        # The game logic
+        self.sim: GameSimulation = None
+        # Records the game if it is saved as a replay
+        self.recorder: Recorder = None
 
-        # Set up the player info
-        self.player_sprite: Player = None
-        self.player_score = None
-        self.player_speed = 0
-        self.opposite_angle = 0
-        self.explosion_emitter = None
-        self.player_shoot_sound = None
+        # Particles of all explosions
+        self.particles: ParticleSystem = None
         self.stoppable_emitter = None
 
-        # set up ufo info
-        self.ufo_list = None
-        self.ufo_shot_list = None
-
         # Track the current state of what key is pressed
         self.space_pressed = False
         self.left_pressed = False
@@ -433,6 +433,11 @@ class InGameView(arcade.View):
         self.thrust_pressed = False
         self.turn_right_pressed = False
         self.turn_left_pressed = False
+        # Fire was pressed since the last update
+        self.fire_pressed = False
+
+        # Show the time spent in each part of the frame
+        self.show_profiler = False
 
         # Get list of joysticks
         self.joystick = get_joystick(
@@ -445,86 +450,6 @@ class InGameView(arcade.View):
         # Set the background color
         arcade.set_background_color(SCREEN_COLOR)
 
-    def next_level(self, level=None):
-        """
-        Advance the game to the next level
-        or start a specific level
-        """
-
-        # if no specific level was requested, advance to the next level
-        if level is None:
-            self.level += 1
-        else:
-            self.level = level
-
-        # FIXME: Player needs to know that level was cleared
-
-        # Background stars
-        self.stars_list = get_stars(no_of_stars=CONFIG['STARS_ON_SCREEN_GAME'],
-                                    max_x=CONFIG['SCREEN_WIDTH'],
-                                    max_y=CONFIG['SCREEN_HEIGHT'],
-                                    base_size=CONFIG['STARS_BASE_SIZE'],
-                                    scale=CONFIG['STARS_SCALE'],
-                                    fadespeed=CONFIG['STARS_FADE_SPEED']
-                                    )
-
-        # Spawn Asteroids
-        for r in range(CONFIG['ASTEROIDS_PR_LEVEL'] + (self.level - 1) * CONFIG['ASTEROID_NUM_MOD_PR_LEVEL']):
-            self.asteroid_list.append(
-                Asteroid(scale=CONFIG['SPRITE_SCALING'],
-                            screen_width=CONFIG['SCREEN_WIDTH'],
-                            screen_height=CONFIG['SCREEN_HEIGHT'],
-                            min_spawn_dist_from_player=CONFIG['ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER'],
-                            player_start_pos=(CONFIG['PLAYER_START_X'], CONFIG['PLAYER_START_Y']),
-                            score_values=CONFIG['ASTEROID_SCORE_VALUES'],
-                            spread=CONFIG['ASTEROIDS_SPREAD'],
-                            speed=CONFIG['ASTEROIDS_SPEED'],
-                            level=self.level)
-            )
-
-        # Spawn PowerUp
-        pu = PowerUp(start_max_x=CONFIG["SCREEN_WIDTH"],
-                     start_max_y=CONFIG["SCREEN_HEIGHT"],
-                     wrap_max_x=CONFIG["SCREEN_WIDTH"],
-                     wrap_max_y=CONFIG["SCREEN_HEIGHT"],
-                     speed=random.uniform(CONFIG["POWERUP_MIN_SPEED"], CONFIG["POWERUP_MAX_SPEED"]))
-
-        self.power_up_list.append(
-            pu
-        )
-
-    def spawn_ufo(self, delta_time):
-        """
-        spawns an ufo object into self.ufo_list.
-        has to take delta_time because it needs to be called by arcade.schedule
-        """
-
-        # FIXME: stop calling this function in arcade.schedule
-
-        new_ufo_obj = BonusUFO(0, 0)  # actual values are given below
-        # we have to call __init__ manually - if we don't the UFO won't __init__
-        new_ufo_obj.__int__(
-            scale=CONFIG['SPRITE_SCALING'],
-            shot_list=self.ufo_shot_list,
-            target=self.player_sprite,
-            speed=CONFIG['UFO_SPEED'],
-            speed_mod=CONFIG['UFO_SPEED_MOD_PR_LEVEL'] * (self.level - 1),
-            dir_change_rate=CONFIG['UFO_DIR_CHANGE_RATE'],
-            fire_rate=CONFIG['UFO_FIRE_RATE'],
-            fire_rate_mod=CONFIG['UFO_FIRE_RATE_MOD_PR_LEVEL'] * (self.level - 1),
-            shot_scale=CONFIG['SPRITE_SCALING'],
-            shot_speed=CONFIG['UFO_SHOT_SPEED'],
-            shot_range=CONFIG['UFO_SHOT_RANGE'],
-            shot_fade_start=CONFIG['SHOT_FADE_START'],
-            shot_fade_speed=CONFIG['SHOT_FADE_SPEED'],
-            small_size=CONFIG['UFO_SIZE_SMALL'],
-            big_size=CONFIG['UFO_SIZE_BIG'],
-            screen_width=CONFIG['SCREEN_WIDTH'],
-            screen_height=CONFIG['SCREEN_HEIGHT']
-        )  # it needs the list so it can send shots to MyGame
-
-        self.ufo_list.append(new_ufo_obj)
-
     def get_explosion(self, position, textures=None, speed_scale=1.0, size=CONFIG["EXPLOSION_PARTICLE_SIZE"], amount=CONFIG["EXPLOSION_PARTICLE_AMOUNT"]):
 
 
@@ -537,35 +462,14 @@ class InGameView(arcade.View):
         if textures is None:
             textures = PARTICLE_TEXTURES
 
-        self.explosion_emitter = arcade.make_burst_emitter(
-            center_xy=position,
-            filenames_and_textures=textures,
-            particle_count=amount,
-            particle_speed=CONFIG['EXPLOSION_PARTICLE_SPEED'],
-            particle_lifetime_min=CONFIG['EXPLOSION_PARTICLE_LIFETIME_MIN'] / speed_scale,
-            particle_lifetime_max=CONFIG['EXPLOSION_PARTICLE_LIFETIME_MAX'] / speed_scale,
-            particle_scale=size)
-
-    def shockwave(self, center: tuple[float, float], range: float, strength: float, sprites: arcade.SpriteList):
-        """
-        create a shockwave at the center that pushes away all given sprites
-        """
-
-        for sprite in sprites:
-            dist = arcade.get_distance(sprite.center_x, sprite.center_y, center[0], center[1])
-
-            if dist <= range:
-
-                # point away from the center
-                angle_to_center = arcade.get_angle_degrees(sprite.center_x, sprite.center_y, center[0], center[1])
-                sprite.angle = sprite.angle - (sprite.angle - angle_to_center) - 180
-
-                #FIXME: why does sprite.forward not work here?
-
-                # the closer to the center, the faster it moves
-                impact = abs(dist / range - 1) * strength
-                sprite.change_x += math.sin(sprite.radians) * impact
-                sprite.change_y += math.cos(sprite.radians) * impact
+        self.particles.burst(
+            position=position,
+            textures=textures,
+            amount=amount,
+            speed=CONFIG['EXPLOSION_PARTICLE_SPEED'],
+            lifetime_min=CONFIG['EXPLOSION_PARTICLE_LIFETIME_MIN'] / speed_scale,
+            lifetime_max=CONFIG['EXPLOSION_PARTICLE_LIFETIME_MAX'] / speed_scale,
+            scale=size)
 
     def shake(self, amplitude, speed=1.5, damping=0.9):
         # A random float between 0 and 2 * pi (A direction in radians)
@@ -585,53 +489,53 @@ class InGameView(arcade.View):
         self.camera_sprites = arcade.Camera(CONFIG["SCREEN_WIDTH"], CONFIG["SCREEN_HEIGHT"])
         self.camera_GUI = arcade.Camera(CONFIG["SCREEN_WIDTH"], CONFIG["SCREEN_HEIGHT"])
 
-        self.sound_thrust_player = None
-
-        # No points when the game starts
-        self.player_score = 0
-
-        # Sprite lists
-        self.player_shot_list = arcade.SpriteList()
-        self.asteroid_list = arcade.SpriteList()
-        self.power_up_list = arcade.SpriteList()
-        self.ufo_list = arcade.SpriteList()
-        self.ufo_shot_list = arcade.SpriteList()
-
-        # Small stars in background
-        self.stars_list = arcade.SpriteList()
-
-        # Create a Player object
-        self.player_sprite = Player(
-            wrap_max_x=CONFIG['SCREEN_WIDTH'],
-            wrap_max_y=CONFIG['SCREEN_HEIGHT'],
-            speed_scale=1.0,
-            scale=CONFIG['SPRITE_SCALING'],
-            center_x=CONFIG['PLAYER_START_X'],
-            center_y=CONFIG['PLAYER_START_Y'],
-            lives=CONFIG['PLAYER_START_LIVES'],
-            thrust_speed=CONFIG['PLAYER_THRUST'],
-            speed_limit=CONFIG['PLAYER_SPEED_LIMIT'],
-            invincibility_seconds=CONFIG['PLAYER_INVINCIBILITY_SECONDS'],
-            start_speed_min=CONFIG['PLAYER_START_SPEED_MIN'],
-            start_speed_max=CONFIG['PLAYER_START_SPEED_MAX'],
-            start_angle_min=CONFIG['PLAYER_START_ANGLE_MIN'],
-            start_angle_max=CONFIG['PLAYER_START_ANGLE_MAX'],
-            fire_rate=CONFIG['PLAYER_FIRE_RATE']
-        )
-
-        # load the player shot sound
-        self.player_shoot_sound = arcade.load_sound("sounds/laserRetro_001.ogg")
-
-        # setup spawn_ufo to run regularly
-        arcade.schedule(self.spawn_ufo, CONFIG['UFO_SPAWN_RATE'] + (self.level - 1) * CONFIG['UFO_SPAWN_RATE_MOD_PR_LEVEL'])
-
-        # Start level 1
-        self.next_level(1)
+        # In a world bigger than the screen the camera follows the player
+        self.follow_player = (CONFIG['WORLD_WIDTH'] > CONFIG['SCREEN_WIDTH']
+                              or CONFIG['WORLD_HEIGHT'] > CONFIG['SCREEN_HEIGHT'])
+
+        self.thrust_voice = None
+
+        # Start a new game on level 1
+        self.sim = GameSimulation(CONFIG, seed=random.randrange(2 ** 32))
+
+        # The simulation ticks at a fixed rate. Time not yet simulated is kept for the next frame,
+        # and sprites are drawn between the last two ticks, tick_alpha of the way to the last one.
+        self.unsimulated_time = 0.0
+        self.tick_alpha = 1.0
+
+        if InGameView.record_to is not None:
+            self.recorder = Recorder(self.sim)
+
+        # Score, lives and level in the top left corner
+        self.hud = HUD()
+        self.hud.add("score", "SCORE: {}", 10, CONFIG['SCREEN_HEIGHT'] - 20)
+        self.hud.add("lives", "LIVES: {}", 10, CONFIG['SCREEN_HEIGHT'] - 45)
+        self.hud.add("level", "LEVEL: {}", 10, CONFIG['SCREEN_HEIGHT'] - 70)
+
+        # Small stars in background. They stay the same for the whole game.
+        self.starfield = Starfield(no_of_stars=CONFIG['STARS_ON_SCREEN_GAME'],
+                                   max_x=CONFIG['SCREEN_WIDTH'],
+                                   max_y=CONFIG['SCREEN_HEIGHT'],
+                                   base_size=CONFIG['STARS_BASE_SIZE'],
+                                   scale=CONFIG['STARS_SCALE'],
+                                   fade_speed=CONFIG['STARS_FADE_SPEED']
+                                   )
+
+        if InGameView.particle_system is None or \
+                InGameView.particle_system.max_particles != CONFIG['EXPLOSION_MAX_PARTICLES']:
+            InGameView.particle_system = ParticleSystem(CONFIG['EXPLOSION_MAX_PARTICLES'])
+        self.particles = InGameView.particle_system
+        self.particles.reset()
+
+        # Only sprites seen by the camera are drawn
+        self.culler = ViewCuller(self.sim.entities, CONFIG['WORLD_WIDTH'], CONFIG['WORLD_HEIGHT'])
+        self.culling_label = Label("sprites drawn {} culled {}", CONFIG['SCREEN_WIDTH'] - 260, 10,
+                                   color=arcade.color.YELLOW, font_size=10, font_name="Courier New")
 
         self.stoppable_emitter = StoppableEmitter(
-            target=self.player_sprite,
-            particle_lifetime=0.5 / self.player_sprite.speed_scale,
-            offset=(0, 5 * self.player_sprite.speed_scale)
+            target=self.sim.player_sprite,
+            particle_lifetime=0.5 / self.sim.player_sprite.speed_scale,
+            offset=(0, 5 * self.sim.player_sprite.speed_scale)
         )
 
     def on_draw(self):
@@ -642,255 +546,213 @@ class InGameView(arcade.View):
         # This command has to happen before we start drawing
         arcade.start_render()
 
+        # Sprites are drawn between the last two ticks
+        player = self.sim.player_sprite
+        player_position = player.position
+        if CONFIG['SIM_INTERPOLATE']:
+            player.position = self.sim.write_interpolated(self.tick_alpha)
+
+        PROFILER.start("draw_background")
+
+        # Stars in the background drawn first. When the camera follows the player they stay on the screen,
+        # and move the other way of the player instead
+        if self.follow_player:
+            self.camera_GUI.use()
+            self.starfield.draw()
+            self.camera_sprites.move_to((player.center_x - CONFIG['SCREEN_WIDTH'] / 2,
+                                         player.center_y - CONFIG['SCREEN_HEIGHT'] / 2), 1.0)
+
         # Render from the view of this camera
         self.camera_sprites.use()
 
-        # Stars in the background drawn first
-        self.stars_list.draw()
+        if not self.follow_player:
+            self.starfield.draw()
+
+        # Find the sprites seen by the camera
+        left, bottom = self.camera_sprites.position
+        self.culler.update(left, bottom, CONFIG['SCREEN_WIDTH'], CONFIG['SCREEN_HEIGHT'])
 
         # Draw particle emitter
-        self.stoppable_emitter.emitter.draw()
+        self.stoppable_emitter.draw()
+
+        PROFILER.stop("draw_background")
+        PROFILER.start("draw_sprites")
 
         # Draw the player shot
-        self.player_shot_list.draw()
+        self.culler.draw(self.sim.player_shot_list, self.camera_sprites)
 
         # Draw the player sprite
-        self.player_sprite.draw()
+        player.draw()
+        player.position = player_position
 
         # Draw asteroids
-        self.asteroid_list.draw()
+        self.culler.draw(self.sim.asteroid_list, self.camera_sprites)
 
         # Draw Power Ups
-        self.power_up_list.draw()
+        self.culler.draw(self.sim.power_up_list, self.camera_sprites)
 
         # draw ufo(s)
-        self.ufo_list.draw()
+        self.culler.draw(self.sim.ufo_list, self.camera_sprites)
 
         # and their shots
-        self.ufo_shot_list.draw()
+        self.culler.draw(self.sim.ufo_shot_list, self.camera_sprites)
+
+        PROFILER.stop("draw_sprites")
+        PROFILER.start("draw_explosions")
 
-        # draw explosion
-        if self.explosion_emitter is not None:
-            self.explosion_emitter.draw()
+        # draw explosions
+        self.particles.draw()
+
+        PROFILER.stop("draw_explosions")
+        PROFILER.start("draw_gui")
 
         # Here comes the GUI. Switch camera
         self.camera_GUI.use()
 
         # Draw players score on screen
-        arcade.draw_text(
-            "SCORE: {}".format(self.player_score),  # Text to show
-            10,  # X position
-            CONFIG['SCREEN_HEIGHT'] - 20,  # Y_position
-            arcade.color.WHITE  # Color of text
-        )
-        arcade.draw_text(
-            "LIVES: {}".format(self.player_sprite.lives),  # Text to show
-            10,  # X position
-            CONFIG['SCREEN_HEIGHT'] - 45,  # Y positon
-            arcade.color.WHITE  # Color of text
-        )
-        arcade.draw_text(
-            "LEVEL: {}".format(self.level),
-            10,
-            CONFIG['SCREEN_HEIGHT'] - 70,
-            arcade.color.WHITE
+        self.hud.set("score", self.sim.player_score)
+        self.hud.set("lives", self.sim.player_sprite.lives)
+        self.hud.set("level", self.sim.level)
+        self.hud.draw()
+
+        PROFILER.stop("draw_gui")
+
+        if self.show_profiler:
+            PROFILER.draw(CONFIG['SCREEN_WIDTH'] - 260, CONFIG['SCREEN_HEIGHT'] - 20)
+            AUDIO.draw(CONFIG['SCREEN_WIDTH'] - 260, CONFIG['SCREEN_HEIGHT'] - 20 - (len(PROFILER.names) + 2) * 16)
+            self.culling_label.set(self.culler.drawn, self.culler.culled)
+            self.culling_label.draw()
+
+        PROFILER.end_frame()
+
+    def get_input(self):
+        """
+        The state of the controls for the next tick of the simulation
+        """
+        inputs = SimInput(
+            thrust=self.thrust_pressed,
+            turn_left=self.turn_left_pressed,
+            turn_right=self.turn_right_pressed,
+            fire=self.fire_pressed,
+            joystick_x=self.joystick.x if self.joystick else 0.0
         )
+        self.fire_pressed = False
+        return inputs
 
-    def on_update(self, delta_time):
+    def handle_event(self, event: SimEvent):
         """
-        Movement and game logic
+        Play sounds and show effects for something that happened in the simulation
         """
 
-        # UFO shooting and direction changing
-        for ufo in self.ufo_list:
-            # If shooting timer is finished, call shoot
-            if ufo.shoot_timer <= 0:
-                self.sound_fire.play(speed=ufo.speed_scale)
-                ufo.shoot()
-            # If direction changing timer is finished, call change_dir
-            if ufo.change_dir_timer <= 0:
-                ufo.change_dir()
-
-        # Stars in background
-        for s in self.stars_list:
-            # Star's direction is opposite of the player
-            s.change_x = -1 * self.player_sprite.change_x
-            s.change_y = -1 * self.player_sprite.change_y
-            # Wrap star if off screen
-            wrap(s, CONFIG['SCREEN_WIDTH'], CONFIG['SCREEN_HEIGHT'])
+        if event.kind == PLAYER_HIT:
+            AUDIO.play(self.sound_explosion, speed=event.speed_scale)
+            self.get_explosion(position=event.position, speed_scale=event.speed_scale)
 
-        # Move all stars
-        self.stars_list.on_update(delta_time)
-
-        # Calculate player speed based on the keys pressed
-        # Move player with keyboard
-        if self.turn_left_pressed and not self.turn_right_pressed:
-            self.player_sprite.angle += CONFIG['PLAYER_ROTATE_SPEED'] * self.player_sprite.speed_scale
-        elif self.turn_right_pressed and not self.turn_left_pressed:
-            self.player_sprite.angle += -CONFIG['PLAYER_ROTATE_SPEED'] * self.player_sprite.speed_scale
-
-        # rotate player with joystick if present
-        if self.joystick:
-            self.player_sprite.angle += round(self.joystick.x) * -CONFIG['PLAYER_ROTATE_SPEED']
-
-        # checks if ufo shot collides with player
-        if not self.player_sprite.is_invincible:
-            for ufo_shot_hit in self.player_sprite.collides_with_list(self.ufo_shot_list):
-                self.sound_explosion.play(speed=self.player_sprite.speed_scale)
-                self.player_sprite.lives -= 1
-                self.player_sprite.reset()
-                self.get_explosion(position=self.player_sprite.position, speed_scale=self.player_sprite.speed_scale)
-                ufo_shot_hit.kill()
-
-        # Check if colliding whit power_up
-        for power_up_hit in self.player_sprite.collides_with_list(self.power_up_list):
-            self.player_score += power_up_hit.type.get("score", 0)
-            self.player_sprite.lives += power_up_hit.type.get("life", 0)
-            self.player_sprite.fire_rate *= power_up_hit.type.get("fire_rate", 1.0)
-            # power up that adds more asteroids
-            for x in range(0, power_up_hit.type.get("add_asteroids", 0)):
-                a = Asteroid(
-                    scale=CONFIG['SPRITE_SCALING'],
-                    screen_width=CONFIG['SCREEN_WIDTH'],
-                    screen_height=CONFIG['SCREEN_HEIGHT'],
-                    min_spawn_dist_from_player=CONFIG['ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER'],
-                    player_start_pos=(CONFIG['PLAYER_START_X'], CONFIG['PLAYER_START_Y']),
-                    score_values=CONFIG['ASTEROID_SCORE_VALUES'],
-                    spread=CONFIG['ASTEROIDS_SPREAD'],
-                    speed=CONFIG['ASTEROIDS_SPEED'],
-                    level=self.level
-                )
-                t = arcade.load_texture("images/Meteors/meteorBrown_tiny1.png")
-                self.get_explosion(a.position, [t])
-                self.asteroid_list.append(a)
-            power_up_hit.kill()
-
-        # Check if player collides with Asteroids and dies and kills the Asteroid
-        if not self.player_sprite.is_invincible:
-            for a in self.player_sprite.collides_with_list(self.asteroid_list):
-                self.sound_explosion.play(speed=self.player_sprite.speed_scale)
-                self.player_sprite.lives -= 1
-                self.player_sprite.reset()
-                self.get_explosion(position=self.player_sprite.position, speed_scale=self.player_sprite.speed_scale)
-                a.kill()
-
-        # check for collision with bonus_ufo
-        if not self.player_sprite.is_invincible:
-            for ufo in self.player_sprite.collides_with_list(self.ufo_list):
-                self.sound_explosion.play(speed=self.player_sprite.speed_scale)
-                self.player_sprite.lives -= 1
-                self.player_sprite.reset()
-
-                self.get_explosion(position=self.player_sprite.position, speed_scale=self.player_sprite.speed_scale)
-
-                ufo.kill()
-
-        # Player shot hits UFO
-        for shot in self.player_shot_list:
-            for ufo_hit in arcade.check_for_collision_with_list(shot, self.ufo_list):
-                shot.kill()
-                self.sound_explosion.play(speed=ufo_hit.speed_scale)
-                ufo_hit.kill()
-                self.player_score += CONFIG['UFO_POINTS_REWARD']
-                self.get_explosion(
-                    position=ufo_hit.position,
-                    textures=UFO_EXPLOSIONS_PARTICLE_TEXTURES,
-                    speed_scale=ufo_hit.speed_scale
+        elif event.kind == PLAYER_FIRED or event.kind == UFO_FIRED:
+            AUDIO.play(self.sound_fire, speed=event.speed_scale)
+
+        elif event.kind == UFO_KILLED:
+            AUDIO.play(self.sound_explosion, speed=event.speed_scale)
+            self.get_explosion(
+                position=event.position,
+                textures=UFO_EXPLOSIONS_PARTICLE_TEXTURES,
+                speed_scale=event.speed_scale
+            )
+
+        elif event.kind == ASTEROID_ADDED:
+            t = ASSETS.texture("images/Meteors/meteorBrown_tiny1.png")
+            self.get_explosion(event.position, [t])
+
+        elif event.kind == ASTEROID_HIT:
+            # Shake the camera in proportion to Asteroid size
+            self.shake(amplitude=CONFIG["ASTEROIDS_SHAKE_AMPLITUDE"] * event.size)
+            AUDIO.play(self.sound_explosion, speed=event.speed_scale)
+
+            self.get_explosion(
+                event.position,
+                textures=self.asteroid_fragments,
+                size=1.0,
+                # Smaller Asteroids create fewer fragments
+                amount=event.size * 2
                 )
 
-        if self.sound_thrust_player is not None and self.thrust_pressed is False and self.sound_thrust.is_playing(
-                self.sound_thrust_player):
-            v = self.sound_thrust.get_volume(self.sound_thrust_player) * 0.95
-            self.sound_thrust.set_volume(v, self.sound_thrust_player)
-            if v == 0:
-                self.sound_thrust.stop(self.sound_thrust_player)
-
-        # Check for PlayerShot - Asteroid collisions
-        for s in self.player_shot_list:
-
-            for a in arcade.check_for_collision_with_list(s, self.asteroid_list):
-
-                # Shake the camera in proportion to Asteroid size
-                self.shake(amplitude=CONFIG["ASTEROIDS_SHAKE_AMPLITUDE"] * a.size)
-                self.player_score += a.value
-                self.sound_explosion.play(speed=a.speed_scale)
-
-                self.get_explosion(
-                    a.position,
-                    textures=self.asteroid_fragments,
-                    size=1.0,
-                    # Smaller Asteroids create fewer fragments
-                    amount=a.size * 2
-                    #amount=random.randint(4, 7)
-                    )
-
-                # Split into smaller Asteroids if not smallest size
-                if a.size > 1:
-                    for n in range(CONFIG['ASTEROIDS_PR_SPLIT']):
-                        # A random angle for the the new Asteroid
-                        a_angle = random.randrange(
-                            int(s.angle - CONFIG["ASTEROIDS_SPREAD"]),
-                            int(s.angle + CONFIG["ASTEROIDS_SPREAD"])
-                        )
-                        # Create an Asteroid
-                        new_a = Asteroid(
-                            scale=CONFIG['SPRITE_SCALING'],
-                            angle=a_angle,
-                            screen_width=CONFIG['SCREEN_WIDTH'],
-                            screen_height=CONFIG['SCREEN_HEIGHT'],
-                            min_spawn_dist_from_player=CONFIG['ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER'],
-                            player_start_pos=(CONFIG['PLAYER_START_X'], CONFIG['PLAYER_START_Y']),
-                            score_values=CONFIG['ASTEROID_SCORE_VALUES'],
-                            spread=CONFIG['ASTEROIDS_SPREAD'],
-                            speed=CONFIG['ASTEROIDS_SPEED'],
-                            size=a.size - 1,
-                            level=self.level,
-                            spawn_pos=a.position
-                        )
-                        # Add the new Asteroid to the sprite list
-                        self.asteroid_list.append(new_a)
-                # Remove shot Asteroid
-                a.kill()
-                # Remove the shot which hit the Asteroid
-                s.kill()
+        elif event.kind == LEVEL_STARTED:
+            # FIXME: Player needs to know that level was cleared
+            pass
 
-        self.stoppable_emitter.update()
-        # check for thrust
-        if self.thrust_pressed and self.player_sprite.alpha > 0:
-            self.player_sprite.thrust()
-            self.stoppable_emitter.start()
+    def on_update(self, delta_time):
+        """
+        Movement and game logic
+        """
+
+        player = self.sim.player_sprite
 
-        # Update player sprite
-        self.player_sprite.on_update(delta_time)
+        PROFILER.start("stars")
 
-        # Update the player shots
-        self.player_shot_list.on_update(delta_time)
+        # Stars in background. Their direction is opposite of the player
+        frames = delta_time * BASE_TICK_RATE
+        self.starfield.on_update(-1 * player.change_x * frames, -1 * player.change_y * frames)
 
-        # Update Asteroids
-        self.asteroid_list.on_update(delta_time)
+        PROFILER.stop("stars")
+        PROFILER.start("thrust")
 
-        # Update Power Ups
-        self.power_up_list.on_update(delta_time)
+        # Fade out the engine sound
+        AUDIO.update(delta_time)
 
-        # update UFOs
-        self.ufo_list.on_update(delta_time)
+        self.stoppable_emitter.update()
+        # Thrust effect
+        if self.thrust_pressed and player.alpha > 0:
+            self.stoppable_emitter.start()
 
-        # update UFO shot_lists
-        self.ufo_shot_list.on_update(delta_time)
+        PROFILER.stop("thrust")
+        PROFILER.start("simulation")
+
+        # Advance the game by as many ticks as fit in the time passed
+        self.unsimulated_time += delta_time
+        ticks = 0
+        while self.unsimulated_time >= self.sim.delta_time and not self.sim.game_over:
+            # A slow machine would only fall further behind catching up, so time above the limit is dropped
+            if ticks == CONFIG['SIM_MAX_TICKS_PR_FRAME']:
+                self.unsimulated_time = 0.0
+                break
+            inputs = self.get_input()
+            if self.recorder is not None:
+                self.recorder.record(inputs)
+            for event in self.sim.step(inputs):
+                self.handle_event(event)
+            # The same sound asked for many times in a tick is only played once
+            AUDIO.flush()
+            self.unsimulated_time -= self.sim.delta_time
+            ticks += 1
+
+        self.tick_alpha = min(self.unsimulated_time / self.sim.delta_time, 1.0)
+
+        PROFILER.stop("simulation")
 
         # check if the player is dead
-        if self.player_sprite.lives <= 0:
-            assert self.sound_thrust is not None
-            self.sound_thrust.stop(self.sound_thrust_player)
-            arcade.unschedule(self.spawn_ufo)
-            game_over_view = GameOverView(player_score=self.player_score, level=self.level)
+        if self.sim.game_over:
+            self.save_replay()
+            # The engine sound is stopped when the view is hidden
+            game_over_view = GameOverView(player_score=self.sim.player_score, level=self.sim.level)
             self.window.show_view(game_over_view)
 
-        if len(self.asteroid_list) == 0:
-            self.next_level()
+        PROFILER.start("explosions")
+        self.particles.update()
+        PROFILER.stop("explosions")
+
+    def on_hide_view(self):
+        # Stop the engine sound and stop using this joystick, so nothing keeps the view alive
+        AUDIO.stop(self.thrust_voice)
+        self.thrust_voice = None
+        if self.joystick is not None:
+            self.joystick.close()
+            self.joystick = None
 
-        if self.explosion_emitter is not None:
-            self.explosion_emitter.update()
+    def save_replay(self):
+        if self.recorder is not None:
+            self.recorder.save(InGameView.record_to)
+            print(f"Replay saved to {InGameView.record_to}")
+            self.recorder = None
 
     def on_key_press(self, key, modifiers):
         """
@@ -916,34 +778,18 @@ class InGameView(arcade.View):
         if key == CONFIG["PLAYER_THRUST_KEY"]:
             # if thrust just got pressed start sound loop
             if self.thrust_pressed is False:
-                if self.sound_thrust_player is not None:
-                    self.sound_thrust.stop(self.sound_thrust_player)
-                self.sound_thrust_player = self.sound_thrust.play(loop=True, speed=self.player_sprite.speed_scale)
+                AUDIO.stop(self.thrust_voice)
+                self.thrust_voice = AUDIO.play_loop(self.sound_thrust, speed=self.sim.player_sprite.speed_scale)
             self.thrust_pressed = True
 
         if key == CONFIG["PLAYER_FIRE_KEY"]:
-            if not self.player_sprite.is_invincible:
-                if self.player_sprite.fire():
-                    new_shot = Shot(
-                        filename="images/Lasers/laserBlue01.png",
-                        scale=CONFIG['SPRITE_SCALING'],
-                        center_x=self.player_sprite.center_x,
-                        center_y=self.player_sprite.center_y,
-                        angle=self.player_sprite.angle,
-                        speed=CONFIG['PLAYER_SHOT_SPEED'],
-                        range=CONFIG['PLAYER_SHOT_RANGE'],
-                        fade_start=CONFIG['SHOT_FADE_START'],
-                        fade_speed=CONFIG['SHOT_FADE_SPEED'],
-                        wrap_max_x=CONFIG['SCREEN_WIDTH'],
-                        wrap_max_y=CONFIG['SCREEN_HEIGHT'],
-                        speed_scale=self.player_sprite.speed_scale,
-                        sound=self.player_shoot_sound
-
-                    )
-
-                    self.sound_fire.play(speed=self.player_sprite.speed_scale)
-                    self.player_shot_list.append(new_shot)
+            # The shot is fired on the next tick of the simulation
+            self.fire_pressed = True
 
+        if key == CONFIG["PROFILER_TOGGLE_KEY"]:
+            self.show_profiler = not self.show_profiler
+            # Keep timing if the times are saved on exit
+            PROFILER.enabled = self.show_profiler or InGameView.profile_to is not None
 
         if key == CONFIG['UI_RESTART_KEY']:
             new_game = InGameView()
@@ -966,6 +812,7 @@ class InGameView(arcade.View):
             self.space_pressed = False
         if key == CONFIG["PLAYER_THRUST_KEY"]:
             self.thrust_pressed = False
+            AUDIO.fade_out(self.thrust_voice, CONFIG['AUDIO_THRUST_FADE_SECONDS'])
         elif key == CONFIG["PLAYER_TURN_RIGHT_KEY"]:
             self.turn_right_pressed = False
         elif key == CONFIG["PLAYER_TURN_LEFT_KEY"]:
@@ -1001,13 +848,21 @@ class GameOverView(arcade.View):
         super().__init__()
 
         self.check_if_started = False
-        self.game_over_sign = arcade.load_texture("images/UI/asteroidsGameOverSign.png")
-        self.basic_button = arcade.load_texture("images/UI/basicButtonSmall.png")
-        self.basic_button_hover = arcade.load_texture("images/UI/basicButtonSmallHover.png")
+        self.game_over_sign = ASSETS.texture("images/UI/asteroidsGameOverSign.png")
+        self.basic_button = ASSETS.texture("images/UI/basicButtonSmall.png")
+        self.basic_button_hover = ASSETS.texture("images/UI/basicButtonSmallHover.png")
 
         self.player_score = player_score
         self.level = level
 
+        self.hud = HUD()
+        self.hud.add(
+            "result",
+            "SCORE: {}    LEVEL: {}",
+            CONFIG['SCREEN_WIDTH'] * 0.4,
+            CONFIG['SCREEN_HEIGHT'] * 0.6
+        ).set(player_score, level)
+
         # Makes the manager that contains the GUI button and enables it to the game.
         self.manager = arcade.gui.UIManager()
         self.manager.enable()
@@ -1054,12 +909,7 @@ class GameOverView(arcade.View):
         # Draws the manager that contains the button
         self.manager.draw()
 
-        arcade.draw_text(
-            f"SCORE: {self.player_score}    LEVEL: {self.level}",
-            CONFIG['SCREEN_WIDTH'] * 0.4,
-            CONFIG['SCREEN_HEIGHT'] * 0.6,
-            arcade.color.WHITE
-        )
+        self.hud.draw()
 
     def on_key_press(self, symbol: int, modifiers: int):
         if symbol == arcade.key.R:
@@ -1081,17 +931,65 @@ class GameOverView(arcade.View):
         in_game_view = InGameView()
         self.window.show_view(in_game_view)
 
+    def on_hide_view(self):
+        # Stop the button reacting, and stop using this joystick
+        self.manager.disable()
+        if self.joystick is not None:
+            self.joystick.close()
+            self.joystick = None
+
 
 def main():
     """
     Main method
     """
 
+    parser = argparse.ArgumentParser(description="Asteroids")
+    parser.add_argument("--headless", action="store_true", help="run the game logic without a window")
+    parser.add_argument("--ticks", type=int, default=10000, help="ticks to run when headless")
+    parser.add_argument("--seed", type=int, default=None, help="random seed when headless")
+    parser.add_argument("--record", metavar="FILE", help="save a replay of the last game played")
+    parser.add_argument("--replay", metavar="FILE", help="play a replay headless as fast as possible")
+    parser.add_argument("--profile", metavar="FILE", help="save the time spent in each part of the last frames as CSV")
+    args = parser.parse_args()
+
+    if args.replay:
+        if not run_replay(CONFIG, args.replay):
+            sys.exit(1)
+        return
+
+    if args.headless:
+        run_headless(CONFIG, ticks=args.ticks, seed=args.seed)
+        return
+
+    InGameView.record_to = args.record
+
+    PROFILER.set_history(CONFIG['PROFILER_HISTORY'])
+    if args.profile:
+        InGameView.profile_to = args.profile
+        PROFILER.enabled = True
+
     window = arcade.Window(CONFIG['SCREEN_WIDTH'], CONFIG['SCREEN_HEIGHT'])
+
+    # Load everything for playing up front, so starting a game does not hitch
+    ASSETS.preload(MENU_MANIFEST)
+    ASSETS.preload(IN_GAME_MANIFEST)
+    AUDIO.setup(CONFIG['AUDIO_VOICES'], CONFIG['AUDIO_MAX_VOICES_PR_SOUND'])
+
     intro_view = IntroView()
     window.show_view(intro_view)
     arcade.run()
 
+    # Save the game if the window was closed while playing
+    if isinstance(window.current_view, InGameView):
+        window.current_view.save_replay()
+
+    if args.profile:
+        PROFILER.save_csv(args.profile)
+        print(f"Frame times saved to {args.profile}")
+
+    ASSETS.report()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,162 @@
+"""
+Explosions made of many particles
+"""
+
+import math
+from typing import List, Tuple
+
+import arcade
+import numpy as np
+
+from tools import init_sprite_list, write_sprite_positions, write_sprite_sizes, write_sprite_alphas, write_sprite_textures
+
+
+class ParticleSystem:
+    """
+    All particles of all explosions. Particles fly in a straight line while fading out.
+    Position, speed, lifetime and texture of the particles are kept in preallocated arrays,
+    and all particles are updated at once. There can be any number of explosions at the same time,
+    but never more than max_particles particles. Particles which do not fit are left out.
+
+    The particles only live in a SpriteList with a sprite for every possible particle.
+    Dead particles have a size of 0, so they are not seen.
+    """
+
+    def __init__(self, max_particles: int = 4000, seed=None):
+
+        self.max_particles = max_particles
+
+        # Random numbers of its own, so explosions do not change the game
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(max_particles, dtype=np.float32)
+        self.y = np.zeros(max_particles, dtype=np.float32)
+        self.dx = np.zeros(max_particles, dtype=np.float32)
+        self.dy = np.zeros(max_particles, dtype=np.float32)
+        self.scale = np.zeros(max_particles, dtype=np.float32)
+        # Seconds the particle has lived, and will live
+        self.age = np.zeros(max_particles, dtype=np.float32)
+        self.lifetime = np.zeros(max_particles, dtype=np.float32)
+        self.alpha = np.zeros(max_particles, dtype=np.uint8)
+        # Index in self.textures
+        self.texture_index = np.zeros(max_particles, dtype=np.int32)
+        self.alive = np.zeros(max_particles, dtype=bool)
+
+        # Textures used by particles, and their sizes
+        self.textures: List[arcade.Texture] = []
+        self.texture_width = np.zeros(0, dtype=np.float32)
+        self.texture_height = np.zeros(0, dtype=np.float32)
+
+        placeholder = arcade.make_circle_texture(1, arcade.color.WHITE)
+        self.sprite_list = arcade.SpriteList(capacity=max(max_particles, 1))
+        for i in range(max_particles):
+            self.sprite_list.append(arcade.Sprite(texture=placeholder))
+        self.slots = np.array([self.sprite_list.sprite_slot[s] for s in self.sprite_list], dtype=np.int32)
+
+        # Textures in the buffers of the SpriteList are out of date
+        self.textures_changed = False
+
+    def __len__(self):
+        """
+        Number of live particles
+        """
+        return int(np.count_nonzero(self.alive))
+
+    def reset(self):
+        """
+        Let all particles die at once, like when a new game starts
+        """
+        self.alive[:] = False
+
+    def get_texture_index(self, texture: arcade.Texture) -> int:
+        """
+        Index of a texture in self.textures, adding it if it's new
+        """
+        for i, t in enumerate(self.textures):
+            if t is texture:
+                return i
+
+        self.textures.append(texture)
+        self.texture_width = np.append(self.texture_width, np.float32(texture.width))
+        self.texture_height = np.append(self.texture_height, np.float32(texture.height))
+        return len(self.textures) - 1
+
+    def burst(self, position: Tuple[float, float], textures: List[arcade.Texture], amount: int, speed: float,
+              lifetime_min: float, lifetime_max: float, scale: float = 1.0):
+        """
+        Emit particles from a point in random directions, like arcade.make_burst_emitter().
+        Returns the number of particles emitted.
+        """
+
+        free = np.flatnonzero(~self.alive)[:amount]
+        n = len(free)
+        if n == 0:
+            return 0
+
+        texture_indices = np.array([self.get_texture_index(t) for t in textures], dtype=np.int32)
+
+        # A random point inside a circle with a radius of speed
+        angle = self.rng.uniform(0, 2 * math.pi, n)
+        distance = speed * np.sqrt(self.rng.random(n))
+
+        self.x[free], self.y[free] = position
+        self.dx[free] = distance * np.cos(angle)
+        self.dy[free] = distance * np.sin(angle)
+        self.scale[free] = scale
+        self.age[free] = 0
+        self.lifetime[free] = self.rng.uniform(lifetime_min, lifetime_max, n)
+        self.alpha[free] = 255
+        self.texture_index[free] = self.rng.choice(texture_indices, n)
+        self.alive[free] = True
+
+        self.textures_changed = True
+
+        return n
+
+    def update(self, delta_time: float = 1 / 60):
+        """
+        Move and fade all particles, and let the old ones die
+        """
+
+        alive = self.alive
+        if not alive.any():
+            return
+
+        self.x[alive] += self.dx[alive]
+        self.y[alive] += self.dy[alive]
+        self.age[alive] += delta_time
+
+        alive &= self.age < self.lifetime
+
+        # Fade from fully visible to invisible over the lifetime
+        fade = 1 - self.age[alive] / self.lifetime[alive]
+        self.alpha[alive] = np.clip(255 * fade, 0, 255).astype(np.uint8)
+
+    def draw(self):
+        """
+        Write all particles to the SpriteList and draw it. Nothing is drawn when there are no particles.
+        """
+
+        if not self.alive.any():
+            return
+
+        sprite_list = self.sprite_list
+        # The texture atlas is not there before the SpriteList is drawn the first time
+        init_sprite_list(sprite_list)
+
+        if self.textures_changed:
+            atlas_slots = np.array([sprite_list.atlas.add(t)[0] for t in self.textures], dtype=np.float32)
+            write_sprite_textures(sprite_list, self.slots, atlas_slots[self.texture_index])
+            self.textures_changed = False
+
+        size = np.where(self.alive, self.scale, 0)
+        write_sprite_sizes(
+            sprite_list,
+            self.slots,
+            self.texture_width[self.texture_index] * size,
+            self.texture_height[self.texture_index] * size
+        )
+        write_sprite_positions(sprite_list, self.slots, self.x, self.y)
+        write_sprite_alphas(sprite_list, self.slots, self.alpha)
+
+        sprite_list.draw()
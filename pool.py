@@ -0,0 +1,72 @@
+"""
+Pools of sprites to reuse, so sprites which are created and killed all the time
+(shots, asteroids, power ups) do not have to be built from scratch every time.
+"""
+
+
+class SpritePool:
+    """
+    Hands out sprites of a class. Killed sprites are given back to the pool,
+    and reinitialized in place with their reset() method when they are handed out again.
+    reset() takes the same arguments as the constructor of the class.
+
+    Killed sprites are not reused before recycle() is called, so a sprite killed during a tick
+    can't come back to life while other code in the same tick still holds on to it.
+    """
+
+    def __init__(self, sprite_class, max_size: int = 512):
+        self.sprite_class = sprite_class
+        self.max_size = max_size
+
+        # Sprites ready to be handed out
+        self.free = []
+        # Sprites killed since the last recycle()
+        self.released = []
+
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.high_water_mark = 0
+
+    def get(self, *args, **kwargs):
+        """
+        A sprite initialized with the arguments
+        """
+
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            sprite = self.sprite_class(*args, **kwargs)
+            sprite.pool = self
+            self.created += 1
+
+        self.in_use += 1
+        self.high_water_mark = max(self.high_water_mark, self.in_use)
+
+        return sprite
+
+    def release(self, sprite):
+        """
+        Give a killed sprite back to the pool
+        """
+        self.in_use -= 1
+        self.released.append(sprite)
+
+    def recycle(self):
+        """
+        Make the sprites released since last time ready for reuse
+        """
+        room = self.max_size - len(self.free)
+        self.free.extend(self.released[:room])
+        self.released.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.free),
+            "in_use": self.in_use,
+            "high_water_mark": self.high_water_mark,
+            "created": self.created,
+            "reused": self.reused,
+        }
@@ -0,0 +1,133 @@
+"""
+Timing of the parts of a frame.
+Code to time is put between PROFILER.start(name) and PROFILER.stop(name).
+The time spent in each named section is kept for the last frames in a ring buffer,
+and can be shown in the game or saved as CSV.
+"""
+
+import csv
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hud import TextBlock
+
+
+class FrameProfiler:
+    """
+    Times named sections of each frame. Sections may be nested, like the collision checks inside the simulation.
+    Nothing is timed while the profiler is disabled, and start() and stop() return at once.
+    """
+
+    def __init__(self, history: int = 600):
+
+        self.enabled = False
+
+        # Names of the sections in the order they were first seen. Section n is column n of the ring buffer.
+        self.names: List[str] = []
+        self.columns: Dict[str, int] = {}
+
+        # Seconds spent in each section for the last frames
+        self.times = np.zeros((history, 0))
+        # Number of frames recorded. The newest frame is in row (frames - 1) % history.
+        self.frames = 0
+
+        # Start times of running sections, and time spent in sections in the current frame
+        self.started: Dict[str, float] = {}
+        self.current: Dict[str, float] = {}
+
+        # The stats drawn by draw()
+        self.text: Optional[TextBlock] = None
+
+    @property
+    def history(self):
+        return len(self.times)
+
+    def set_history(self, history: int):
+        """
+        Change the number of frames kept. Clears the recorded frames.
+        """
+        self.times = np.zeros((history, len(self.names)))
+        self.frames = 0
+
+    def start(self, name: str):
+        if not self.enabled:
+            return
+        self.started[name] = time.perf_counter()
+
+    def stop(self, name: str):
+        if not self.enabled:
+            return
+        start = self.started.pop(name, None)
+        if start is not None:
+            self.current[name] = self.current.get(name, 0.0) + time.perf_counter() - start
+
+    def end_frame(self):
+        """
+        Store the times of the current frame in the ring buffer
+        """
+        if not self.enabled:
+            return
+
+        for name in self.current:
+            if name not in self.columns:
+                self.columns[name] = len(self.names)
+                self.names.append(name)
+                self.times = np.hstack((self.times, np.zeros((self.history, 1))))
+
+        row = self.times[self.frames % self.history]
+        row[:] = 0
+        for name, seconds in self.current.items():
+            row[self.columns[name]] = seconds
+
+        self.frames += 1
+        self.current = {}
+        self.started = {}
+
+    def recorded(self) -> np.ndarray:
+        """
+        The recorded frames, oldest first
+        """
+        if self.frames < self.history:
+            return self.times[:self.frames]
+        return np.roll(self.times, -(self.frames % self.history), axis=0)
+
+    def stats(self) -> List[Tuple[str, float, float]]:
+        """
+        Name, average and worst time in milliseconds of each section over the recorded frames
+        """
+        times = self.recorded()
+        if len(times) == 0:
+            return []
+        return [
+            (name, 1000 * float(times[:, i].mean()), 1000 * float(times[:, i].max()))
+            for i, name in enumerate(self.names)
+        ]
+
+    def draw(self, x: float, top: float, line_height: float = 16):
+        """
+        Draw the average and worst time of each section, starting at the top left corner (x, top)
+        """
+        if self.text is None or self.text.line_height != line_height:
+            self.text = TextBlock(line_height)
+
+        lines = [f"{'section':<16}{'avg ms':>8}{'max ms':>8}"]
+        lines += [f"{name:<16}{average:>8.2f}{worst:>8.2f}" for name, average, worst in self.stats()]
+        self.text.draw(lines, x, top)
+
+    def save_csv(self, filename: str):
+        """
+        Write the recorded frames to a CSV file with a column of milliseconds for each section
+        """
+        times = self.recorded()
+        first_frame = self.frames - len(times)
+        with open(filename, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(["frame"] + self.names)
+            for n, row in enumerate(times):
+                writer.writerow([first_frame + n] + [f"{1000 * t:.4f}" for t in row])
+
+
+# The profiler used by the whole game
+PROFILER = FrameProfiler()
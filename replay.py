@@ -0,0 +1,158 @@
+"""
+Recording and replaying games.
+A replay is the seed of a GameSimulation and the state of the controls for every tick.
+Stepping a new simulation with the same seed and the same controls plays the exact same game again,
+so a recorded game can be run back headless as fast as possible.
+"""
+
+import hashlib
+import json
+import time
+import zlib
+from typing import List
+
+from simulation import GameSimulation, SimInput
+from assets import ASSETS, IN_GAME_MANIFEST
+
+# Version of the replay file format
+REPLAY_VERSION = 1
+
+# Bits of the byte stored for each tick
+THRUST = 1
+TURN_LEFT = 2
+TURN_RIGHT = 4
+FIRE = 8
+# The joystick is only used as -1, 0 or 1. It is stored as 0, 1 or 2 in these two bits.
+JOYSTICK_SHIFT = 4
+
+
+def encode_input(inputs: SimInput) -> int:
+    """
+    The state of the controls as a single byte
+    """
+    return (
+        THRUST * inputs.thrust
+        | TURN_LEFT * inputs.turn_left
+        | TURN_RIGHT * inputs.turn_right
+        | FIRE * inputs.fire
+        | (max(-1, min(1, round(inputs.joystick_x))) + 1) << JOYSTICK_SHIFT
+    )
+
+
+def decode_input(byte: int) -> SimInput:
+    return SimInput(
+        thrust=bool(byte & THRUST),
+        turn_left=bool(byte & TURN_LEFT),
+        turn_right=bool(byte & TURN_RIGHT),
+        fire=bool(byte & FIRE),
+        joystick_x=float((byte >> JOYSTICK_SHIFT & 3) - 1)
+    )
+
+
+def config_hash(config: dict) -> str:
+    """
+    A short hash of the config. Replays only play back the same with the same config.
+    Key bindings do not change the game, so they are left out.
+    """
+    values = {k: v for k, v in config.items() if not k.endswith("_KEY")}
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class Recorder:
+    """
+    Records the controls of a game tick by tick.
+    Call record() with the inputs of every step of the simulation, and save() when the game is over.
+    """
+
+    def __init__(self, sim: GameSimulation):
+        self.sim = sim
+        self.inputs = bytearray()
+
+    def record(self, inputs: SimInput):
+        self.inputs.append(encode_input(inputs))
+
+    def save(self, filename: str):
+        """
+        Write the replay file: a line of JSON describing the game, followed by the compressed controls
+        """
+        header = {
+            "version": REPLAY_VERSION,
+            "seed": self.sim.seed,
+            "config": config_hash(self.sim.config),
+            "ticks": len(self.inputs),
+            "score": self.sim.player_score,
+            "level": self.sim.level,
+            "lives": self.sim.player_sprite.lives,
+        }
+        with open(filename, "wb") as fp:
+            fp.write(json.dumps(header).encode() + b"\n")
+            fp.write(zlib.compress(bytes(self.inputs), 9))
+
+
+class Replay:
+    """
+    A recorded game loaded from a file
+    """
+
+    def __init__(self, header: dict, inputs: List[SimInput]):
+        self.header = header
+        self.inputs = inputs
+
+    @classmethod
+    def load(cls, filename: str) -> "Replay":
+        with open(filename, "rb") as fp:
+            header = json.loads(fp.readline())
+            data = zlib.decompress(fp.read())
+
+        if header.get("version") != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version: {header.get('version')}")
+
+        return cls(header, [decode_input(b) for b in data])
+
+    def play(self, config: dict) -> GameSimulation:
+        """
+        Step a new simulation through all recorded ticks, and return it
+        """
+        sim = GameSimulation(config, seed=self.header["seed"])
+        for inputs in self.inputs:
+            sim.step(inputs)
+        return sim
+
+    def matches(self, sim: GameSimulation) -> bool:
+        """
+        Did the simulation end the same way as the recorded game?
+        """
+        return (
+            sim.player_score == self.header["score"]
+            and sim.level == self.header["level"]
+            and sim.player_sprite.lives == self.header["lives"]
+        )
+
+
+def run_replay(config: dict, filename: str) -> bool:
+    """
+    Play a replay file headless as fast as possible, and print how fast it went and if the outcome was the same.
+    """
+
+    replay = Replay.load(filename)
+    if replay.header["config"] != config_hash(config):
+        print("Warning: the replay was recorded with another config")
+
+    # Only textures, there is no audio when headless
+    ASSETS.preload(IN_GAME_MANIFEST, sounds=False)
+
+    start = time.perf_counter()
+    sim = replay.play(config)
+    duration = time.perf_counter() - start
+
+    ticks = len(replay.inputs)
+    print(f"{ticks} ticks in {duration:.2f} s: {ticks / max(duration, 1e-9):.0f} ticks/second")
+    print(f"recorded: level {replay.header['level']}, score {replay.header['score']}, lives {replay.header['lives']}")
+    print(f"replayed: level {sim.level}, score {sim.player_score}, lives {sim.player_sprite.lives}")
+
+    if replay.matches(sim):
+        print("Replay matches the recorded game")
+        return True
+
+    print("Replay does NOT match the recorded game")
+    return False
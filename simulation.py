@@ -0,0 +1,551 @@
+"""
+The game logic of a running game.
+The simulation does not need a window, cameras, sounds or a joystick, so it can be stepped
+headless (on CI boxes, in load tests) or be driven by InGameView.
+"""
+
+import random
+import time
+from typing import List, NamedTuple, Tuple
+
+import arcade
+
+from game_sprites import Shot, Asteroid, Player, BonusUFO, PowerUp, BASE_TICK_RATE
+from entity_store import EntityStore, interpolate
+from collisions import Collisions, CollisionStage, PLAYER, PLAYER_SHOT, UFO_SHOT, ASTEROID, UFO, POWER_UP
+from assets import ASSETS, IN_GAME_MANIFEST
+from config import Config, ConfigError
+from pool import SpritePool
+from level_planner import LevelPlanner
+from profiling import PROFILER
+from timers import Scheduler
+
+# Kinds of events the simulation reports back to whoever is stepping it
+PLAYER_HIT = "player_hit"
+PLAYER_FIRED = "player_fired"
+UFO_FIRED = "ufo_fired"
+UFO_KILLED = "ufo_killed"
+ASTEROID_HIT = "asteroid_hit"
+ASTEROID_ADDED = "asteroid_added"
+LEVEL_STARTED = "level_started"
+
+
+class SimInput(NamedTuple):
+    """
+    The state of the controls for a single tick
+    """
+    thrust: bool = False
+    turn_left: bool = False
+    turn_right: bool = False
+    # Fire was pressed since the last tick
+    fire: bool = False
+    # x-axis of the joystick if present
+    joystick_x: float = 0.0
+
+
+class SimEvent(NamedTuple):
+    """
+    Something happened in the game that the view may want to show or play a sound for
+    """
+    kind: str
+    position: Tuple[float, float]
+    speed_scale: float = 1.0
+    # Size of the Asteroid for ASTEROID_HIT, the level for LEVEL_STARTED
+    size: int = 0
+
+
+class GameSimulation:
+    """
+    All the sprites and rules of a single game.
+    Call step() once per tick with the state of the controls.
+    All random numbers come from a generator seeded with seed,
+    so the same seed and the same controls every tick always give the same game.
+    """
+
+    def __init__(self, config: Config, delta_time: float = None, seed=None, level: int = 1):
+
+        # A plain dict is checked and turned into a Config
+        if not isinstance(config, Config):
+            config = Config(config).validate()
+
+        self.config = config
+        # Seconds of game time in a tick, from SIM_TICK_RATE unless given
+        self.delta_time = 1 / config.SIM_TICK_RATE if delta_time is None else delta_time
+        # Speeds are given per tick at BASE_TICK_RATE. This is how much of such a tick a tick is.
+        self.time_scale = self.delta_time * BASE_TICK_RATE
+
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.player_score = 0
+        self.level = 1
+        # Values for the current level from the difficulty table of the config
+        self.difficulty = config.difficulty[1]
+        self.ticks = 0
+
+        # Events from the current tick
+        self.events: List[SimEvent] = []
+
+        # Sprite lists
+        self.player_shot_list = arcade.SpriteList()
+        self.asteroid_list = arcade.SpriteList()
+        self.power_up_list = arcade.SpriteList()
+        self.ufo_list = arcade.SpriteList()
+        self.ufo_shot_list = arcade.SpriteList()
+
+        # Moves everything but the player
+        self.entities = EntityStore(config.WORLD_WIDTH, config.WORLD_HEIGHT)
+
+        # Collision checks, with arcade or with a spatial hash
+        self.collisions = Collisions(self.entities, config.COLLISION_METHOD, config.COLLISION_CELL_SIZE,
+                                     config.COLLISION_ANGLE_STEP)
+
+        # Timers of the game and its sprites
+        self.scheduler = Scheduler()
+
+        # Sprites created and killed all the time are reused
+        self.player_shot_pool = SpritePool(Shot)
+        self.ufo_shot_pool = SpritePool(Shot)
+        self.asteroid_pool = SpritePool(Asteroid)
+        self.power_up_pool = SpritePool(PowerUp)
+
+        # The spawn points of the next level are found while the current level is played
+        self.planner = LevelPlanner(config, background=config.PLAN_LEVELS_IN_BACKGROUND)
+
+        self.player_sprite = Player(
+            wrap_max_x=config.WORLD_WIDTH,
+            wrap_max_y=config.WORLD_HEIGHT,
+            speed_scale=1.0,
+            scale=config.SPRITE_SCALING,
+            center_x=config.PLAYER_START_X,
+            center_y=config.PLAYER_START_Y,
+            lives=config.PLAYER_START_LIVES,
+            thrust_speed=config.PLAYER_THRUST,
+            speed_limit=config.PLAYER_SPEED_LIMIT,
+            invincibility_seconds=config.PLAYER_INVINCIBILITY_SECONDS,
+            start_speed_min=config.PLAYER_START_SPEED_MIN,
+            start_speed_max=config.PLAYER_START_SPEED_MAX,
+            start_angle_min=config.PLAYER_START_ANGLE_MIN,
+            start_angle_max=config.PLAYER_START_ANGLE_MAX,
+            fire_rate=config.PLAYER_FIRE_RATE,
+            rng=self.rng
+        )
+        self.player_sprite.scheduler = self.scheduler
+
+        # Where the player was before the last tick, for drawing it between ticks
+        self.player_previous_position = self.player_sprite.position
+
+        # What happens when a sprite of one layer collides with a sprite of another
+        self.collision_handlers = {
+            (PLAYER, UFO_SHOT): self.player_hit_ufo_shot,
+            (PLAYER, POWER_UP): self.player_hit_power_up,
+            (PLAYER, ASTEROID): self.player_hit_asteroid,
+            (PLAYER, UFO): self.player_hit_ufo,
+            (PLAYER_SHOT, UFO): self.shot_hit_ufo,
+            (PLAYER_SHOT, ASTEROID): self.shot_hit_asteroid,
+        }
+        for mask in config.COLLISION_MASKS:
+            if tuple(mask) not in self.collision_handlers:
+                raise ConfigError(f"COLLISION_MASKS: {mask[0]} can't collide with {mask[1]}")
+
+        # Finds the collisions of a tick between the layers paired in the config.
+        # The player keeps colliding after picking up a power up or being hit.
+        self.collision_stage = CollisionStage(
+            self.collisions,
+            config.COLLISION_MASKS,
+            {
+                PLAYER: (self.player_sprite,),
+                PLAYER_SHOT: self.player_shot_list,
+                UFO_SHOT: self.ufo_shot_list,
+                ASTEROID: self.asteroid_list,
+                UFO: self.ufo_list,
+                POWER_UP: self.power_up_list,
+            },
+            repeatable=(PLAYER,)
+        )
+        # Pairs the player is left out of while invincible. Power ups are still picked up.
+        self.invincible_masks = {(PLAYER, UFO_SHOT), (PLAYER, ASTEROID), (PLAYER, UFO)}
+
+        # Start level 1, or a later level
+        self.next_level(level)
+        self.scheduler.schedule(self.ufo_spawn_rate(), self.spawn_ufo)
+
+    @property
+    def game_over(self):
+        return self.player_sprite.lives <= 0
+
+    def write_interpolated(self, alpha: float) -> Tuple[float, float]:
+        """
+        Write the positions of the sprites alpha of the way from the previous tick to the current tick
+        to their SpriteLists, for drawing between ticks. Returns the position to draw the player at.
+        """
+        self.entities.write_interpolated(alpha)
+        c = self.config
+        x, y = self.player_sprite.position
+        px, py = self.player_previous_position
+        return float(interpolate(px, x, alpha, c.WORLD_WIDTH)), float(interpolate(py, y, alpha, c.WORLD_HEIGHT))
+
+    def emit(self, kind, position, speed_scale=1.0, size=0):
+        self.events.append(SimEvent(kind, tuple(position), speed_scale, size))
+
+    def add_sprite(self, sprite, sprite_list=None, **kwargs):
+        """
+        Add a sprite to a sprite list, let the entity store move it and make it collide.
+        Leave out the sprite list if the sprite is already in one.
+        """
+        if sprite_list is not None:
+            sprite_list.append(sprite)
+        self.entities.add(sprite, **kwargs)
+        self.collisions.add(sprite)
+        sprite.scheduler = self.scheduler
+        sprite.start_timers()
+
+    def add_asteroid(self, asteroid):
+        self.add_sprite(asteroid, self.asteroid_list, spin=asteroid.rotation_speed)
+
+    def new_asteroid(self, **kwargs):
+        """
+        Create an Asteroid using the values from the config
+        """
+        c = self.config
+        return self.asteroid_pool.get(
+            scale=c.SPRITE_SCALING,
+            screen_width=c.WORLD_WIDTH,
+            screen_height=c.WORLD_HEIGHT,
+            min_spawn_dist_from_player=c.ASTEROIDS_MINIMUM_SPAWN_DISTANCE_FROM_PLAYER,
+            player_start_pos=(c.PLAYER_START_X, c.PLAYER_START_Y),
+            score_values=c.ASTEROID_SCORE_VALUES,
+            spread=c.ASTEROIDS_SPREAD,
+            speed=c.ASTEROIDS_SPEED,
+            level=self.level,
+            rng=self.rng,
+            **kwargs
+        )
+
+    def next_level(self, level=None):
+        """
+        Advance the game to the next level
+        or start a specific level
+        """
+
+        # if no specific level was requested, advance to the next level
+        if level is None:
+            self.level += 1
+        else:
+            self.level = level
+        self.difficulty = self.config.difficulty[self.level]
+
+        # Use the plan made during the last level, or plan the level now
+        plan = self.planner.take(self.level)
+        if plan is None:
+            plan = self.planner.make(self.level, self.rng.getrandbits(32))
+
+        # Spawn Asteroids
+        for spawn in plan.asteroids:
+            self.add_asteroid(self.new_asteroid(spawn_pos=(spawn.x, spawn.y), angle=spawn.angle))
+
+        # Spawn PowerUp
+        spawn = plan.power_up
+        pu = self.power_up_pool.get(start_max_x=self.config.WORLD_WIDTH,
+                                    start_max_y=self.config.WORLD_HEIGHT,
+                                    wrap_max_x=self.config.WORLD_WIDTH,
+                                    wrap_max_y=self.config.WORLD_HEIGHT,
+                                    speed=spawn.speed,
+                                    spawn_pos=(spawn.x, spawn.y),
+                                    angle=spawn.angle,
+                                    pu_type=PowerUp.pu_types[spawn.type],
+                                    rng=self.rng)
+
+        self.add_sprite(pu, self.power_up_list)
+
+        # Start planning the level after this one
+        self.planner.prepare(self.level + 1, self.rng.getrandbits(32))
+
+        self.emit(LEVEL_STARTED, self.player_sprite.position, size=self.level)
+
+    def split_asteroid(self, asteroid, angle):
+        """
+        Split an Asteroid into smaller Asteroids flying in the direction of angle,
+        if it's not the smallest size, and remove it
+        """
+        c = self.config
+        if asteroid.size > 1:
+            for n in range(c.ASTEROIDS_PR_SPLIT):
+                # A random angle for the the new Asteroid
+                a_angle = self.rng.randrange(
+                    int(angle - c.ASTEROIDS_SPREAD),
+                    int(angle + c.ASTEROIDS_SPREAD)
+                )
+                # Add the new Asteroid to the sprite list
+                self.add_asteroid(
+                    self.new_asteroid(angle=a_angle, size=asteroid.size - 1, spawn_pos=asteroid.position)
+                )
+        asteroid.kill()
+
+    def ufo_spawn_rate(self):
+        """
+        Seconds between UFOs on the current level
+        """
+        return self.difficulty.ufo_spawn_rate
+
+    def spawn_ufo(self):
+        """
+        spawns an ufo object into self.ufo_list, and schedules the next one.
+        """
+
+        c = self.config
+
+        new_ufo_obj = BonusUFO(0, 0)  # actual values are given below
+        # we have to call __init__ manually - if we don't the UFO won't __init__
+        new_ufo_obj.__int__(
+            scale=c.SPRITE_SCALING,
+            shot_list=self.ufo_shot_list,
+            target=self.player_sprite,
+            speed=c.UFO_SPEED,
+            speed_mod=self.difficulty.ufo_speed_mod,
+            dir_change_rate=c.UFO_DIR_CHANGE_RATE,
+            fire_rate=self.difficulty.ufo_fire_rate,
+            fire_rate_mod=0,
+            shot_scale=c.SPRITE_SCALING,
+            shot_speed=c.UFO_SHOT_SPEED,
+            shot_range=c.UFO_SHOT_RANGE,
+            shot_fade_start=c.SHOT_FADE_START,
+            shot_fade_speed=c.SHOT_FADE_SPEED,
+            small_size=c.UFO_SIZE_SMALL,
+            big_size=c.UFO_SIZE_BIG,
+            screen_width=c.WORLD_WIDTH,
+            screen_height=c.WORLD_HEIGHT,
+            shot_factory=self.ufo_shot_pool.get,
+            on_shoot=self.ufo_fired,
+            rng=self.rng
+        )  # it needs the list so it can send shots to the simulation
+
+        # UFOs do not wrap, they are removed when they leave the screen
+        self.add_sprite(new_ufo_obj, self.ufo_list, wraps=False, spin_with_speed=True, speed_scale=1.0)
+
+        self.scheduler.schedule(self.ufo_spawn_rate(), self.spawn_ufo)
+
+    def ufo_fired(self, shot):
+        self.add_sprite(shot)
+        self.emit(UFO_FIRED, shot.position, shot.speed_scale)
+
+    def fire(self):
+        """
+        Fire a player shot if the player is allowed to
+        """
+
+        if self.player_sprite.is_invincible or not self.player_sprite.fire():
+            return
+
+        new_shot = self.player_shot_pool.get(
+            filename="images/Lasers/laserBlue01.png",
+            scale=self.config.SPRITE_SCALING,
+            center_x=self.player_sprite.center_x,
+            center_y=self.player_sprite.center_y,
+            angle=self.player_sprite.angle,
+            speed=self.config.PLAYER_SHOT_SPEED,
+            range=self.config.PLAYER_SHOT_RANGE,
+            fade_start=self.config.SHOT_FADE_START,
+            fade_speed=self.config.SHOT_FADE_SPEED,
+            wrap_max_x=self.config.WORLD_WIDTH,
+            wrap_max_y=self.config.WORLD_HEIGHT,
+            speed_scale=self.player_sprite.speed_scale,
+            rng=self.rng
+        )
+
+        self.add_sprite(new_shot, self.player_shot_list)
+        self.emit(PLAYER_FIRED, new_shot.position, self.player_sprite.speed_scale)
+
+    def shockwave(self, position, range, strength):
+        """
+        Push Asteroids, shots and power ups away from position
+        """
+        self.entities.radial_impulse(
+            position[0], position[1], range, strength,
+            (self.asteroid_list, self.player_shot_list, self.ufo_shot_list, self.power_up_list)
+        )
+
+    def ufo_killed(self, ufo):
+        ufo.kill()
+        self.shockwave(ufo.position, self.config.UFO_SHOCKWAVE_RANGE, self.config.UFO_SHOCKWAVE_STRENGTH)
+
+    def player_hit_ufo_shot(self, player, shot):
+        if player.is_invincible:
+            return
+        self.player_hit()
+        shot.kill()
+
+    def player_hit_power_up(self, player, power_up):
+        self.player_score += power_up.type.get("score", 0)
+        player.lives += power_up.type.get("life", 0)
+        player.fire_rate *= power_up.type.get("fire_rate", 1.0)
+        # power up that adds more asteroids
+        for x in range(0, power_up.type.get("add_asteroids", 0)):
+            a = self.new_asteroid()
+            self.emit(ASTEROID_ADDED, a.position)
+            self.add_asteroid(a)
+        power_up.kill()
+
+    def player_hit_asteroid(self, player, asteroid):
+        # The player dies and kills the Asteroid
+        if player.is_invincible:
+            return
+        self.player_hit()
+        asteroid.kill()
+
+    def player_hit_ufo(self, player, ufo):
+        if player.is_invincible:
+            return
+        self.player_hit()
+        self.ufo_killed(ufo)
+
+    def shot_hit_ufo(self, shot, ufo):
+        shot.kill()
+        self.ufo_killed(ufo)
+        self.player_score += self.config.UFO_POINTS_REWARD
+        self.emit(UFO_KILLED, ufo.position, ufo.speed_scale)
+
+    def shot_hit_asteroid(self, shot, asteroid):
+        self.player_score += asteroid.value
+        self.emit(ASTEROID_HIT, asteroid.position, asteroid.speed_scale, asteroid.size)
+
+        # Split into smaller Asteroids flying the way of the shot, and remove the shot
+        self.split_asteroid(asteroid, shot.angle)
+        shot.kill()
+
+    def player_hit(self):
+        """
+        The player lost a life
+        """
+        self.shockwave(self.player_sprite.position, self.config.PLAYER_SHOCKWAVE_RANGE,
+                       self.config.PLAYER_SHOCKWAVE_STRENGTH)
+        self.player_sprite.lives -= 1
+        self.player_sprite.reset()
+        self.emit(PLAYER_HIT, self.player_sprite.position, self.player_sprite.speed_scale)
+
+    def step(self, inputs: SimInput) -> List[SimEvent]:
+        """
+        Advance the game one tick and return what happened
+        """
+
+        c = self.config
+        delta_time = self.delta_time
+        player = self.player_sprite
+
+        self.events = []
+        self.ticks += 1
+
+        PROFILER.start("timers")
+
+        # Spawn UFOs, let them shoot and turn, end power ups and the invincibility of the player
+        self.scheduler.advance(delta_time)
+
+        PROFILER.stop("timers")
+
+        if inputs.fire:
+            self.fire()
+
+        # Calculate player speed based on the keys pressed
+        if inputs.turn_left and not inputs.turn_right:
+            player.angle += c.PLAYER_ROTATE_SPEED * player.speed_scale * self.time_scale
+        elif inputs.turn_right and not inputs.turn_left:
+            player.angle += -c.PLAYER_ROTATE_SPEED * player.speed_scale * self.time_scale
+
+        # rotate player with joystick
+        player.angle += round(inputs.joystick_x) * -c.PLAYER_ROTATE_SPEED * self.time_scale
+
+        PROFILER.start("collisions")
+
+        # Find all collisions first, then kill, split and score
+        hits = self.collision_stage.detect(self.invincible_masks if player.is_invincible else ())
+
+        PROFILER.stop("collisions")
+        PROFILER.start("collision_events")
+
+        for hit in hits:
+            self.collision_handlers[hit.first, hit.second](hit.a, hit.b)
+
+        PROFILER.stop("collision_events")
+        PROFILER.start("movement")
+
+        # check for thrust
+        if inputs.thrust and player.alpha > 0:
+            player.thrust(delta_time)
+
+        # Update all sprites
+        self.player_previous_position = player.position
+        player.on_update(delta_time)
+
+        # Move everything else in one go
+        for sprite in self.entities.update(self.time_scale):
+            # UFOs leaving the screen
+            sprite.kill()
+
+        # Shot range. Everything else is done by timers.
+        for sprite_list in (self.player_shot_list, self.ufo_shot_list):
+            # Iterate a copy since sprites may kill themselves
+            for sprite in list(sprite_list):
+                sprite.after_move(delta_time)
+
+        PROFILER.stop("movement")
+
+        if len(self.asteroid_list) == 0:
+            PROFILER.start("next_level")
+            self.next_level()
+            PROFILER.stop("next_level")
+
+        # Sprites killed during the tick can be reused from the next tick
+        for pool in self.pools():
+            pool.recycle()
+
+        return self.events
+
+    def pools(self):
+        return self.player_shot_pool, self.ufo_shot_pool, self.asteroid_pool, self.power_up_pool
+
+
+def scripted_input(tick: int) -> SimInput:
+    """
+    A simple, deterministic player: keeps turning, fires as fast as allowed and thrusts now and then
+    """
+    return SimInput(
+        thrust=tick % 180 < 30,
+        turn_left=tick % 240 < 120,
+        turn_right=tick % 240 >= 200,
+        fire=True
+    )
+
+
+def run_headless(config: dict, ticks: int, seed=None):
+    """
+    Play games with the scripted player for a number of ticks, and print how fast it went.
+    A new game is started every time the player dies.
+    """
+
+    # Every game gets its own seed, made from seed
+    seeds = random.Random(seed)
+
+    # Only textures, there is no audio when headless
+    ASSETS.preload(IN_GAME_MANIFEST, sounds=False)
+
+    sim = GameSimulation(config, seed=seeds.getrandbits(32))
+    games = []
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        sim.step(scripted_input(tick))
+        if sim.game_over:
+            games.append((sim.level, sim.player_score))
+            sim = GameSimulation(config, seed=seeds.getrandbits(32))
+    duration = time.perf_counter() - start
+
+    games.append((sim.level, sim.player_score))
+
+    print(f"{ticks} ticks in {duration:.2f} s: {ticks / duration:.0f} ticks/second")
+    for n, (level, score) in enumerate(games, start=1):
+        print(f"game {n}: level {level}, score {score}")
+    for name, pool in zip(("player shots", "ufo shots", "asteroids", "power ups"), sim.pools()):
+        s = pool.stats()
+        print(f"Pool {name}: {s['created']} created, {s['reused']} reused, "
+              f"high water mark {s['high_water_mark']}")
+    ASSETS.report()
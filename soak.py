@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+"""
+Soak test of the whole game, window and views included.
+A scripted bot plays games, dies, restarts in the middle of games and visits the settings, for as long as asked.
+Every now and then the memory traced by tracemalloc and the number of live objects of the game's classes are
+sampled. The samples are written to a CSV file, and the growth between the first and the last sample
+to a report, so memory creeping up over hours shows up here instead of on a kiosk:
+
+    python soak.py --minutes 240 --report soak_report.txt --csv soak.csv
+
+Frames are run as fast as possible, each as if 1/60 second had passed.
+"""
+
+import argparse
+import csv
+import gc
+import time
+import tracemalloc
+from collections import Counter
+from typing import List
+
+import arcade
+
+from my_game import CONFIG, IntroView, SettingsView, InGameView, GameOverView
+from assets import ASSETS, IN_GAME_MANIFEST, MENU_MANIFEST
+from audio import AUDIO
+from simulation import SimInput, scripted_input
+
+# Classes counted in every sample
+COUNTED_CLASSES = [
+    "Shot", "Asteroid", "BonusUFO", "PowerUp", "Player",
+    "IntroView", "SettingsView", "InGameView", "GameOverView",
+    "GameSimulation", "SpriteList", "UIManager", "Text",
+]
+
+
+class SoakBot:
+    """
+    Presses keys like a player would, depending on the view shown
+    """
+
+    def __init__(self, window: arcade.Window, restart_every: int, settings_every: int, wait_frames: int):
+        self.window = window
+        # Restart every restart_every games in the middle of the game, and visit the settings every settings_every
+        self.restart_every = restart_every
+        self.settings_every = settings_every
+        # Frames to wait on the intro, settings and game over screens
+        self.wait_frames = wait_frames
+
+        self.view = None
+        self.last_view = None
+        self.frames_in_view = 0
+        self.games = 0
+        self.restarts = 0
+        self.inputs = SimInput()
+
+    def tap(self, key: int):
+        self.window.dispatch_event("on_key_press", key, 0)
+        self.window.dispatch_event("on_key_release", key, 0)
+
+    def set_key(self, key: int, pressed: bool, was_pressed: bool):
+        if pressed and not was_pressed:
+            self.window.dispatch_event("on_key_press", key, 0)
+        elif was_pressed and not pressed:
+            self.window.dispatch_event("on_key_release", key, 0)
+
+    def play(self, view: InGameView):
+        inputs = scripted_input(self.frames_in_view)
+        self.set_key(CONFIG["PLAYER_THRUST_KEY"], inputs.thrust, self.inputs.thrust)
+        self.set_key(CONFIG["PLAYER_TURN_LEFT_KEY"], inputs.turn_left, self.inputs.turn_left)
+        self.set_key(CONFIG["PLAYER_TURN_RIGHT_KEY"], inputs.turn_right, self.inputs.turn_right)
+        if inputs.fire:
+            self.tap(CONFIG["PLAYER_FIRE_KEY"])
+        self.inputs = inputs
+
+        # Give up on some games half way
+        if self.games % self.restart_every == self.restart_every - 1 and self.frames_in_view == 60 * 30:
+            self.restarts += 1
+            self.tap(CONFIG["UI_RESTART_KEY"])
+
+    def on_frame(self):
+        view = self.window.current_view
+        if view is not self.view:
+            self.view = view
+            self.frames_in_view = 0
+            self.inputs = SimInput()
+            if isinstance(view, InGameView):
+                self.games += 1
+        self.frames_in_view += 1
+
+        if isinstance(view, InGameView):
+            self.play(view)
+        elif self.frames_in_view < self.wait_frames:
+            pass
+        elif isinstance(view, IntroView):
+            # Visit the settings now and then, and play when back from them
+            if self.games % self.settings_every == self.settings_every - 1 and not isinstance(self.last_view, SettingsView):
+                self.tap(CONFIG["UI_SETTINGS_KEY"])
+            else:
+                self.tap(CONFIG["UI_PLAY_KEY"])
+        elif isinstance(view, SettingsView):
+            self.tap(CONFIG["EXIT_SETTINGS_KEY"])
+        elif isinstance(view, GameOverView):
+            # Back to the intro now and then, else play again
+            if self.games % self.settings_every == 0:
+                self.window.show_view(IntroView())
+            else:
+                self.tap(arcade.key.R)
+
+        self.last_view = view
+
+
+def count_objects() -> Counter:
+    """
+    Live objects of the counted classes, by class name
+    """
+    gc.collect()
+    counted = set(COUNTED_CLASSES)
+    return Counter(name for name in (type(o).__name__ for o in gc.get_objects()) if name in counted)
+
+
+class Sample:
+    def __init__(self, elapsed: float, frames: int, games: int, snapshot: tracemalloc.Snapshot, counts: Counter):
+        self.elapsed = elapsed
+        self.frames = frames
+        self.games = games
+        self.snapshot = snapshot
+        self.traced = tracemalloc.get_traced_memory()[0]
+        self.counts = counts
+
+
+def write_csv(filename: str, samples: List[Sample]):
+    with open(filename, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["seconds", "frames", "games", "traced_kib"] + COUNTED_CLASSES)
+        for s in samples:
+            writer.writerow([f"{s.elapsed:.0f}", s.frames, s.games, f"{s.traced / 1024:.0f}"]
+                            + [s.counts[name] for name in COUNTED_CLASSES])
+
+
+def write_report(filename: str, samples: List[Sample], bot: SoakBot, top: int = 15):
+    """
+    Growth from the first to the last sample: memory, live objects, and the lines of code allocating the most
+    """
+    first, last = samples[0], samples[-1]
+    hours = max(last.elapsed - first.elapsed, 1e-9) / 3600
+    lines = [
+        f"Soak test: {last.elapsed / 60:.1f} minutes, {last.frames} frames, {bot.games} games, "
+        f"{bot.restarts} restarts in the middle of a game",
+        "",
+        f"Traced memory: {first.traced / 1024:.0f} KiB -> {last.traced / 1024:.0f} KiB "
+        f"({(last.traced - first.traced) / 1024 / hours:+.0f} KiB/hour)",
+        "",
+        f"{'live objects':<16}{'first':>8}{'last':>8}{'max':>8}",
+    ]
+    for name in COUNTED_CLASSES:
+        most = max(s.counts[name] for s in samples)
+        lines.append(f"{name:<16}{first.counts[name]:>8}{last.counts[name]:>8}{most:>8}")
+
+    lines += ["", f"Top {top} lines by memory growth:"]
+    growth = [stat for stat in last.snapshot.compare_to(first.snapshot, "lineno") if stat.size_diff > 0]
+    for stat in growth[:top]:
+        lines.append(f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8} blocks  {stat.traceback}")
+
+    with open(filename, "w") as fp:
+        fp.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Let a bot play for a long time and report memory growth")
+    parser.add_argument("--minutes", type=float, default=CONFIG['SOAK_MINUTES'], help="how long to run")
+    parser.add_argument("--sample-seconds", type=float, default=CONFIG['SOAK_SAMPLE_SECONDS'],
+                        help="seconds between memory samples")
+    parser.add_argument("--report", default="soak_report.txt", help="file the report is written to")
+    parser.add_argument("--csv", default="soak.csv", help="file the samples are written to")
+    args = parser.parse_args()
+
+    window = arcade.Window(CONFIG['SCREEN_WIDTH'], CONFIG['SCREEN_HEIGHT'])
+    ASSETS.preload(MENU_MANIFEST)
+    ASSETS.preload(IN_GAME_MANIFEST)
+    AUDIO.setup(CONFIG['AUDIO_VOICES'], CONFIG['AUDIO_MAX_VOICES_PR_SOUND'])
+    window.show_view(IntroView())
+
+    bot = SoakBot(window, CONFIG['SOAK_RESTART_EVERY'], CONFIG['SOAK_SETTINGS_EVERY'], CONFIG['SOAK_WAIT_FRAMES'])
+
+    # Frames run before the first sample, so caches filled once do not count as growth
+    warm_up_frames = 60 * 60
+
+    # Only the line allocating is kept for each block, more frames would slow the game down too much
+    tracemalloc.start()
+    samples: List[Sample] = []
+    start = time.perf_counter()
+    next_sample = None
+    frames = 0
+
+    while time.perf_counter() - start < args.minutes * 60:
+        bot.on_frame()
+        window.dispatch_event("on_update", 1 / 60)
+        window.dispatch_event("on_draw")
+        window.flip()
+        # Events are queued by the window until they are dispatched, like the main loop of arcade does
+        window.dispatch_events()
+        frames += 1
+
+        now = time.perf_counter()
+        if frames == warm_up_frames or (next_sample is not None and now >= next_sample):
+            samples.append(Sample(now - start, frames, bot.games, tracemalloc.take_snapshot(), count_objects()))
+            write_csv(args.csv, samples)
+            next_sample = time.perf_counter() + args.sample_seconds
+
+    samples.append(Sample(time.perf_counter() - start, frames, bot.games, tracemalloc.take_snapshot(),
+                          count_objects()))
+    tracemalloc.stop()
+
+    write_csv(args.csv, samples)
+    write_report(args.report, samples, bot)
+    with open(args.report) as fp:
+        print(fp.read())
+
+
+if __name__ == "__main__":
+    main()
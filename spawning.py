@@ -0,0 +1,106 @@
+"""
+Random spawn points away from the player.
+Picking random points until one is far enough from the player gets slower the bigger the distance is,
+and never ends if no point is far enough. The SpawnSampler counts the allowed points of the field once,
+and then picks among them directly, so a spawn point always costs the same.
+"""
+
+import functools
+import random
+from typing import Tuple, Union
+
+import numpy as np
+
+
+class SpawnSampler:
+    """
+    Picks points with whole numbers for coordinates in the field from (0, 0) to (width, height),
+    further than exclusion_radius from center. All allowed points are equally likely.
+
+    The allowed points are counted for each column x of the field:
+    the column is allowed below and above the part of it inside the exclusion circle.
+    """
+
+    def __init__(self, width: int, height: int, center: Tuple[float, float], exclusion_radius: float):
+        self.width = width
+        self.height = height
+        self.center = center
+        self.exclusion_radius = exclusion_radius
+
+        cx, cy = center
+        x = np.arange(width + 1)
+        # Half the height of the exclusion circle in each column. NaN where the column misses the circle.
+        with np.errstate(invalid="ignore"):
+            half = np.sqrt(exclusion_radius ** 2 - (x - cx) ** 2)
+        hit = ~np.isnan(half)
+
+        # Points below the circle are y = 0 .. low - 1, points above it are y = high + 1 .. height
+        low = np.where(hit, np.clip(np.ceil(cy - np.nan_to_num(half)), 0, height + 1), height + 1)
+        high = np.where(hit, np.clip(np.floor(cy + np.nan_to_num(half)), -1, height), height)
+        self.below = low.astype(np.int64)
+        self.above = (height - high).astype(np.int64)
+
+        # Allowed points in the columns to the left of each column
+        self.first = np.concatenate(([0], np.cumsum(self.below + self.above)))
+        self.count = int(self.first[-1])
+
+    @property
+    def empty(self) -> bool:
+        return self.count == 0
+
+    def points_from_indices(self, indices: np.ndarray) -> np.ndarray:
+        """
+        The allowed points with the given numbers, counting column by column from the bottom left corner
+        """
+        x = np.searchsorted(self.first, indices, side="right") - 1
+        offset = indices - self.first[x]
+        below = self.below[x]
+        y = np.where(offset < below, offset, offset - below + self.height + 1 - self.above[x])
+        return np.column_stack((x, y))
+
+    def sample(self, n: int, rng: Union[np.random.Generator, random.Random], min_spacing: float = 0,
+               candidates: int = 30) -> np.ndarray:
+        """
+        n allowed points as an array of (x, y).
+        Raises ValueError if no point of the field is far enough from the center.
+
+        With min_spacing, the points are also kept that far from each other. A number of candidates are picked
+        for each point, and the first one far enough from the points before it is used. If none of them is,
+        the one furthest from the points before it is used, so sampling always ends,
+        even if the field has no room for n points that far apart.
+        """
+        if self.empty:
+            raise ValueError(f"No point of the {self.width}x{self.height} field is further than "
+                             f"{self.exclusion_radius} from {self.center}")
+
+        if min_spacing <= 0 or n < 2:
+            return self.points_from_indices(self.indices(n, rng))
+
+        points = np.zeros((n, 2), dtype=np.int64)
+        points[0] = self.points_from_indices(self.indices(1, rng))[0]
+        for i in range(1, n):
+            options = self.points_from_indices(self.indices(candidates, rng))
+            # Distance from each candidate to the nearest point before it
+            d = options[:, np.newaxis, :] - points[np.newaxis, :i, :]
+            nearest = (d ** 2).sum(axis=2).min(axis=1)
+            far_enough = np.flatnonzero(nearest >= min_spacing ** 2)
+            points[i] = options[far_enough[0] if len(far_enough) else nearest.argmax()]
+
+        return points
+
+    def point(self, rng: Union[np.random.Generator, random.Random]) -> Tuple[int, int]:
+        x, y = self.sample(1, rng)[0]
+        return int(x), int(y)
+
+    def indices(self, n: int, rng: Union[np.random.Generator, random.Random]) -> np.ndarray:
+        if isinstance(rng, np.random.Generator):
+            return rng.integers(0, self.count, size=n)
+        return np.array([rng.randrange(self.count) for i in range(n)], dtype=np.int64)
+
+
+@functools.lru_cache(maxsize=16)
+def spawn_sampler(width: int, height: int, center: Tuple[float, float], exclusion_radius: float) -> SpawnSampler:
+    """
+    A SpawnSampler shared by everything spawning in the same field
+    """
+    return SpawnSampler(int(width), int(height), tuple(center), exclusion_radius)
@@ -0,0 +1,77 @@
+"""
+Flashing stars in the background
+"""
+
+import math
+import random
+
+import arcade
+import numpy as np
+
+from tools import write_sprite_positions, write_sprite_alphas
+
+
+class Starfield:
+    """
+    Randomly positioned stars blinking while they drift.
+    All stars share one texture. Position, size and blinking are kept in arrays,
+    and all stars are updated at once and written straight to the buffers of the SpriteList.
+    The stars only live in the SpriteList, so the sprites are not updated.
+    """
+
+    def __init__(self, no_of_stars: int, max_x: int, max_y: int, base_size: int = 10, scale: float = 0.5,
+                 fade_speed: int = 30):
+        """
+        base_size: The size of the circle texture used for stars.
+        scale: Will be multiplied with a random float between 0.0 & 1.0 to calculate the scaling of the star.
+        fade_speed: Higher int, slower fade.
+        """
+
+        self.max_x = max_x
+        self.max_y = max_y
+
+        texture = arcade.make_circle_texture(diameter=base_size, color=arcade.color.WHITE)
+
+        self.x = np.array([random.randint(0, max_x) for i in range(no_of_stars)], dtype=np.float32)
+        self.y = np.array([random.randint(0, max_y) for i in range(no_of_stars)], dtype=np.float32)
+        self.scale = np.array([scale * random.random() for i in range(no_of_stars)], dtype=np.float32)
+        # Start fade pos between 0 and 2 * pi
+        self.fade_pos = np.array([2 * random.random() * math.pi for i in range(no_of_stars)], dtype=np.float32)
+        self.fade_speed = np.array([random.random() / fade_speed for i in range(no_of_stars)], dtype=np.float32)
+        # Half the size of each star, used when wrapping
+        self.radius = self.scale * base_size / 2
+
+        self.sprite_list = arcade.SpriteList(capacity=max(no_of_stars, 1))
+        for x, y, s in zip(self.x.tolist(), self.y.tolist(), self.scale.tolist()):
+            self.sprite_list.append(arcade.Sprite(texture=texture, scale=s, center_x=x, center_y=y))
+
+        self.slots = np.array([self.sprite_list.sprite_slot[s] for s in self.sprite_list], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.x)
+
+    def on_update(self, change_x: float, change_y: float, speed_scale: float = 1.0):
+        """
+        Move all stars while randomly blinking. Bigger stars move faster than small stars.
+        """
+
+        # cos() returns floats between -1.0 and 1.0.
+        # We want make that a number between 0 and 255
+        alpha = np.clip(128 + 128 * np.cos(self.fade_pos), 0, 255).astype(np.uint8)
+        self.fade_pos += self.fade_speed
+
+        x, y, r = self.x, self.y, self.radius
+        x += self.scale * (change_x * speed_scale)
+        y += self.scale * (change_y * speed_scale)
+
+        # if a star is off-screen move it to the other side of the screen
+        x[x + r < 0] += self.max_x
+        x[x - r > self.max_x] -= self.max_x
+        y[y + r < 0] += self.max_y
+        y[y - r > self.max_y] -= self.max_y
+
+        write_sprite_positions(self.sprite_list, self.slots, x, y)
+        write_sprite_alphas(self.sprite_list, self.slots, alpha)
+
+    def draw(self):
+        self.sprite_list.draw()
@@ -0,0 +1,93 @@
+"""
+Tests of the collision checks, against arcade's own checks
+"""
+
+import random
+
+import arcade
+import pytest
+
+from collisions import (Collisions, CollisionStage, METHOD_SPATIAL_HASH, PLAYER, PLAYER_SHOT, ASTEROID,
+                        POWER_UP)
+from entity_store import EntityStore
+from game_sprites import ObjInSpace
+
+WIDTH = 800
+HEIGHT = 600
+
+ASTEROID_IMAGES = [
+    "images/Meteors/meteorGrey_med1.png",
+    "images/Meteors/meteorGrey_small1.png",
+    "images/Meteors/meteorGrey_tiny1.png",
+]
+SHOT_IMAGE = "images/Lasers/laserGreen07.png"
+POWER_UP_IMAGE = "images/Power-ups/powerupGreen_star.png"
+
+
+@pytest.fixture
+def store(assets):
+    return EntityStore(WIDTH, HEIGHT)
+
+
+def make_sprite(filename, x, y, angle=0, sprite_list=None, store=None):
+    """
+    A sprite at x, y, added to the SpriteList and the store if they are given
+    """
+    sprite = ObjInSpace(WIDTH, HEIGHT, filename=filename, center_x=x, center_y=y, angle=angle)
+    if sprite_list is not None:
+        sprite_list.append(sprite)
+        store.add(sprite)
+    return sprite
+
+
+def test_spatial_hash_finds_what_arcade_finds(store):
+    rng = random.Random(1)
+    asteroids = arcade.SpriteList()
+    for n in range(60):
+        make_sprite(rng.choice(ASTEROID_IMAGES), rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT),
+                    rng.randrange(360), asteroids, store)
+
+    collisions = Collisions(store, METHOD_SPATIAL_HASH, cell_size=64)
+    collisions.rebuild([asteroids])
+
+    hits = 0
+    for n in range(300):
+        shot = make_sprite(SHOT_IMAGE, rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT), rng.randrange(360))
+        expected = arcade.check_for_collision_with_list(shot, asteroids)
+        assert {id(s) for s in collisions.check(shot, asteroids)} == {id(s) for s in expected}
+        hits += len(expected)
+
+    # The shots must hit something for the test to mean anything
+    assert hits > 0
+
+
+def test_sprite_collides_once_per_detect(store):
+    shots = arcade.SpriteList()
+    asteroids = arcade.SpriteList()
+    # Two shots on two Asteroids in the same place
+    for n in range(2):
+        make_sprite(SHOT_IMAGE, 400, 300, sprite_list=shots, store=store)
+        make_sprite(ASTEROID_IMAGES[0], 400, 300, sprite_list=asteroids, store=store)
+
+    stage = CollisionStage(Collisions(store), [(PLAYER_SHOT, ASTEROID)], {PLAYER_SHOT: shots, ASTEROID: asteroids})
+    events = stage.detect()
+
+    # Each shot hits one Asteroid, and each Asteroid is hit by one shot
+    assert len(events) == 2
+    assert len({id(e.a) for e in events}) == 2
+    assert len({id(e.b) for e in events}) == 2
+
+
+def test_repeatable_layer_collides_more_than_once(store):
+    player = make_sprite(SHOT_IMAGE, 400, 300)
+    power_ups = arcade.SpriteList()
+    for n in range(2):
+        make_sprite(POWER_UP_IMAGE, 400, 300, sprite_list=power_ups, store=store)
+
+    layers = {PLAYER: (player,), POWER_UP: power_ups}
+    once = CollisionStage(Collisions(store), [(PLAYER, POWER_UP)], layers)
+    repeatable = CollisionStage(Collisions(store), [(PLAYER, POWER_UP)], layers, repeatable=(PLAYER,))
+
+    assert len(once.detect()) == 1
+    assert len(repeatable.detect()) == 2
+    assert repeatable.detect(skip={(PLAYER, POWER_UP)}) == []
@@ -0,0 +1,48 @@
+"""
+Tests of loading and checking the config
+"""
+
+import pytest
+
+from config import ConfigError, load_config
+
+
+@pytest.fixture
+def config(assets):
+    return load_config("my_game.toml")
+
+
+def test_game_config_is_valid(config):
+    assert config.difficulty[1].ufo_spawn_rate == config.UFO_SPAWN_RATE
+
+
+def test_negative_ufo_spawn_rate_is_rejected(assets, tmp_path):
+    settings = tmp_path / "user_settings.toml"
+    settings.write_text("UFO_SPAWN_RATE = -5\n")
+
+    with pytest.raises(ConfigError, match="UFO_SPAWN_RATE must be greater than 0"):
+        load_config("my_game.toml", str(settings))
+
+
+@pytest.mark.parametrize("values, message", [
+    ({"SCREEN_WIDTH": "wide"}, "SCREEN_WIDTH must be of type int"),
+    ({"ASTEROIDS_PR_SPLIT": -1}, "ASTEROIDS_PR_SPLIT must be at least"),
+    ({"PLAYER_START_SPEED_MIN": 5, "PLAYER_START_SPEED_MAX": 1}, "is bigger than"),
+    ({"COLLISION_MASKS": [["player", "moon"]]}, "COLLISION_MASKS must be pairs of layers"),
+])
+def test_bad_values_are_rejected(config, values, message):
+    with pytest.raises(ConfigError, match=message):
+        config.replace(**values)
+
+
+def test_missing_value_is_rejected(config):
+    del config["UFO_SPAWN_RATE"]
+    with pytest.raises(ConfigError, match="UFO_SPAWN_RATE is missing"):
+        config.validate()
+
+
+def test_late_levels_stay_valid(config):
+    level = config.difficulty[200]
+    assert level.asteroids >= 1
+    assert level.ufo_spawn_rate > 0
+    assert level.ufo_fire_rate > 0
@@ -0,0 +1,68 @@
+"""
+Tests of the sprite pools
+"""
+
+import random
+
+import arcade
+
+from game_sprites import PowerUp
+from pool import SpritePool
+
+WIDTH = 800
+HEIGHT = 600
+
+
+def get_power_up(pool, x, y, pu_type, sprite_list):
+    power_up = pool.get(WIDTH, HEIGHT, WIDTH, HEIGHT, speed=2, spawn_pos=(x, y), angle=90, pu_type=pu_type,
+                        rng=random.Random(1))
+    sprite_list.append(power_up)
+    return power_up
+
+
+def test_killed_sprites_are_reused_after_recycle(assets):
+    pool = SpritePool(PowerUp)
+    power_ups = arcade.SpriteList()
+    first = get_power_up(pool, 100, 100, PowerUp.pu_types[0], power_ups)
+    first.kill()
+    # Killing twice gives the sprite back once
+    first.kill()
+
+    # Not reused in the same tick
+    second = get_power_up(pool, 100, 100, PowerUp.pu_types[0], power_ups)
+    assert second is not first
+
+    pool.recycle()
+    third = get_power_up(pool, 100, 100, PowerUp.pu_types[0], power_ups)
+    assert third is first
+    assert pool.stats() == {"size": 0, "in_use": 2, "high_water_mark": 2, "created": 2, "reused": 1}
+
+
+def test_reused_sprite_is_reset(assets):
+    pool = SpritePool(PowerUp)
+    power_ups = arcade.SpriteList()
+    power_up = get_power_up(pool, 100, 100, PowerUp.pu_types[0], power_ups)
+    power_up.angle = 45
+    power_up.kill()
+    pool.recycle()
+
+    reused = get_power_up(pool, 300, 200, PowerUp.pu_types[3], power_ups)
+
+    assert reused is power_up
+    assert reused.position == (300, 200)
+    assert reused.angle == 90
+    assert reused.type is PowerUp.pu_types[3]
+    assert reused.texture is assets.texture(PowerUp.pu_types[3]["filename"])
+    assert reused.lifetime == PowerUp.pu_types[3]["lifetime"]
+    assert reused.timers is None
+
+
+def test_pool_keeps_at_most_max_size_sprites(assets):
+    pool = SpritePool(PowerUp, max_size=2)
+    power_ups = arcade.SpriteList()
+    for power_up in [get_power_up(pool, 100, 100, PowerUp.pu_types[0], power_ups) for n in range(3)]:
+        power_up.kill()
+    pool.recycle()
+
+    assert pool.stats()["size"] == 2
+    assert pool.stats()["in_use"] == 0
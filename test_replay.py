@@ -0,0 +1,57 @@
+"""
+Tests of recording and replaying games
+"""
+
+import pytest
+
+from config import load_config
+from replay import Recorder, Replay, config_hash, decode_input, encode_input
+from simulation import GameSimulation, SimInput, scripted_input
+
+
+def state(sim):
+    """
+    Everything a replay has to get back to
+    """
+    return (
+        sim.level,
+        sim.player_score,
+        sim.player_sprite.lives,
+        sim.player_sprite.position,
+        sorted(a.position for a in sim.asteroid_list),
+    )
+
+
+@pytest.mark.parametrize("inputs", [
+    SimInput(),
+    SimInput(thrust=True, fire=True),
+    SimInput(turn_left=True, joystick_x=-1.0),
+    SimInput(turn_right=True, joystick_x=1.0),
+])
+def test_inputs_fit_in_a_byte(inputs):
+    byte = encode_input(inputs)
+    assert 0 <= byte < 256
+    assert decode_input(byte) == inputs
+
+
+def test_replay_ends_like_the_recorded_game(assets, tmp_path):
+    config = load_config("my_game.toml")
+    sim = GameSimulation(config, seed=7)
+    recorder = Recorder(sim)
+    for tick in range(1500):
+        if sim.game_over:
+            break
+        inputs = scripted_input(tick)
+        recorder.record(inputs)
+        sim.step(inputs)
+    filename = str(tmp_path / "game.replay")
+    recorder.save(filename)
+
+    replay = Replay.load(filename)
+    assert replay.header["config"] == config_hash(config)
+    assert len(replay.inputs) == len(recorder.inputs)
+    assert replay.header["score"] > 0
+
+    replayed = replay.play(config)
+    assert replay.matches(replayed)
+    assert state(replayed) == state(sim)
@@ -0,0 +1,45 @@
+"""
+Regression tests of the game logic, run headless with pytest
+"""
+
+import pytest
+
+from config import load_config
+from simulation import GameSimulation, SimInput
+
+
+@pytest.fixture
+def sim(assets):
+    return GameSimulation(load_config("my_game.toml"), seed=1)
+
+
+def place(sim, sprite, x, y):
+    """
+    Put a sprite moved by the entity store at x, y and stop it
+    """
+    store, i = sim.entities, sprite.store_index
+    store.x[i] = store.previous_x[i] = x
+    store.y[i] = store.previous_y[i] = y
+    store.dx[i] = store.dy[i] = 0
+    sprite.position = (x, y)
+
+
+def test_shot_hits_asteroid_over_invincible_player(sim):
+    player = sim.player_sprite
+    sim.fire()
+    shot = sim.player_shot_list[0]
+    player.reset()
+    assert player.is_invincible
+
+    asteroid = sim.asteroid_list[0]
+    place(sim, shot, *player.position)
+    place(sim, asteroid, *player.position)
+    asteroids = len(sim.asteroid_list)
+
+    sim.step(SimInput())
+
+    assert sim.player_score == asteroid.value
+    assert shot not in sim.player_shot_list
+    assert asteroid not in sim.asteroid_list
+    assert len(sim.asteroid_list) > asteroids - 1
+    assert player.lives == sim.config.PLAYER_START_LIVES
@@ -0,0 +1,42 @@
+"""
+Tests of the spawn point sampler
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from spawning import SpawnSampler
+
+
+def test_points_are_outside_the_exclusion_circle():
+    sampler = SpawnSampler(200, 100, (80, 40), 50)
+    points = sampler.sample(2000, np.random.default_rng(1))
+
+    assert ((points[:, 0] - 80) ** 2 + (points[:, 1] - 40) ** 2 > 50 ** 2).all()
+    assert ((0 <= points) & (points <= (200, 100))).all()
+
+
+def test_all_allowed_points_are_counted():
+    sampler = SpawnSampler(30, 20, (10, 12), 7)
+    allowed = sum((x - 10) ** 2 + (y - 12) ** 2 > 7 ** 2 for x in range(31) for y in range(21))
+    assert sampler.count == allowed
+
+    # Every allowed point has a number, and every number gives a different allowed point
+    points = sampler.points_from_indices(np.arange(sampler.count))
+    assert len({tuple(p) for p in points.tolist()}) == allowed
+
+
+def test_sampling_ends_without_room_for_the_spacing():
+    sampler = SpawnSampler(100, 100, (50, 50), 10)
+    # No room for 50 points 1000 apart, the best candidates are used instead
+    points = sampler.sample(50, random.Random(1), min_spacing=1000)
+    assert points.shape == (50, 2)
+
+
+def test_sampling_a_field_without_allowed_points_fails():
+    sampler = SpawnSampler(10, 10, (5, 5), 100)
+    assert sampler.empty
+    with pytest.raises(ValueError):
+        sampler.sample(1, random.Random(1))
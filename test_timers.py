@@ -0,0 +1,51 @@
+"""
+Tests of the timer scheduler
+"""
+
+from timers import Scheduler
+
+
+class Owner:
+    speed_scale = 1.0
+    timers = None
+
+
+def test_timers_run_in_order_when_they_run_out():
+    scheduler = Scheduler()
+    ran = []
+    scheduler.schedule(2, ran.append, "b")
+    scheduler.schedule(1, ran.append, "a")
+    scheduler.schedule(2, ran.append, "c")
+
+    scheduler.advance(1.5)
+    assert ran == ["a"]
+    scheduler.advance(1)
+    assert ran == ["a", "b", "c"]
+    assert scheduler.fired == 3
+
+
+def test_cancel_owner_cancels_only_its_timers():
+    scheduler = Scheduler()
+    owner, other = Owner(), Owner()
+    ran = []
+    scheduler.schedule(1, ran.append, "owner", owner=owner)
+    scheduler.schedule(2, ran.append, "owner", owner=owner)
+    scheduler.schedule(1, ran.append, "other", owner=other)
+
+    scheduler.cancel_owner(owner)
+    scheduler.advance(3)
+
+    assert ran == ["other"]
+    assert owner.timers is None
+    assert other.timers == []
+
+
+def test_owner_speed_scale_shortens_its_timers():
+    scheduler = Scheduler()
+    owner = Owner()
+    owner.speed_scale = 2.0
+    ran = []
+    scheduler.schedule(2, ran.append, "fast", owner=owner)
+
+    scheduler.advance(1)
+    assert ran == ["fast"]
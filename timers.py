@@ -0,0 +1,112 @@
+"""
+Timers of a running game.
+Sprites and the simulation register callbacks to run after some seconds of game time.
+All timers are kept in one heap ordered by when they run out, so advancing the time
+only does work for the timers which run out, instead of counting down every timer every tick.
+"""
+
+import heapq
+import itertools
+from typing import Callable, List, Tuple
+
+
+class Timer:
+    """
+    A callback waiting to be run. Cancelled timers stay in the heap, but are skipped when they run out.
+    """
+
+    __slots__ = ("when", "callback", "args", "owner", "cancelled")
+
+    def __init__(self, when: float, callback: Callable, args: tuple, owner=None):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.owner = owner
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        # Let go of the callback and its arguments at once, the timer may stay in the heap for a while
+        self.callback = None
+        self.args = ()
+        self.owner = None
+
+
+class Scheduler:
+    """
+    Runs callbacks after a number of seconds of game time. The time only moves when advance() is called.
+
+    A timer can have an owner, like a sprite. The owner keeps its timers in its timers attribute,
+    and they are all cancelled with cancel_owner(), for example when the sprite is killed.
+    Timers of an owner with a speed_scale run out speed_scale times faster.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        # (when, number, timer). The number keeps timers running out at the same time in the order they were made.
+        self.heap: List[Tuple[float, int, Timer]] = []
+        self.counter = itertools.count()
+        # Timers run since the scheduler was made
+        self.fired = 0
+
+    def __len__(self):
+        """
+        Number of timers in the heap, including cancelled ones not run out yet
+        """
+        return len(self.heap)
+
+    def schedule(self, delay: float, callback: Callable, *args, owner=None) -> Timer:
+        """
+        Call callback(*args) after delay seconds
+        """
+        if owner is not None:
+            delay /= owner.speed_scale
+
+        timer = Timer(self.time + delay, callback, args, owner)
+        heapq.heappush(self.heap, (timer.when, next(self.counter), timer))
+
+        if owner is not None:
+            if owner.timers is None:
+                owner.timers = []
+            owner.timers.append(timer)
+
+        return timer
+
+    def cancel_owner(self, owner):
+        """
+        Cancel all timers of an owner
+        """
+        if owner.timers:
+            for timer in owner.timers:
+                timer.cancel()
+        owner.timers = None
+
+    def advance(self, delta_time: float):
+        """
+        Move the time forward, and run the callbacks of all timers running out, in the order they run out
+        """
+        self.time += delta_time
+        heap = self.heap
+
+        while heap and heap[0][0] <= self.time:
+            timer = heapq.heappop(heap)[2]
+            if timer.cancelled:
+                continue
+
+            callback, args, owner = timer.callback, timer.args, timer.owner
+            if owner is not None:
+                owner.timers.remove(timer)
+            timer.cancel()
+
+            self.fired += 1
+            callback(*args)
+
+    def clear(self):
+        """
+        Cancel all timers
+        """
+        for when, n, timer in self.heap:
+            if timer.owner is not None:
+                timer.owner.timers = None
+            timer.cancel()
+        self.heap = []
@@ -4,28 +4,13 @@ Like the Joysticks.
 """
 
 import arcade
+import numpy as np
 import tomli
 from typing import Tuple
 import random
-from game_sprites import Star
 
 
 
-def wrap(sprite: arcade.Sprite, max_x: int, max_y: int):
-    """
-    if sprite is off-screen move it to the other side of the screen
-    """
-    if sprite.right < 0:
-        sprite.center_x += max_x
-    elif sprite.left > max_x:
-        sprite.center_x -= max_x
-
-    if sprite.top < 0:
-        sprite.center_y += max_y
-    elif sprite.bottom > max_y:
-        sprite.center_y -= max_y
-
-
 def get_joystick(func_press, func_release=None, func_axis=None, func_jhat=None):
     """
     :param func_press:
@@ -69,9 +54,56 @@ def load_toml(filename):
         print("File " + filename + " Not Found")
         return {}
 
+class ThrustParticle(arcade.FadeParticle):
+    """
+    A particle which is given back to its emitter when it dies, so it can be used again
+    """
+
+    def __init__(self, free_particles: list, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.free_particles = free_particles
+
+    def reset(self, texture: arcade.Texture, change_xy: Tuple[float, float], lifetime: float, start_alpha: int):
+        """
+        Make a dead particle new again
+        """
+        self.texture = texture
+        self.position = (0.0, 0.0)
+        self.change_x, self.change_y = change_xy
+        self.lifetime_original = lifetime
+        self.lifetime_elapsed = 0.0
+        self.start_alpha = start_alpha
+        self.alpha = start_alpha
+
+    def kill(self):
+        super().kill()
+        self.free_particles.append(self)
+
+
+class CountedEmitInterval(arcade.EmitInterval):
+    """
+    Emits a particle every emit_interval seconds, until the particles in remaining are used up.
+    Like arcade.EmitterIntervalWithCount, but remaining can be changed to start and stop emitting.
+    """
+
+    def __init__(self, emit_interval: float, remaining: int = 0):
+        super().__init__(emit_interval)
+        self.remaining = remaining
+
+    def how_many(self, delta_time: float, current_particle_count: int) -> int:
+        count = min(super().how_many(delta_time, current_particle_count), self.remaining)
+        self.remaining -= count
+        return count
+
+    def is_complete(self) -> bool:
+        return self.remaining <= 0
+
+
 class StoppableEmitter:
     """
-    It is possible to start and stop this emitter
+    It is possible to start and stop this emitter.
+    Textures are made once and shared by all emitters, and dead particles are reused.
+    A stopped emitter without particles left does nothing when updated and drawn.
     """
 
     particle_colors = [
@@ -80,6 +112,13 @@ class StoppableEmitter:
         arcade.color.RED_ORANGE
     ]
 
+    # Sizes of the particles
+    particle_min_diameter = 7
+    particle_max_diameter = 30
+
+    # Circle textures for particles by (diameter, color)
+    texture_bank = {}
+
     def __init__(self,
                  target: arcade.Sprite,
                  particle_lifetime: float = 0.5,
@@ -91,6 +130,9 @@ class StoppableEmitter:
 
         self.target = target
         self.noise = noise
+        self.offset = offset
+        self.particle_lifetime = particle_lifetime
+        self.start_alpha = start_alpha
         self.emit_interval = emit_interval
         self.particle_count = particle_count
         self.particle_color = StoppableEmitter.particle_colors[0]
@@ -98,61 +140,190 @@ class StoppableEmitter:
         # Emit controller enters endless loop with an interval of 0
         assert self.emit_interval > 0, "Emit interval must be greater than 0"
 
+        StoppableEmitter.fill_texture_bank()
+
+        # Dead particles ready to be used again
+        self.free_particles = []
+
+        # The emitter is started and stopped by changing the number of particles left to emit
+        self.rate = CountedEmitInterval(self.emit_interval)
+
         # An emitter with a controller which does not have particles to emit (it's off)
         self.emitter = arcade.Emitter(
             center_xy=target.position,
-            emit_controller=arcade.EmitterIntervalWithCount(self.emit_interval, 0),
-            particle_factory=lambda emitter: arcade.FadeParticle(
-                filename_or_texture=arcade.make_circle_texture(random.randint(7, 30), self.particle_color),
-                change_xy=offset,
-                lifetime=particle_lifetime,
-                start_alpha=start_alpha
-            )
+            emit_controller=self.rate,
+            particle_factory=self.make_particle
+        )
+
+    @classmethod
+    def fill_texture_bank(cls):
+        """
+        Make the textures for all particle sizes and colors, if not made already
+        """
+        if cls.texture_bank:
+            return
+        for diameter in range(cls.particle_min_diameter, cls.particle_max_diameter + 1):
+            for color in cls.particle_colors:
+                cls.texture_bank[(diameter, color)] = arcade.make_circle_texture(diameter, color)
+
+    def make_particle(self, emitter):
+        """
+        A particle of random size in the current color. Reuses a dead particle if there is one.
+        """
+        texture = StoppableEmitter.texture_bank[(
+            random.randint(self.particle_min_diameter, self.particle_max_diameter),
+            self.particle_color
+        )]
+
+        if self.free_particles:
+            particle = self.free_particles.pop()
+            particle.reset(texture, self.offset, self.particle_lifetime, self.start_alpha)
+            return particle
+
+        return ThrustParticle(
+            self.free_particles,
+            filename_or_texture=texture,
+            change_xy=self.offset,
+            lifetime=self.particle_lifetime,
+            start_alpha=self.start_alpha
         )
 
+    @property
+    def is_idle(self):
+        """
+        Stopped, and all particles are gone
+        """
+        return self.rate.is_complete() and self.emitter.get_count() == 0
+
     def start(self):
         """
         Start emitter
         """
-        self.emitter.rate_factory = arcade.EmitterIntervalWithCount(self.emit_interval, self.particle_count)
+        self.rate.remaining = self.particle_count
 
     def stop(self):
         """
         Stop emitter
         """
-        self.emitter.rate_factory = arcade.EmitterIntervalWithCount(self.emit_interval, 0)
+        self.rate.remaining = 0
 
     def update(self):
+        if self.is_idle:
+            return
         self.emitter.center_x, self.emitter.center_y = self.target.position
         self.emitter.angle = (self.target.angle + 90) + random.randint(-1 * self.noise, self.noise)
         self.emitter.update()
         # Particles have random colors
         self.particle_color = StoppableEmitter.particle_colors[random.randint(0, 2)]
 
+    def draw(self):
+        if self.is_idle:
+            return
+        self.emitter.draw()
+
+
+# The functions below work on the internals of arcade 2.6.17 SpriteLists and Sprites, the version pinned in
+# requirements.txt: the per-sprite buffers (_sprite_*_data), their changed flags, the index buffer and the geometry.
+# They are the only code of the game touching private parts of arcade. Check them when arcade is upgraded.
+
 
-def get_stars(no_of_stars: int, max_x: int, max_y: int, base_size: int, scale: int, fadespeed: int) -> arcade.SpriteList:
+def init_sprite_list(sprite_list: arcade.SpriteList):
     """
-    Return a SpriteList of randomly positioned stars.
+    Make the buffers and the texture atlas of a SpriteList, which arcade only makes when it is first drawn
     """
+    if not sprite_list._initialized:
+        sprite_list._init_deferred()
 
-    # A list to store the stars in
-    stars = arcade.SpriteList()
 
-    # Add stars
-    for i in range(no_of_stars):
-        # Calculate a random postion
-        p = (
-            random.randint(0, max_x),
-            random.randint(0, max_y),
-        )
-        # Add star
-        s = Star(
-            position=p,
-            base_size=base_size,
-            scale=scale,
-            fade_speed=fadespeed,
-        )
-        stars.append(s)
+def set_sprite_transforms(sprites: list, x: list, y: list, angles: list):
+    """
+    Set the position and angle of many sprites, without the setters writing each of them to their SpriteLists.
+    Their SpriteLists are written in bulk with write_sprite_positions() and write_sprite_angles().
+    """
+    for sprite, sprite_x, sprite_y, angle in zip(sprites, x, y, angles):
+        sprite._position = (sprite_x, sprite_y)
+        sprite._angle = angle
+        # The hit box moved
+        sprite._point_list_cache = None
+
+
+def write_sprite_positions(sprite_list: arcade.SpriteList, slots: np.ndarray, x: np.ndarray, y: np.ndarray):
+    """
+    Write the positions of many sprites straight into the buffers of a SpriteList.
+    slots are the buffer slots of the sprites (SpriteList.sprite_slot). The sprites themselves are not changed.
+    """
+    # Views of the buffers must not outlive the function, or the SpriteList can't grow them
+    pos = np.frombuffer(sprite_list._sprite_pos_data, dtype=np.float32)
+    pos[slots * 2] = x
+    pos[slots * 2 + 1] = y
+    del pos
+    sprite_list._sprite_pos_changed = True
+
+
+def write_sprite_angles(sprite_list: arcade.SpriteList, slots: np.ndarray, angles: np.ndarray):
+    """
+    Write the angles of many sprites straight into the buffers of a SpriteList
+    """
+    buffer = np.frombuffer(sprite_list._sprite_angle_data, dtype=np.float32)
+    buffer[slots] = angles
+    del buffer
+    sprite_list._sprite_angle_changed = True
+
 
-    return stars
+def write_sprite_alphas(sprite_list: arcade.SpriteList, slots: np.ndarray, alphas: np.ndarray):
+    """
+    Write the alpha values (0 - 255) of many sprites straight into the buffers of a SpriteList
+    """
+    colors = np.frombuffer(sprite_list._sprite_color_data, dtype=np.uint8)
+    colors[slots * 4 + 3] = alphas
+    del colors
+    sprite_list._sprite_color_changed = True
+
+
+def write_sprite_sizes(sprite_list: arcade.SpriteList, slots: np.ndarray, width: np.ndarray, height: np.ndarray):
+    """
+    Write the sizes (in pixels) of many sprites straight into the buffers of a SpriteList
+    """
+    sizes = np.frombuffer(sprite_list._sprite_size_data, dtype=np.float32)
+    sizes[slots * 2] = width
+    sizes[slots * 2 + 1] = height
+    del sizes
+    sprite_list._sprite_size_changed = True
+
+
+def write_sprite_textures(sprite_list: arcade.SpriteList, slots: np.ndarray, texture_slots: np.ndarray):
+    """
+    Write the textures of many sprites straight into the buffers of a SpriteList.
+    texture_slots are the slots of the textures in the atlas of the SpriteList (TextureAtlas.add()).
+    """
+    buffer = np.frombuffer(sprite_list._sprite_texture_data, dtype=np.float32)
+    buffer[slots] = texture_slots
+    del buffer
+    sprite_list._sprite_texture_changed = True
+
+
+def draw_sprite_slots(sprite_list: arcade.SpriteList, slots: np.ndarray):
+    """
+    Draw only the sprites in the given buffer slots of a SpriteList, like SpriteList.draw() draws them all.
+    The slots are written to the index buffer on the GPU, which is written again in full on the next draw().
+    """
+    if len(slots) == 0 or not sprite_list.visible:
+        return
+
+    init_sprite_list(sprite_list)
+    sprite_list._write_sprite_buffers_to_gpu()
+    sprite_list._sprite_index_buf.write(np.ascontiguousarray(slots, dtype=np.int32).tobytes())
+    sprite_list._sprite_index_changed = True
+
+    ctx = sprite_list.ctx
+    ctx.enable(ctx.BLEND)
+    ctx.blend_func = ctx.BLEND_DEFAULT
+    sprite_list.atlas.texture.filter = ctx.LINEAR, ctx.LINEAR
+    try:
+        sprite_list.program["spritelist_color"] = sprite_list._color
+    except KeyError:
+        pass
 
+    sprite_list.atlas.texture.use(0)
+    sprite_list.atlas.use_uv_texture(1)
+    sprite_list._geometry.render(sprite_list.program, mode=ctx.POINTS, vertices=len(slots))